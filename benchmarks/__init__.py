@@ -0,0 +1 @@
+"""Micro-benchmarks and load tests for Whisper Dictation."""
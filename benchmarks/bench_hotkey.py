@@ -0,0 +1,49 @@
+# benchmarks/bench_hotkey.py
+"""Per-event overhead of the global hotkey handlers.
+
+Every key event on the machine goes through HotkeyListener, so this measures
+the cost of rejecting ordinary typing and of handling the hotkey itself.
+
+Usage: python -m benchmarks.bench_hotkey [events]
+"""
+import sys
+import time
+from pynput.keyboard import Key, KeyCode
+from src.hotkey import HotkeyListener
+
+
+def _per_event_ns(handler, keys: list, repeat: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        for key in keys:
+            handler(key)
+    return (time.perf_counter_ns() - start) / (repeat * len(keys))
+
+
+def main(events: int = 1_000_000):
+    noop = lambda: None
+    listener = HotkeyListener(
+        on_press=noop,
+        on_release=noop,
+        hotkey="ctrl+shift+d",
+        bindings={"ctrl+alt+s": (noop, noop), "caps_lock": (noop, noop)},
+    )
+
+    typing = [KeyCode.from_char(c) for c in "the quick brown fox jumps over the lazy dog"] + [Key.space]
+    repeat = max(events // len(typing), 1)
+
+    baseline = _per_event_ns(lambda key: None, typing, repeat)
+    press = _per_event_ns(listener._handle_press, typing, repeat)
+    release = _per_event_ns(listener._handle_release, typing, repeat)
+    chord = [Key.ctrl_l, Key.shift_l, KeyCode.from_char("d")]
+    chord_press = _per_event_ns(listener._handle_press, chord, max(repeat // 10, 1))
+
+    print(f"Events per case:          {repeat * len(typing):,}")
+    print(f"Empty call baseline:      {baseline:8.1f} ns/event")
+    print(f"Non-matching press:       {press:8.1f} ns/event")
+    print(f"Non-matching release:     {release:8.1f} ns/event")
+    print(f"Chord key press:          {chord_press:8.1f} ns/event")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,118 @@
+# benchmarks/bench_ingest.py
+"""Concurrent-session throughput of the remote ingestion WebSocket.
+
+Starts the dashboard server with an ingest pool whose transcriber and
+formatter are stand-ins with fixed latencies, then drives many simulated
+clients that each stream several utterances.
+
+Usage: python -m benchmarks.bench_ingest [sessions] [utterances] [workers]
+"""
+import asyncio
+import json
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+import uvicorn
+import websockets
+
+from src import server
+from src.ingest import IngestPool
+
+TRANSCRIBE_SECONDS = 0.3
+TOKEN_SECONDS = 0.01
+TOKENS = 20
+FRAME_SAMPLES = 320  # 20ms frames
+UTTERANCE_SECONDS = 3
+
+
+class StandInTranscriber:
+    def transcribe(self, audio: np.ndarray, params=None) -> str:
+        time.sleep(TRANSCRIBE_SECONDS)
+        return "word " * TOKENS
+
+
+class StandInFormatter:
+    def format(self, raw_text: str, on_token=None, mode=None, params=None) -> str:
+        for token in raw_text.split():
+            time.sleep(TOKEN_SECONDS)
+            on_token(token + " ")
+        return raw_text
+
+
+async def _session(port: int, index: int, utterances: int, latencies: list, first_tokens: list, errors: list):
+    frame = np.zeros(FRAME_SAMPLES, dtype="<i2").tobytes()
+    frames = UTTERANCE_SECONDS * 16000 // FRAME_SAMPLES
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/ingest?client_id=c{index}") as ws:
+        for _ in range(utterances):
+            for _ in range(frames):
+                await ws.send(frame)
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"type": "end"}))
+            first = None
+            while True:
+                message = json.loads(await ws.recv())
+                if message["type"] == "token" and first is None:
+                    first = time.perf_counter() - sent
+                if message["type"] != "token":
+                    break
+            if message["type"] == "error":
+                errors.append(message["error"])  # Not a finished utterance: no latency
+                continue
+            latencies.append(time.perf_counter() - sent)
+            first_tokens.append(first or 0.0)
+
+
+async def _run(port: int, sessions: int, utterances: int) -> tuple[list, list, list, float]:
+    latencies, first_tokens, errors = [], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _session(port, i, utterances, latencies, first_tokens, errors) for i in range(sessions)
+    ])
+    return latencies, first_tokens, errors, time.perf_counter() - start
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main(sessions: int = 32, utterances: int = 3, workers: int = 8):
+    pool = IngestPool(StandInTranscriber(), StandInFormatter(), workers=workers)
+    pool.start()
+    server.set_ingest_pool(pool)
+
+    port = _free_port()
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning")
+    uv = uvicorn.Server(config)
+    threading.Thread(target=uv.run, daemon=True).start()
+    while not uv.started:
+        time.sleep(0.05)
+
+    latencies, first_tokens, errors, elapsed = asyncio.run(_run(port, sessions, utterances))
+    uv.should_exit = True
+    pool.stop()
+
+    if errors:
+        print(f"Errors: {len(errors)} of {sessions * utterances} utterances, e.g. {errors[0]}")
+    if not latencies:
+        sys.exit("No utterance finished; nothing to report")
+
+    service = TRANSCRIBE_SECONDS + TOKENS * TOKEN_SECONDS
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+    print(f"Sessions: {sessions}, utterances each: {utterances}, workers: {workers}")
+    print(f"Per-utterance service time: {service * 1000:.0f} ms")
+    print(f"Throughput:       {len(latencies) / elapsed:.2f} utterances/s "
+          f"(ideal {workers / service:.2f})")
+    print(f"Audio throughput: {len(latencies) * UTTERANCE_SECONDS / elapsed:.1f} audio-s/s")
+    print(f"Latency p50/p95:  {statistics.median(latencies) * 1000:.0f} / {p95 * 1000:.0f} ms")
+    print(f"First token p50:  {statistics.median(first_tokens) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    main(*args)
@@ -0,0 +1,68 @@
+# benchmarks/bench_logging.py
+"""Per-token cost of logging on the thread that streams tokens.
+
+Compares the old setup (basicConfig at DEBUG, eager f-strings with repr of
+the transcript, written synchronously) against the queue-based setup in
+src.log, both with DEBUG enabled and at the default INFO level. Times are
+measured on the logging thread only; that is the latency typing sees.
+
+Usage: python -m benchmarks.bench_logging [tokens]
+"""
+import logging
+import os
+import sys
+import time
+
+from src.log import Transcript, configure_logging, stop_logging
+
+TOKEN = "word "
+
+
+def _reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+
+def _stream_eager(logger: logging.Logger, tokens: int) -> float:
+    text = ""
+    start = time.perf_counter_ns()
+    for _ in range(tokens):
+        text += TOKEN
+        logger.debug(f"Token received, text so far: {repr(text)}")
+    return (time.perf_counter_ns() - start) / tokens
+
+
+def _stream_lazy(logger: logging.Logger, tokens: int) -> float:
+    text = ""
+    start = time.perf_counter_ns()
+    for _ in range(tokens):
+        text += TOKEN
+        logger.debug("Token received, text so far: %r", Transcript(text))
+    return (time.perf_counter_ns() - start) / tokens
+
+
+def main(tokens: int = 2000):
+    logger = logging.getLogger("bench.formatter")
+    with open(os.devnull, "w") as sink:
+        _reset_root()
+        logging.basicConfig(level=logging.DEBUG, stream=sink, force=True)
+        before = _stream_eager(logger, tokens)
+
+        configure_logging(level="DEBUG", levels={}, handlers=[logging.StreamHandler(sink)])
+        after_debug = _stream_lazy(logger, tokens)
+        stop_logging()
+
+        configure_logging(level="INFO", levels={}, handlers=[logging.StreamHandler(sink)])
+        after_info = _stream_lazy(logger, tokens)
+        stop_logging()
+    _reset_root()
+
+    print(f"Tokens per run: {tokens}")
+    print(f"Before (sync, eager, DEBUG):   {before / 1000:8.2f} us/token")
+    print(f"After  (queue, lazy, DEBUG):   {after_debug / 1000:8.2f} us/token")
+    print(f"After  (queue, lazy, INFO):    {after_info / 1000:8.2f} us/token")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,183 @@
+# src/archive.py
+"""Compressed, append-only archive of recorded takes."""
+import io
+import mmap
+import os
+import re
+import struct
+import wave
+import zlib
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+
+# Record header: magic, id length, sample count, payload length
+_HEADER = struct.Struct("<4sHII")
+_MAGIC = b"WDA1"
+_SEGMENT_RE = re.compile(r"^segment-(\d{6})\.dat$")
+
+
+def encode_audio(audio: np.ndarray) -> bytes:
+    """Compress float32 audio as delta-coded 16-bit PCM.
+
+    Speech is dominated by low frequencies, so first-order deltas compress
+    noticeably better under zlib than raw samples. Int16 wraparound makes the
+    delta coding lossless.
+    """
+    samples = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    deltas = np.diff(samples, prepend=np.int16(0)).astype("<i2")
+    return zlib.compress(deltas.tobytes(), 6)
+
+
+def decode_audio(payload: bytes, samples: int) -> np.ndarray:
+    """Inverse of encode_audio - returns float32 audio in [-1, 1]."""
+    deltas = np.frombuffer(zlib.decompress(payload), dtype="<i2", count=samples)
+    return np.cumsum(deltas, dtype=np.int16).astype(np.float32) / 32767
+
+
+def to_wav_bytes(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Encode float32 audio as a 16-bit mono WAV file."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+class AudioArchive:
+    """Stores each take as a compressed record in append-only segment files.
+
+    Records are only ever appended to the newest segment; reads go through a
+    memory map of the segment. When the archive grows past ``max_bytes`` the
+    oldest whole segments are deleted. The index (entry id -> record location)
+    is rebuilt from the segment headers on startup, so there is no separate
+    index file to get out of sync.
+    """
+
+    SEGMENT_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, segment_bytes: Optional[int] = None):
+        self._dir = directory
+        self._max_bytes = max_bytes
+        self._segment_bytes = segment_bytes or self.SEGMENT_BYTES
+        self._lock = Lock()
+        # entry id -> (segment number, payload offset, payload length, sample count)
+        self._index: dict[str, tuple[int, int, int, int]] = {}
+        self._segments: dict[int, int] = {}  # segment number -> size in bytes
+        self._maps: dict[int, mmap.mmap] = {}
+        self._active: Optional[int] = None
+        self._file = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self._dir, f"segment-{number:06d}.dat")
+
+    def _load(self):
+        """Rebuild the index by scanning record headers in every segment."""
+        numbers = sorted(
+            int(m.group(1)) for m in map(_SEGMENT_RE.match, os.listdir(self._dir)) if m
+        )
+        for number in numbers:
+            path = self._segment_path(number)
+            valid = 0
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                while valid + _HEADER.size <= size:
+                    f.seek(valid)
+                    magic, id_len, samples, length = _HEADER.unpack(f.read(_HEADER.size))
+                    end = valid + _HEADER.size + id_len + length
+                    if magic != _MAGIC or end > size:
+                        break
+                    entry_id = f.read(id_len).decode("utf-8")
+                    self._index[entry_id] = (number, end - length, length, samples)
+                    valid = end
+            if valid < size:
+                # Drop a record torn by a crash mid-write
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+            self._segments[number] = valid
+        if numbers:
+            self._active = numbers[-1]
+
+    def _open_active(self, needed: int):
+        """Ensure the active segment is open for append and has room."""
+        if self._active is None or self._segments[self._active] + needed > self._segment_bytes:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self._active = (self._active or 0) + 1
+            self._segments[self._active] = 0
+        if self._file is None:
+            self._file = open(self._segment_path(self._active), "ab")
+
+    def put(self, entry_id: str, audio: np.ndarray):
+        """Append a take to the archive under the given history entry id."""
+        payload = encode_audio(audio)
+        key = entry_id.encode("utf-8")
+        record = _HEADER.pack(_MAGIC, len(key), len(audio), len(payload)) + key + payload
+
+        with self._lock:
+            self._open_active(len(record))
+            offset = self._segments[self._active]
+            self._file.write(record)
+            self._file.flush()
+            self._segments[self._active] = offset + len(record)
+            self._index[entry_id] = (self._active, offset + len(record) - len(payload), len(payload), len(audio))
+            self._evict()
+
+    def get(self, entry_id: str) -> Optional[np.ndarray]:
+        """Return the audio stored for an entry, or None if it is not archived."""
+        with self._lock:
+            location = self._index.get(entry_id)
+            if location is None:
+                return None
+            number, offset, length, samples = location
+            mapped = self._maps.get(number)
+            if mapped is None or len(mapped) < offset + length:
+                if mapped is not None:
+                    mapped.close()
+                with open(self._segment_path(number), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[number] = mapped
+            payload = mapped[offset:offset + length]
+        return decode_audio(payload, samples)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes currently used on disk."""
+        return sum(self._segments.values())
+
+    def _evict(self):
+        """Delete the oldest segments until the archive fits in max_bytes."""
+        while self.total_bytes > self._max_bytes and len(self._segments) > 1:
+            oldest = min(self._segments)
+            mapped = self._maps.pop(oldest, None)
+            if mapped is not None:
+                mapped.close()
+            os.remove(self._segment_path(oldest))
+            del self._segments[oldest]
+            self._index = {k: v for k, v in self._index.items() if v[0] != oldest}
+
+    def close(self):
+        """Close open files and memory maps."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
@@ -1,8 +1,8 @@
 # src/audio.py
 """Audio recording from microphone."""
 import numpy as np
-import sounddevice as sd
 from threading import Lock
+from typing import Callable, Optional
 
 
 class AudioRecorder:
@@ -11,23 +11,41 @@ class AudioRecorder:
     SAMPLE_RATE = 16000  # Whisper expects 16kHz
     CHANNELS = 1
 
-    def __init__(self):
+    def __init__(self, input_stream: Optional[Callable] = None):
+        """
+        Args:
+            input_stream: Stream class with the sd.InputStream interface,
+                e.g. a fake device for soak tests; defaults to the microphone
+        """
         self.is_recording = False
         self._audio_chunks: list[np.ndarray] = []
         self._lock = Lock()
         self._stream = None
+        self._on_block: Optional[Callable[[int], None]] = None
+        if input_stream is None:
+            import sounddevice as sd  # Needs PortAudio; not loaded for injected streams
+
+            input_stream = sd.InputStream
+        self._input_stream = input_stream
 
     def _audio_callback(self, indata, frames, time_info, status):
         """Called by sounddevice for each audio chunk."""
         if self.is_recording:
             with self._lock:
                 self._audio_chunks.append(indata.copy())
+            if self._on_block is not None:
+                self._on_block(frames)
+
+    def start(self, on_block: Optional[Callable[[int], None]] = None):
+        """Start recording audio.
 
-    def start(self):
-        """Start recording audio."""
+        Args:
+            on_block: Called with the frame count of each block as it arrives
+        """
         self._audio_chunks = []
+        self._on_block = on_block
         self.is_recording = True
-        self._stream = sd.InputStream(
+        self._stream = self._input_stream(
             samplerate=self.SAMPLE_RATE,
             channels=self.CHANNELS,
             dtype=np.float32,
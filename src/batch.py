@@ -0,0 +1,241 @@
+# src/batch.py
+"""Batch transcription of audio files and folders.
+
+Usage:
+    python -m src.batch recordings/ notes/memo.m4a -o transcripts.jsonl -j 4
+
+Each finished file is appended to the output as one JSON line, so an
+interrupted run picks up where it left off when started again with the same
+output file.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+
+from src.formatter import TextFormatter
+from src.ingest import SAMPLE_RATE, decode_wav
+from src.log import configure_logging
+from src.ratelimit import RateLimitScheduler
+from src.transcribe import WhisperTranscriber
+
+# Formats the Whisper API accepts directly
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".mp4", ".mpeg", ".mpga", ".ogg", ".oga", ".flac", ".webm"}
+
+# Files up to the API upload limit are sent whole
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Larger 16-bit WAV recordings are split so each request stays under the limit
+CHUNK_SECONDS = 600
+
+# Per-process pipeline, created once by _init_worker
+_transcriber: Optional[WhisperTranscriber] = None
+_formatter: Optional[TextFormatter] = None
+
+
+def find_audio_files(inputs: Iterable[str]) -> list[str]:
+    """Expand files and folders into a sorted list of audio file paths."""
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in names:
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        found.add(os.path.abspath(os.path.join(root, name)))
+        elif os.path.isfile(item):
+            found.add(os.path.abspath(item))
+    return sorted(found)
+
+
+def _file_key(path: str) -> tuple[str, int, int]:
+    """Identity of a file version: path, size and modification time."""
+    stat = os.stat(path)
+    return path, stat.st_size, int(stat.st_mtime)
+
+
+def _is_done(path: str, done: set[tuple[str, int, int]]) -> bool:
+    """Whether this version of a file is in the checkpoint."""
+    try:
+        return _file_key(path) in done
+    except FileNotFoundError:
+        return False  # Removed since it was listed; process_file records the error
+
+
+def load_checkpoint(output: str) -> set[tuple[str, int, int]]:
+    """Return the files already transcribed successfully in an output file."""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Line torn by an interrupted write
+            if record.get("status") == "ok":
+                done.add((record["path"], record["size"], record["mtime"]))
+    return done
+
+
+def _init_worker(api_key: str, mode: str, max_concurrency: int):
+    """Create the transcriber and formatter once per worker process."""
+    global _transcriber, _formatter
+    # Paces calls from the org's rate-limit headers instead of piling up 429s
+    scheduler = RateLimitScheduler(max_concurrency=max_concurrency)
+    _transcriber = WhisperTranscriber(api_key=api_key, scheduler=scheduler)
+    _formatter = TextFormatter(api_key=api_key, mode=mode, scheduler=scheduler)
+
+
+def process_file(path: str) -> dict:
+    """Transcribe and format one file. Runs in a worker."""
+    record = {"path": path}
+    start = time.perf_counter()
+    try:
+        _, size, mtime = _file_key(path)
+        record.update(size=size, mtime=mtime)
+        audio = None
+        if size > MAX_UPLOAD_BYTES and path.lower().endswith(".wav"):
+            with open(path, "rb") as f:
+                try:
+                    audio = decode_wav(f.read())
+                except ValueError:
+                    pass  # 24-bit, float, ...: Whisper reads these itself
+        if audio is not None:
+            duration = len(audio) / SAMPLE_RATE
+            step = CHUNK_SECONDS * SAMPLE_RATE
+            raw_parts = [_transcriber.transcribe(audio[i:i + step]) for i in range(0, len(audio), step)]
+        else:
+            if size > MAX_UPLOAD_BYTES:
+                raise ValueError(
+                    f"{size / 1024 / 1024:.0f} MB is over the {MAX_UPLOAD_BYTES // 1024 // 1024} MB upload limit; "
+                    "convert to 16-bit WAV to have it split"
+                )
+            raw_text, duration = _transcriber.transcribe_file(path)
+            raw_parts = [raw_text]
+
+        # Chunk boundaries fall mid-sentence, so chunks are never joined as paragraphs
+        raw_parts = [part for part in raw_parts if part]
+        record.update(
+            status="ok",
+            duration=round(duration, 2),
+            raw=" ".join(raw_parts),
+            text=" ".join(_formatter.format(part) for part in raw_parts),
+        )
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed"] = round(time.perf_counter() - start, 2)
+    return record
+
+
+def run(
+    files: list[str],
+    output: str,
+    api_key: str,
+    mode: str = "document",
+    workers: int = 4,
+    use_processes: bool = False,
+    resume: bool = True,
+) -> dict:
+    """Transcribe files with bounded concurrency, appending results to output.
+
+    Returns:
+        Summary with counts, audio minutes and the audio/wall-clock speed ratio
+    """
+    done = load_checkpoint(output) if resume else set()
+    pending = [path for path in files if not _is_done(path, done)]
+    skipped = len(files) - len(pending)
+
+    if use_processes:
+        # Each process has its own scheduler: one call at a time keeps the total
+        # at workers, but 429 backoff cannot go below one call per process
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(api_key, mode, 1))
+    else:
+        _init_worker(api_key, mode, workers)  # Threads share one client and scheduler
+        executor = ThreadPoolExecutor(workers)
+
+    summary = {"files": len(files), "skipped": skipped, "ok": 0, "errors": 0, "audio_minutes": 0.0}
+    start = time.perf_counter()
+    queue = iter(pending)
+    in_flight: set[Future] = set()
+
+    with open(output, "a" if resume else "w", encoding="utf-8") as out:
+        try:
+            while True:
+                # Keep at most two files per worker queued so memory stays bounded
+                while len(in_flight) < workers * 2:
+                    path = next(queue, None)
+                    if path is None:
+                        break
+                    in_flight.add(executor.submit(process_file, path))
+                if not in_flight:
+                    break
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+
+                    if record["status"] == "ok":
+                        summary["ok"] += 1
+                        summary["audio_minutes"] += record["duration"] / 60
+                    else:
+                        summary["errors"] += 1
+                    count = skipped + summary["ok"] + summary["errors"]
+                    print(f"[{count}/{len(files)}] {record['status']:5} {record['path']}", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("Interrupted - rerun with the same output to resume.", file=sys.stderr)
+            summary["interrupted"] = True
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    wall_minutes = (time.perf_counter() - start) / 60
+    summary["wall_minutes"] = wall_minutes
+    summary["speed"] = summary["audio_minutes"] / wall_minutes if wall_minutes else 0.0
+    return summary
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Transcribe and format audio files in bulk.")
+    parser.add_argument("inputs", nargs="+", help="Audio files or folders")
+    parser.add_argument("-o", "--output", default="transcripts.jsonl", help="JSONL output (also the resume checkpoint)")
+    parser.add_argument("-j", "--workers", type=int, default=4, help="Files processed concurrently")
+    parser.add_argument("--mode", default="document", choices=("single-line", "document"))
+    parser.add_argument("--processes", action="store_true", help="Use worker processes instead of threads (rate-limit backoff is per process)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and overwrite the output")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    configure_logging()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("Error: OPENAI_API_KEY not set in .env file")
+        sys.exit(1)
+
+    files = find_audio_files(args.inputs)
+    if not files:
+        print("No audio files found.")
+        sys.exit(1)
+
+    summary = run(
+        files,
+        output=args.output,
+        api_key=api_key,
+        mode=args.mode,
+        workers=args.workers,
+        use_processes=args.processes,
+        resume=not args.restart,
+    )
+
+    print(f"Done: {summary['ok']} ok, {summary['errors']} failed, {summary['skipped']} already done")
+    print(f"Audio: {summary['audio_minutes']:.1f} min in {summary['wall_minutes']:.1f} min "
+          f"({summary['speed']:.1f} audio-min per wall-min)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# src/config.py
+"""Runtime-tunable pipeline parameters and A/B experiments on them.
+
+Parameters are typed and validated, and can be changed while the app runs
+(see /api/config). Each take reads its values once, when it starts, so a
+change never affects a take halfway through. In an experiment, each take is
+randomly assigned to a variant (a set of parameter overrides), and latency,
+API calls and estimated cost are collected per variant so variants can be
+compared against the first one, the control.
+"""
+import random
+import threading
+from collections import deque
+from typing import Any, NamedTuple, Optional
+
+
+class Param(NamedTuple):
+    """One tunable parameter."""
+    name: str
+    type: type
+    default: Any
+    description: str
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+
+DEFAULT_PARAMS = (
+    Param("min_take_samples", int, 1600, "Shortest take that is transcribed, in samples at 16kHz", min=0),
+    Param("short_text_threshold", int, 15, "Transcripts of at most this many words skip GPT", min=0),
+    Param("transcribe_model", str, "whisper-1", "Transcription model"),
+    Param("format_model", str, "", "Formatting model; empty uses the routing table"),
+    Param("max_tokens", int, 0, "Formatting output limit; 0 sizes it from the input", min=0, max=16384),
+)
+
+# USD per 1M input/output tokens, and per minute of audio, for cost estimates
+TOKEN_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+AUDIO_PRICES = {
+    "whisper-1": 0.006,
+    "gpt-4o-transcribe": 0.006,
+    "gpt-4o-mini-transcribe": 0.003,
+}
+
+
+class TakeParams:
+    """Parameter values for one take, and the API usage it incurred."""
+
+    def __init__(self, values: dict, variant: Optional[str] = None, experiment: int = 0):
+        self._values = values
+        self.variant = variant
+        self.experiment = experiment
+        self.api_calls = 0
+        self.cost = 0.0
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str):
+        return self._values[name]
+
+    @property
+    def values(self) -> dict:
+        """All parameter values of the take."""
+        return dict(self._values)
+
+    def charge(self, model: str, input_tokens: int = 0, output_tokens: int = 0, audio_seconds: float = 0.0):
+        """Count one API call and add its estimated cost (0 for unknown models)."""
+        input_price, output_price = TOKEN_PRICES.get(model, (0.0, 0.0))
+        cost = (input_tokens * input_price + output_tokens * output_price) / 1e6
+        cost += audio_seconds / 60 * AUDIO_PRICES.get(model, 0.0)
+        with self._lock:
+            self.api_calls += 1
+            self.cost += cost
+
+
+class _VariantStats:
+    def __init__(self, window: int):
+        self.takes = 0
+        self.api_calls = 0
+        self.cost = 0.0
+        self.latency: deque = deque(maxlen=window)
+
+
+class RuntimeConfig:
+    """Registry of tunable parameters, with an optional running experiment."""
+
+    def __init__(self, params=DEFAULT_PARAMS, seed: Optional[int] = None, window: int = 1000):
+        self._params = {param.name: param for param in params}
+        self._values = {param.name: param.default for param in params}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._window = window
+        self._experiment = 0  # Id of the latest experiment, 0 for none yet
+        self._running = False
+        self._variants: dict[str, dict] = {}
+        self._stats: dict[str, _VariantStats] = {}
+
+    def _coerce(self, name: str, value) -> Any:
+        """Validate a value for a parameter, converting strings from the API."""
+        param = self._params.get(name)
+        if param is None:
+            raise ValueError(f"Unknown parameter: {name}")
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"{name} must be {param.type.__name__}")
+        try:
+            if param.type is int and isinstance(value, float) and not value.is_integer():
+                raise ValueError
+            value = param.type(value)
+        except ValueError:
+            raise ValueError(f"{name} must be {param.type.__name__}") from None
+        if param.min is not None and value < param.min:
+            raise ValueError(f"{name} must be at least {param.min}")
+        if param.max is not None and value > param.max:
+            raise ValueError(f"{name} must be at most {param.max}")
+        return value
+
+    def __getitem__(self, name: str):
+        return self._values[name]
+
+    def update(self, values: dict) -> dict:
+        """Set several parameters at once; nothing changes if any is invalid."""
+        coerced = {name: self._coerce(name, value) for name, value in values.items()}
+        with self._lock:
+            self._values = {**self._values, **coerced}
+            return dict(self._values)
+
+    def describe(self) -> list[dict]:
+        """Every parameter with its type, default, current value and bounds."""
+        values = self._values
+        return [
+            {
+                "name": param.name,
+                "type": param.type.__name__,
+                "value": values[param.name],
+                "default": param.default,
+                "description": param.description,
+                "min": param.min,
+                "max": param.max,
+            }
+            for param in self._params.values()
+        ]
+
+    def start_experiment(self, variants: dict[str, dict]):
+        """Split takes randomly between variants, replacing any running experiment.
+
+        Args:
+            variants: Variant name -> parameter overrides. The first variant
+                is the control that the others are compared against; it
+                usually has no overrides.
+        """
+        if len(variants) < 2:
+            raise ValueError("An experiment needs at least two variants")
+        coerced = {
+            variant: {name: self._coerce(name, value) for name, value in overrides.items()}
+            for variant, overrides in variants.items()
+        }
+        with self._lock:
+            self._experiment += 1
+            self._running = True
+            self._variants = coerced
+            self._stats = {variant: _VariantStats(self._window) for variant in coerced}
+
+    def stop_experiment(self):
+        """Stop assigning variants. Results stay available until the next start."""
+        with self._lock:
+            self._running = False
+
+    def take(self) -> TakeParams:
+        """Parameters for a new take, with a variant assigned if an experiment runs."""
+        with self._lock:
+            if not self._running:
+                return TakeParams(self._values)
+            variant = self._random.choice(list(self._variants))
+            return TakeParams({**self._values, **self._variants[variant]}, variant, self._experiment)
+
+    def record(self, take: TakeParams, latency: float):
+        """Record a finished take (latency in seconds) against its variant."""
+        with self._lock:
+            if take.variant is None or take.experiment != self._experiment:
+                return  # Not in an experiment, or from one that was replaced
+            stats = self._stats[take.variant]
+            stats.takes += 1
+            stats.api_calls += take.api_calls
+            stats.cost += take.cost
+            stats.latency.append(latency * 1000)
+
+    @staticmethod
+    def _percentile(values: list, fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def experiment(self) -> Optional[dict]:
+        """Per-variant results, with deltas against the control variant."""
+        with self._lock:
+            if not self._stats:
+                return None
+            results = {}
+            for variant, stats in self._stats.items():
+                latency = list(stats.latency)
+                results[variant] = {
+                    "overrides": self._variants[variant],
+                    "takes": stats.takes,
+                    "latency_p50_ms": self._percentile(latency, 0.5),
+                    "latency_p95_ms": self._percentile(latency, 0.95),
+                    "api_calls_per_take": stats.api_calls / stats.takes if stats.takes else None,
+                    "cost_per_take": stats.cost / stats.takes if stats.takes else None,
+                }
+            running = self._running
+
+        control = next(iter(results.values()))
+        for result in results.values():
+            result["delta"] = {
+                key: result[key] - control[key] if result[key] is not None and control[key] is not None else None
+                for key in ("latency_p50_ms", "latency_p95_ms", "api_calls_per_take", "cost_per_take")
+            }
+        return {"running": running, "control": next(iter(results)), "variants": results}
@@ -1,93 +1,298 @@
 # src/dictation.py
 """Core dictation service orchestrating all components."""
+import json
+import logging
+import os
 import threading
-import winsound
-from typing import Callable, Optional
+import time
+import uuid
+import numpy as np
+from typing import TYPE_CHECKING, Callable, Optional
+from src.archive import AudioArchive
 from src.audio import AudioRecorder
+from src.config import RuntimeConfig, TakeParams
 from src.transcribe import WhisperTranscriber
 from src.formatter import TextFormatter
-from src.keyboard import KeyboardTyper
-from src.hotkey import HotkeyListener
+from src.profiler import SamplingProfiler
+from src.ratelimit import RateLimitScheduler
+from src.routing import ModelRouter
+from src.timeseries import TimeSeriesStore
+from src import trace as tr
+
+if TYPE_CHECKING:
+    from src.keyboard import KeyboardTyper
+
+try:
+    import winsound
+except ImportError:  # Not on Windows, e.g. a soak run on a build agent
+    winsound = None
+
+logger = logging.getLogger(__name__)
 
 
 class DictationService:
     """Main service that coordinates recording, transcription, formatting, and typing."""
 
+    # Name of the thread each take is processed on
+    TAKE_THREAD = "dictation-take"
+
     def __init__(
         self,
         api_key: str,
-        hotkey: str = "ctrl_a",
+        hotkey: Optional[str] = "ctrl_a",
         format_mode: str = "single-line",
         on_status_change: Optional[Callable[[str], None]] = None,
-        on_transcription: Optional[Callable[[str, str], None]] = None,
+        on_transcription: Optional[Callable[[str, str, str], None]] = None,
+        archive: Optional[AudioArchive] = None,
+        mode_hotkeys: Optional[dict[str, str]] = None,
+        slow_take_ms: Optional[float] = None,
+        profile_dir: str = "profiles",
+        router: Optional[ModelRouter] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        metrics: Optional[TimeSeriesStore] = None,
+        recorder: Optional[AudioRecorder] = None,
+        typer: Optional["KeyboardTyper"] = None,
+        config: Optional[RuntimeConfig] = None,
+        trace_dir: Optional[str] = None,
+        trace_keep: int = 500,
     ):
-        self._recorder = AudioRecorder()
-        self._transcriber = WhisperTranscriber(api_key=api_key)
-        self._formatter = TextFormatter(api_key=api_key, mode=format_mode)
-        self._typer = KeyboardTyper()
+        """
+        Args:
+            hotkey: Global hotkey, or None to listen for none, e.g. when a
+                harness drives the service and there is no keyboard
+            typer: Types the output; defaults to the real keyboard
+        """
+        self._config = config or RuntimeConfig()
+        self._recorder = recorder or AudioRecorder()
+        self._transcriber = WhisperTranscriber(api_key=api_key, scheduler=scheduler, config=self._config)
+        self._formatter = TextFormatter(
+            api_key=api_key, mode=format_mode, router=router, scheduler=scheduler, metrics=metrics, config=self._config
+        )
+        if typer is None:
+            # pynput needs a display; headless harnesses inject their own typer
+            from src.keyboard import KeyboardTyper
+
+            typer = KeyboardTyper()
+        self._typer = typer
         self._on_status_change = on_status_change or (lambda s: None)
-        self._on_transcription = on_transcription or (lambda raw, fmt: None)
+        self._on_transcription = on_transcription or (lambda raw, fmt, take_id: None)
+        self._archive = archive
+        self._slow_take_ms = slow_take_ms
+        self._profile_dir = profile_dir
+        self._metrics = metrics
+        self._trace_dir = trace_dir
+        self._trace_keep = trace_keep
+        self._trace: Optional[tr.TakeTrace] = None
+        self._recording = False
+        self._take_mode: Optional[str] = None
 
-        self._hotkey_listener = HotkeyListener(
-            on_press=self._on_hotkey_press,
-            on_release=self._on_hotkey_release,
-            hotkey=hotkey,
-        )
+        self._hotkey_listener = None
+        if hotkey is not None:
+            from src.hotkey import HotkeyListener
 
-    def _on_hotkey_press(self):
-        """Called when hotkey is pressed - start recording."""
+            # Extra hotkeys that record a take in a specific format mode
+            bindings = {
+                mode_hotkey: (lambda mode=mode: self._on_hotkey_press(mode), self._on_hotkey_release)
+                for mode, mode_hotkey in (mode_hotkeys or {}).items()
+            }
+            self._hotkey_listener = HotkeyListener(
+                on_press=self._on_hotkey_press,
+                on_release=self._on_hotkey_release,
+                hotkey=hotkey,
+                bindings=bindings,
+            )
+
+    def _on_hotkey_press(self, mode: Optional[str] = None):
+        """Called when hotkey is pressed - start recording.
+
+        Args:
+            mode: Format mode for this take only, or None for the current mode
+        """
+        if self._recording:
+            return  # Another hotkey already started this take
+        self._recording = True
+        self._take_mode = mode
+        trace = None
+        if self._trace_dir:
+            trace = self._trace = tr.TakeTrace(mode=mode or self.get_format_mode())
+            trace.event(tr.PRESS)
         # Start recording FIRST so audio capture is active before user hears the beep
-        self._recorder.start()
+        self._recorder.start(on_block=(lambda frames: trace.event(tr.AUDIO_BLOCK, frames)) if trace else None)
         self._on_status_change("recording")
         # Play system asterisk sound asynchronously (instant, non-blocking)
-        winsound.PlaySound("SystemAsterisk", winsound.SND_ALIAS | winsound.SND_ASYNC)
+        if winsound is not None:
+            winsound.PlaySound("SystemAsterisk", winsound.SND_ALIAS | winsound.SND_ASYNC)
 
     def _on_hotkey_release(self):
         """Called when hotkey is released - stop, transcribe, format, type."""
+        if not self._recording:
+            return
+        self._recording = False
+        mode = self._take_mode
         self._on_status_change("transcribing")
         audio = self._recorder.stop()
+        trace, self._trace = self._trace, None
+        if trace is not None:
+            trace.event(tr.RELEASE, len(audio))
 
-        if len(audio) < 1600:  # Less than 0.1 seconds
+        # Read once per take, so a live config change never splits a take
+        params = self._config.take()
+        if len(audio) < params["min_take_samples"]:  # 0.1 seconds by default
             self._on_status_change("idle")
             return
 
+        take_id = uuid.uuid4().hex[:12]
+        released_at = time.perf_counter()
+        on_token = self._typer.type_text
+        if trace is not None:
+            trace.take_id = take_id
+            trace.variant, trace.params = params.variant or "", params.values
+            on_token = self._traced_typing(trace)
+
+        # Profile every take when enabled; only slow ones are kept
+        profiler = None
+        if self._slow_take_ms:
+            profiler = SamplingProfiler()
+            profiler.start()
+
         # Transcribe and format in background to not block hotkey listener
         def transcribe_format_and_type():
             try:
-                # Step 1: Transcribe audio to raw text
-                raw_text = self._transcriber.transcribe(audio)
-                if not raw_text:
-                    return
+                # Archive first, so a take that fails can still be re-transcribed
+                if self._archive is not None:
+                    self._archive.put(take_id, audio)
 
-                # Step 2: Format with GPT and type with streaming
                 # Text appears as GPT generates it for faster perceived response
-                self._on_status_change("formatting")
-                formatted_text = self._formatter.format(
-                    raw_text,
-                    on_token=lambda token: self._typer.type_text(token)
+                raw_text, formatted_text = self._run_pipeline(
+                    audio, on_token=on_token, mode=mode, params=params, trace=trace
                 )
 
+                latency = time.perf_counter() - released_at
+                self._config.record(params, latency)
+                if self._metrics is not None:
+                    self._metrics.record("take_ms", latency * 1000)
+
                 # Notify transcription complete (for history)
                 if formatted_text:
-                    self._on_transcription(raw_text, formatted_text)
+                    self._on_transcription(raw_text, formatted_text, take_id)
             finally:
                 self._on_status_change("idle")
+                if profiler is not None:
+                    self._save_slow_take_profile(take_id, profiler.stop(), time.perf_counter() - released_at)
+                if trace is not None:
+                    trace.event(tr.DONE)
+                    self._save_trace(trace)
+
+        threading.Thread(target=transcribe_format_and_type, name=self.TAKE_THREAD, daemon=True).start()
 
-        threading.Thread(target=transcribe_format_and_type, daemon=True).start()
+    def _traced_typing(self, trace: tr.TakeTrace) -> Callable[[str], None]:
+        """Typing callback that records token arrival and keystroke timing."""
+        def type_token(token: str):
+            trace.event(tr.TOKEN, len(token))
+            trace.event(tr.TYPE_START, len(token))
+            self._typer.type_text(token)
+            trace.event(tr.TYPE_END, len(token))
+        return type_token
+
+    def _save_trace(self, trace: tr.TakeTrace):
+        """Write a take's trace and drop the oldest beyond trace_keep."""
+        try:
+            trace.save(self._trace_dir)
+            tr.prune(self._trace_dir, self._trace_keep)
+        except OSError as e:
+            logger.warning("Could not save trace of take %s: %s", trace.take_id, e)
+
+    def _save_slow_take_profile(self, take_id: str, profiler: SamplingProfiler, latency: float):
+        """Write the profile of a take that exceeded the latency threshold."""
+        latency_ms = latency * 1000
+        if latency_ms < self._slow_take_ms:
+            return
+        os.makedirs(self._profile_dir, exist_ok=True)
+        base = os.path.join(self._profile_dir, f"take-{take_id}-{latency_ms:.0f}ms")
+        with open(base + ".speedscope.json", "w", encoding="utf-8") as f:
+            json.dump(profiler.to_speedscope(name=f"take {take_id}"), f)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(profiler.pstats_summary())
+        logger.warning("Slow take %s (%.0f ms), profile saved to %s.*", take_id, latency_ms, base)
+
+    def _run_pipeline(
+        self,
+        audio: np.ndarray,
+        on_token: Optional[Callable[[str], None]] = None,
+        mode: Optional[str] = None,
+        params: Optional[TakeParams] = None,
+        trace: Optional[tr.TakeTrace] = None,
+    ) -> tuple[str, str]:
+        """Transcribe audio and format the result. Returns (raw, formatted)."""
+        params = params or self._config.take()
+
+        # Step 1: Transcribe audio to raw text
+        start = time.perf_counter()
+        if trace is not None:
+            trace.event(tr.TRANSCRIBE_START, len(audio))
+        raw_text = self._transcriber.transcribe(audio, params=params)
+        transcribed = time.perf_counter()
+        if trace is not None:
+            trace.event(tr.TRANSCRIBE_END, len(raw_text))
+        if self._metrics is not None:
+            self._metrics.record("audio_seconds", len(audio) / WhisperTranscriber.SAMPLE_RATE)
+            self._metrics.record("transcribe_ms", (transcribed - start) * 1000)
+        if not raw_text:
+            return "", ""
+
+        # Step 2: Format with GPT, streaming tokens to on_token if given
+        self._on_status_change("formatting")
+        if trace is not None:
+            trace.event(tr.FORMAT_START, len(raw_text.split()))
+        formatted_text = self._formatter.format(raw_text, on_token=on_token, mode=mode, params=params)
+        if trace is not None:
+            trace.event(tr.FORMAT_END, len(formatted_text))
+        if self._metrics is not None:
+            self._metrics.record("format_ms", (time.perf_counter() - transcribed) * 1000)
+            self._metrics.record("text_chars", len(formatted_text))
+        return raw_text, formatted_text
+
+    def retranscribe(self, take_id: str) -> Optional[tuple[str, str]]:
+        """Re-run transcription and formatting on an archived take.
+
+        The result is returned rather than typed, since the window that had
+        focus when the take was recorded is long gone.
+
+        Returns:
+            (raw, formatted) text, or None if the take is not archived
+        """
+        if self._archive is None:
+            return None
+        audio = self._archive.get(take_id)
+        if audio is None:
+            return None
+
+        self._on_status_change("transcribing")
+        try:
+            return self._run_pipeline(audio)
+        finally:
+            self._on_status_change("idle")
 
     def start(self):
         """Start the dictation service."""
         self._on_status_change("idle")
-        self._hotkey_listener.start()
+        if self._hotkey_listener is not None:
+            self._hotkey_listener.start()
 
     def stop(self):
         """Stop the dictation service."""
-        self._hotkey_listener.stop()
+        if self._hotkey_listener is not None:
+            self._hotkey_listener.stop()
 
     def set_format_mode(self, mode: str):
         """Change the formatting mode at runtime."""
         self._formatter.set_mode(mode)
 
+    @property
+    def config(self) -> RuntimeConfig:
+        """Runtime-tunable parameters of the pipeline."""
+        return self._config
+
     def get_format_mode(self) -> str:
         """Get the current formatting mode."""
         return self._formatter.get_mode()
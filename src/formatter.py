@@ -1,11 +1,17 @@
 # src/formatter.py
 """Text formatting using GPT for grammar, punctuation, and structure."""
 import logging
+import time
+from contextlib import contextmanager
 from typing import Callable, Optional
 from openai import OpenAI
+from src.config import RuntimeConfig, TakeParams
+from src.log import Transcript
+from src.ratelimit import RateLimitScheduler
+from src.routing import Decision, ModelRouter
+from src.textstream import pipeline_for_mode
+from src.timeseries import TimeSeriesStore
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
@@ -49,11 +55,29 @@ FORMATTING:
 
 Return ONLY the formatted text, nothing else."""
 
-    def __init__(self, api_key: str, mode: str = "single-line"):
+    # Compact variants: fewer prompt tokens for short inputs and busy periods
+    SINGLE_LINE_COMPACT_PROMPT = """Fix spelling, grammar, punctuation and capitalization of dictated text. Keep the exact word order. Output one single line with no line breaks or lists. Return ONLY the text."""
+
+    DOCUMENT_COMPACT_PROMPT = """Fix spelling, grammar, punctuation and capitalization of dictated text. Keep the exact word order. Add paragraph breaks only for explicit topic changes. Return ONLY the text."""
+
+    def __init__(
+        self,
+        api_key: str,
+        mode: str = "single-line",
+        router: Optional[ModelRouter] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        metrics: Optional[TimeSeriesStore] = None,
+        config: Optional[RuntimeConfig] = None,
+    ):
         if not api_key:
             raise ValueError("API key is required")
-        self._client = OpenAI(api_key=api_key)
+        # With a scheduler, it owns retries (including 429s)
+        self._client = OpenAI(api_key=api_key, max_retries=0) if scheduler else OpenAI(api_key=api_key)
         self._mode = mode
+        self._router = router or ModelRouter()
+        self._scheduler = scheduler
+        self._metrics = metrics
+        self._config = config
 
     def set_mode(self, mode: str):
         """Change the formatting mode at runtime."""
@@ -85,95 +109,140 @@ Return ONLY the formatted text, nothing else."""
 
         return result
 
-    def format(self, raw_text: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+    def format(
+        self,
+        raw_text: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        mode: Optional[str] = None,
+        params: Optional[TakeParams] = None,
+    ) -> str:
         """Format raw transcription text.
 
         Args:
             raw_text: Raw transcription from Whisper
             on_token: Optional callback for streaming - called with each token as it arrives
+            mode: Format mode for this call only, defaults to the current mode
+            params: Parameters of the take, defaults to the runtime config if any
 
         Returns:
             Formatted text with proper grammar and punctuation
         """
         if not raw_text or not raw_text.strip():
             return ""
+        mode = mode or self._mode
+        if params is None and self._config is not None:
+            params = self._config.take()
+        threshold = params["short_text_threshold"] if params else self.SHORT_TEXT_THRESHOLD
 
-        logger.debug(f"=== FORMATTER DEBUG ===")
-        logger.debug(f"Mode: {self._mode}")
-        logger.debug(f"Raw input: {repr(raw_text)}")
+        word_count = len(raw_text.split())
+        logger.debug("Formatting %d words in %s mode: %r", word_count, mode, Transcript(raw_text))
 
         # OPTIMIZATION: Skip GPT for short text - Whisper output is clean enough
-        word_count = len(raw_text.split())
-        if word_count <= self.SHORT_TEXT_THRESHOLD:
-            logger.debug(f"Short text ({word_count} words) - skipping GPT")
+        skip = word_count <= threshold
+        if self._metrics is not None:
+            self._metrics.record("api_skipped", float(skip))  # Mean is the skip rate
+        if skip:
             result = self._quick_format(raw_text)
             if on_token:
                 on_token(result)  # Send all at once for short text
-            logger.debug(f"Quick format result: {repr(result)}")
-            logger.debug(f"=== END DEBUG ===")
+            logger.debug("Short text - skipped GPT: %r", Transcript(result))
             return result
 
-        # Select prompt based on mode
-        prompt = self.SINGLE_LINE_PROMPT if self._mode == "single-line" else self.DOCUMENT_PROMPT
+        # Pick model, output budget and prompt variant for this input
+        decision = self._router.choose(raw_text, mode)
+        if params is not None and params["format_model"]:
+            decision = decision._replace(model=params["format_model"])
+        if params is not None and params["max_tokens"]:
+            decision = decision._replace(max_tokens=params["max_tokens"])
+        logger.debug("Route %s: %s, max_tokens=%d", decision.route, decision.model, decision.max_tokens)
 
         # Use streaming if callback provided
         if on_token:
-            return self._format_streaming(raw_text, prompt, on_token)
-
-        # Non-streaming path
-        response = self._client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": raw_text},
-            ],
-            temperature=0.3,
-            max_tokens=2000,
-        )
-
-        result = response.choices[0].message.content.strip()
-        logger.debug(f"GPT returned: {repr(result)}")
-
-        result = self._enforce_single_line(result)
-        logger.debug(f"=== END DEBUG ===")
+            result = self._format_streaming(raw_text, decision, on_token, mode)
+        else:
+            # Non-streaming path
+            with self._slot(raw_text, decision) as send:
+                start = time.perf_counter()
+                response = send(self._request(raw_text, decision, mode))
+                elapsed = time.perf_counter() - start
+            truncated = response.choices[0].finish_reason == "length"
+            self._router.record(decision, None, elapsed, truncated)
+            if truncated:
+                logger.warning("Formatting hit max_tokens=%d on route %s", decision.max_tokens, decision.route)
+
+            logger.debug("GPT returned: %r", Transcript(response.choices[0].message.content))
+            result = pipeline_for_mode(mode).run(response.choices[0].message.content)
+
+        if params is not None:
+            prompt = self._prompt(mode, decision.prompt) + raw_text
+            params.charge(decision.model, ModelRouter.estimate_tokens(prompt), ModelRouter.estimate_tokens(result))
         return result
 
-    def _format_streaming(self, raw_text: str, prompt: str, on_token: Callable[[str], None]) -> str:
-        """Stream formatted text token by token for faster perceived response."""
-        logger.debug("Using streaming GPT response")
-
-        response = self._client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": prompt},
+    def _prompt(self, mode: str, variant: str) -> str:
+        """System prompt for a mode and prompt variant."""
+        if mode == "single-line":
+            return self.SINGLE_LINE_COMPACT_PROMPT if variant == "compact" else self.SINGLE_LINE_PROMPT
+        return self.DOCUMENT_COMPACT_PROMPT if variant == "compact" else self.DOCUMENT_PROMPT
+
+    def _request(self, raw_text: str, decision: Decision, mode: str) -> dict:
+        """Chat completion arguments for a routing decision."""
+        return {
+            "model": decision.model,
+            "messages": [
+                {"role": "system", "content": self._prompt(mode, decision.prompt)},
                 {"role": "user", "content": raw_text},
             ],
-            temperature=0.3,
-            max_tokens=2000,
-            stream=True,
-        )
-
-        full_text = ""
-        for chunk in response:
-            if chunk.choices[0].delta.content:
-                token = chunk.choices[0].delta.content
+            "temperature": decision.temperature,
+            "max_tokens": decision.max_tokens,
+        }
 
-                # In single-line mode, replace newlines with spaces on the fly
-                if self._mode == "single-line":
-                    token = token.replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
+    def _cost(self, raw_text: str, decision: Decision) -> dict:
+        """Scheduler cost of a call: tokens it may consume, and its size for ordering."""
+        tokens = ModelRouter.estimate_tokens(raw_text) + decision.max_tokens
+        return {"tokens": tokens, "size": len(raw_text.split())}
 
-                full_text += token
-                on_token(token)
+    @contextmanager
+    def _slot(self, raw_text: str, decision: Decision):
+        """Yield a function that sends a chat request, holding a scheduler slot if any.
 
-        logger.debug(f"Streamed result: {repr(full_text)}")
-        logger.debug(f"=== END DEBUG ===")
+        For streaming calls the slot stays held until the stream is fully read.
+        """
+        completions = self._client.chat.completions
+        if self._scheduler is None:
+            yield lambda request: completions.create(**request)
+            return
+        with self._scheduler.slot(decision.model, **self._cost(raw_text, decision)) as slot:
+            yield lambda request: slot.run(lambda: completions.with_raw_response.create(**request))
+
+    def _format_streaming(self, raw_text: str, decision: Decision, on_token: Callable[[str], None], mode: str) -> str:
+        """Stream formatted text token by token for faster perceived response."""
+        with self._slot(raw_text, decision) as send:
+            start = time.perf_counter()
+            response = send({**self._request(raw_text, decision, mode), "stream": True})
+
+            # Normalize on the fly, e.g. newlines -> spaces in single-line mode
+            pipeline = pipeline_for_mode(mode)
+            ttft = None
+            truncated = False
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].finish_reason == "length":
+                    truncated = True
+                if chunk.choices[0].delta.content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    token = pipeline.feed(chunk.choices[0].delta.content)
+                    if token:
+                        on_token(token)
+        total = time.perf_counter() - start
+        self._router.record(decision, ttft, total, truncated)
+        if truncated:
+            logger.warning("Formatting hit max_tokens=%d on route %s", decision.max_tokens, decision.route)
+        tail = pipeline.flush()
+        if tail:
+            on_token(tail)
+
+        full_text = pipeline.text
+        logger.debug("Streamed result: %r", Transcript(full_text))
         return full_text
-
-    def _enforce_single_line(self, result: str) -> str:
-        """Strip all newlines in single-line mode."""
-        if self._mode == "single-line":
-            result = result.replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
-            while '  ' in result:
-                result = result.replace('  ', ' ')
-            logger.debug(f"After newline strip: {repr(result)}")
-        return result
@@ -1,74 +1,176 @@
 # src/hotkey.py
 """Global hotkey listener for hold-to-talk."""
-from typing import Callable
+from typing import Callable, NamedTuple, Optional
 from pynput.keyboard import Key, Listener, KeyCode
 
 
+# Modifier names and the physical keys that count as each of them
+MODIFIER_KEYS = {
+    "ctrl": (Key.ctrl, Key.ctrl_l, Key.ctrl_r),
+    "shift": (Key.shift, Key.shift_l, Key.shift_r),
+    "alt": (Key.alt, Key.alt_l, Key.alt_r, Key.alt_gr),
+    "cmd": (Key.cmd, Key.cmd_l, Key.cmd_r),
+}
+MODIFIER_ALIASES = {"control": "ctrl", "win": "cmd", "super": "cmd"}
+
+# Older hotkey names that are chords rather than single keys
+LEGACY_HOTKEYS = {"ctrl_a": "ctrl+a"}
+
+
+class Chord(NamedTuple):
+    """A hotkey: modifiers that must be held, plus the key that triggers it."""
+    modifiers: frozenset
+    key: object
+
+
+def parse_hotkey(hotkey: str) -> Chord:
+    """Parse a hotkey like "caps_lock", "f13" or "ctrl+shift+d" into a Chord."""
+    spec = LEGACY_HOTKEYS.get(hotkey.strip().lower(), hotkey.strip().lower())
+    *modifier_names, key_name = spec.split("+")
+
+    modifiers = set()
+    for name in modifier_names:
+        name = MODIFIER_ALIASES.get(name, name)
+        if name not in MODIFIER_KEYS:
+            raise ValueError(f"Unknown modifier '{name}' in hotkey '{hotkey}'")
+        modifiers.add(name)
+
+    if len(key_name) == 1:
+        key = KeyCode.from_char(key_name)
+    elif key_name in Key.__members__:
+        key = Key[key_name]
+    elif MODIFIER_ALIASES.get(key_name) in MODIFIER_KEYS:
+        key = MODIFIER_KEYS[MODIFIER_ALIASES[key_name]][0]
+    else:
+        raise ValueError(f"Unknown key '{key_name}' in hotkey '{hotkey}'")
+    return Chord(frozenset(modifiers), key)
+
+
+def _trigger_variants(chord: Chord) -> list:
+    """All key events that should count as the chord's trigger key.
+
+    Character keys arrive upper-cased while Shift is held, and as control
+    characters (Ctrl+A -> '\\x01') on some platforms while Ctrl is held.
+    """
+    key = chord.key
+    for keys in MODIFIER_KEYS.values():
+        if key == keys[0]:
+            return list(keys)  # Generic "ctrl" matches left and right
+    if not isinstance(key, KeyCode) or not key.char:
+        return [key]
+
+    char = key.char
+    variants = {char, char.upper()}
+    if "ctrl" in chord.modifiers and char.isalpha() and char.isascii():
+        variants.add(chr(ord(char.lower()) - ord("a") + 1))
+    return [KeyCode.from_char(c) for c in variants]
+
+
+class _Binding:
+    """Runtime state for one hotkey chord."""
+    __slots__ = ("chord", "on_press", "on_release", "is_pressed")
+
+    def __init__(self, chord: Chord, on_press: Callable[[], None], on_release: Callable[[], None]):
+        self.chord = chord
+        self.on_press = on_press
+        self.on_release = on_release
+        self.is_pressed = False
+
+
 class HotkeyListener:
-    """Listens for global hotkey press/release events."""
+    """Listens for global hotkey press/release events.
+
+    The key handlers run for every key event on the system, so all bindings
+    are compiled into lookup tables up front. A key that is not part of any
+    binding is rejected with one dict lookup and nothing else. Character keys
+    are looked up by their char, since hashing a KeyCode formats its repr.
+    """
 
     def __init__(
         self,
         on_press: Callable[[], None],
         on_release: Callable[[], None],
         hotkey: str = "ctrl_a",
+        bindings: Optional[dict[str, tuple[Callable[[], None], Callable[[], None]]]] = None,
     ):
-        self._on_press = on_press
-        self._on_release = on_release
-        self._hotkey = self._parse_hotkey(hotkey)
-        self._is_combo = isinstance(self._hotkey, tuple)
-        self._ctrl_pressed = False
-        self._is_pressed = False
+        self._hotkey = parse_hotkey(hotkey)
+        self._bindings = [_Binding(self._hotkey, on_press, on_release)]
+        self._held: dict[str, set] = {}  # Modifier name -> physical keys holding it
+        self._chars: dict = {}
+        self._keys: dict = {}
         self._listener = None
 
-    def _parse_hotkey(self, hotkey: str):
-        """Convert hotkey string to pynput Key or KeyCode."""
-        # Special keys
-        special_keys = {
-            "caps_lock": Key.caps_lock,
-            "ctrl_r": Key.ctrl_r,
-            "ctrl_l": Key.ctrl_l,
-            "alt_r": Key.alt_r,
-            "f13": Key.f13,
-        }
+        for extra, (extra_press, extra_release) in (bindings or {}).items():
+            self._bindings.append(_Binding(parse_hotkey(extra), extra_press, extra_release))
+        self._compile()
+
+    def add_binding(self, hotkey: str, on_press: Callable[[], None], on_release: Callable[[], None]):
+        """Add another hotkey chord with its own callbacks."""
+        self._bindings.append(_Binding(parse_hotkey(hotkey), on_press, on_release))
+        self._compile()
+
+    def _compile(self):
+        """Build the key -> (modifier name, triggered bindings, dependent bindings) tables."""
+        triggers: dict = {}
+        modifiers: dict = {}
+        dependents: dict[str, list] = {}
 
-        # Handle combo keys like "ctrl_a"
-        if hotkey == "ctrl_a":
-            return ("ctrl", KeyCode.from_char('a'))
+        for binding in self._bindings:
+            for key in _trigger_variants(binding.chord):
+                triggers.setdefault(key, []).append(binding)
+            for name in binding.chord.modifiers:
+                dependents.setdefault(name, []).append(binding)
+                for key in MODIFIER_KEYS[name]:
+                    modifiers[key] = name
 
-        return special_keys.get(hotkey, Key.caps_lock)
+        chars, keys = {}, {}
+        for key in triggers.keys() | modifiers.keys():
+            name = modifiers.get(key)
+            entry = (name, tuple(triggers.get(key, ())), tuple(dependents.get(name, ())))
+            if isinstance(key, KeyCode) and key.char is not None:
+                chars[key.char] = entry
+            else:
+                keys[key] = entry
+        # Swap in whole tables so handlers never see a half-built one
+        self._chars, self._keys = chars, keys
 
     def _handle_press(self, key):
         """Handle key press event."""
-        if self._is_combo:
-            # For combo like Ctrl+A, track modifier and key separately
-            if key == Key.ctrl_l or key == Key.ctrl_r:
-                self._ctrl_pressed = True
-            elif self._ctrl_pressed and key == self._hotkey[1]:
-                if not self._is_pressed:
-                    self._is_pressed = True
-                    self._on_press()
+        if isinstance(key, KeyCode) and key.char is not None:
+            entry = self._chars.get(key.char)
         else:
-            if key == self._hotkey and not self._is_pressed:
-                self._is_pressed = True
-                self._on_press()
+            entry = self._keys.get(key)
+        if entry is None:
+            return
+        modifier, triggered, _ = entry
+        if modifier:
+            self._held.setdefault(modifier, set()).add(key)
+        for binding in triggered:
+            if not binding.is_pressed and binding.chord.modifiers <= self._held.keys():
+                binding.is_pressed = True
+                binding.on_press()
 
     def _handle_release(self, key):
         """Handle key release event."""
-        if self._is_combo:
-            # Release on Ctrl release or A release
-            if key == Key.ctrl_l or key == Key.ctrl_r:
-                self._ctrl_pressed = False
-                if self._is_pressed:
-                    self._is_pressed = False
-                    self._on_release()
-            elif key == self._hotkey[1] and self._is_pressed:
-                self._is_pressed = False
-                self._on_release()
+        if isinstance(key, KeyCode) and key.char is not None:
+            entry = self._chars.get(key.char)
         else:
-            if key == self._hotkey and self._is_pressed:
-                self._is_pressed = False
-                self._on_release()
+            entry = self._keys.get(key)
+        if entry is None:
+            return
+        modifier, triggered, dependents = entry
+        if modifier:
+            keys = self._held.get(modifier, set())
+            keys.discard(key)
+            if keys:
+                dependents = ()  # The other side (e.g. ctrl_r) still holds the modifier
+            else:
+                self._held.pop(modifier, None)
+        # Releasing either the trigger key or a required modifier ends the chord
+        for binding in triggered + dependents:
+            if binding.is_pressed:
+                binding.is_pressed = False
+                binding.on_release()
 
     def start(self):
         """Start listening for hotkey events."""
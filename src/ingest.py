@@ -0,0 +1,231 @@
+# src/ingest.py
+"""Shared worker pool for audio sent by remote clients."""
+import io
+import logging
+import threading
+import time
+import wave
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.config import RuntimeConfig
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+CODECS = ("pcm_s16le", "pcm_f32le", "opus")
+
+
+def _resample(audio: np.ndarray, rate: int) -> np.ndarray:
+    """Linearly resample audio to 16kHz (good enough for speech recognition)."""
+    if rate == SAMPLE_RATE or len(audio) == 0:
+        return audio
+    duration = len(audio) / rate
+    target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    return np.interp(target, np.arange(len(audio)) / rate, audio).astype(np.float32)
+
+
+def decode_wav(data: bytes) -> np.ndarray:
+    """Decode a 16-bit PCM WAV file to mono float32 audio at 16kHz.
+
+    Raises:
+        ValueError: For a valid WAV in another encoding (24-bit, float, ...)
+        wave.Error: If the data is not a WAV file
+    """
+    try:
+        wav = wave.open(io.BytesIO(data), "rb")
+    except wave.Error as e:
+        if str(e).startswith("unknown format"):
+            raise ValueError(f"Only 16-bit PCM WAV is supported ({e})") from None
+        raise
+    with wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV is supported")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+    audio = samples.reshape(-1, channels).mean(axis=1) / 32768
+    return _resample(audio.astype(np.float32), rate)
+
+
+class FrameDecoder:
+    """Accumulates streamed audio frames for one utterance."""
+
+    def __init__(self, codec: str = "pcm_s16le", sample_rate: int = SAMPLE_RATE):
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec '{codec}'. Use one of: {', '.join(CODECS)}")
+        if sample_rate <= 0:
+            raise ValueError(f"Sample rate must be positive, got {sample_rate}")
+        self._codec = codec
+        self._rate = sample_rate
+        self._chunks: list[np.ndarray] = []
+        self._opus = None
+        if codec == "opus":
+            try:
+                import opuslib
+            except ImportError:
+                raise ValueError("Opus input requires the optional 'opuslib' package")
+            self._opus_error = opuslib.OpusError
+            try:
+                self._opus = opuslib.Decoder(sample_rate, 1)
+            except opuslib.OpusError as e:
+                raise ValueError(f"Opus cannot decode at {sample_rate} Hz: {e}") from None
+
+    def feed(self, frame: bytes):
+        """Add one frame of encoded audio.
+
+        Raises:
+            ValueError: If the frame cannot be decoded; earlier frames are kept
+        """
+        if self._codec == "opus":
+            try:
+                # 120ms is the longest Opus frame
+                pcm = self._opus.decode(frame, self._rate * 120 // 1000)
+            except self._opus_error as e:
+                raise ValueError(f"Invalid Opus frame: {e}") from None
+            self._chunks.append(np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768)
+            return
+
+        dtype = "<i2" if self._codec == "pcm_s16le" else "<f4"
+        if len(frame) % np.dtype(dtype).itemsize:
+            raise ValueError(f"Frame of {len(frame)} bytes is not a whole number of {self._codec} samples")
+        if self._codec == "pcm_s16le":
+            self._chunks.append(np.frombuffer(frame, dtype=dtype).astype(np.float32) / 32768)
+        else:
+            self._chunks.append(np.frombuffer(frame, dtype=dtype).astype(np.float32))
+
+    def finish(self) -> np.ndarray:
+        """Return the utterance as float32 audio at 16kHz and reset."""
+        chunks, self._chunks = self._chunks, []
+        if not chunks:
+            return np.array([], dtype=np.float32)
+        return _resample(np.concatenate(chunks), self._rate)
+
+
+class _Job:
+    __slots__ = ("client_id", "audio", "mode", "on_token", "on_done")
+
+    def __init__(self, client_id, audio, mode, on_token, on_done):
+        self.client_id = client_id
+        self.audio = audio
+        self.mode = mode
+        self.on_token = on_token
+        self.on_done = on_done
+
+
+class IngestPool:
+    """Runs remote utterances through transcribe + format on a fixed set of threads.
+
+    Each client has its own queue and clients are served round-robin, so one
+    client uploading a backlog of long recordings cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        transcriber,
+        formatter,
+        workers: int = 4,
+        max_pending_per_client: int = 8,
+        config: Optional[RuntimeConfig] = None,
+    ):
+        self._transcriber = transcriber
+        self._formatter = formatter
+        self._config = config or RuntimeConfig()
+        self._workers = workers
+        self._max_pending = max_pending_per_client
+        self._queues: dict[str, deque] = {}
+        self._ready: deque[str] = deque()  # Clients with queued jobs, in service order
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._running = False
+
+    def start(self):
+        """Start the worker threads."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._worker, name=f"ingest-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop the worker threads once they finish their current job."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+
+    def submit(
+        self,
+        client_id: str,
+        audio: np.ndarray,
+        mode: str,
+        on_token: Callable[[str], None],
+        on_done: Callable[[str, str, Optional[str]], None],
+    ) -> bool:
+        """Queue an utterance for a client.
+
+        Args:
+            client_id: Identifies the client for fair scheduling
+            audio: Float32 audio at 16kHz
+            mode: Format mode for this utterance
+            on_token: Called on a worker thread with each formatted token
+            on_done: Called with (raw, formatted, error) when finished
+
+        Returns:
+            False if the client already has too many utterances queued
+        """
+        with self._cond:
+            queue = self._queues.setdefault(client_id, deque())
+            if len(queue) >= self._max_pending:
+                return False
+            if not queue:
+                self._ready.append(client_id)
+            queue.append(_Job(client_id, audio, mode, on_token, on_done))
+            self._cond.notify()
+        return True
+
+    def pending(self) -> int:
+        """Number of utterances waiting for a worker."""
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def _next_job(self) -> Optional[_Job]:
+        with self._cond:
+            while self._running and not self._ready:
+                self._cond.wait()
+            if not self._running:
+                return None
+            client_id = self._ready.popleft()
+            queue = self._queues[client_id]
+            job = queue.popleft()
+            if queue:
+                self._ready.append(client_id)  # Back of the line for its next job
+            else:
+                del self._queues[client_id]
+            return job
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                # Read once per utterance, so both calls use the same experiment variant
+                params = self._config.take()
+                start = time.perf_counter()
+                raw_text = self._transcriber.transcribe(job.audio, params=params)
+                formatted = ""
+                if raw_text:
+                    formatted = self._formatter.format(raw_text, on_token=job.on_token, mode=job.mode, params=params)
+                self._config.record(params, time.perf_counter() - start)
+                job.on_done(raw_text, formatted, None)
+            except Exception as e:
+                logger.exception("Ingest job for client %s failed", job.client_id)
+                job.on_done("", "", str(e))
@@ -0,0 +1,147 @@
+# src/log.py
+"""Non-blocking logging setup.
+
+Log records are put on an in-memory queue by whichever thread logs them and
+written by a single listener thread, so a slow console or disk never stalls
+the hotkey thread or the thread typing streamed tokens.
+
+Configured from the environment:
+    LOG_LEVEL=INFO                              root level
+    LOG_LEVELS=src.formatter=DEBUG,httpx=WARNING  per-logger levels
+    LOG_REDACT_TRANSCRIPTS=1                    log transcript lengths, not text
+    LOG_FILE=dictation.log                      also write to a file
+"""
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s"
+
+logger = logging.getLogger(__name__)
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class Transcript:
+    """Wraps transcript text passed as a log argument.
+
+    Formatting happens only if the record is actually emitted, on the
+    listener thread, and honours redaction.
+    """
+
+    __slots__ = ("text",)
+    redact = False
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self) -> str:
+        if Transcript.redact:
+            return f"<{len(self.text)} chars redacted>"
+        return repr(self.text)
+
+    __str__ = __repr__
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats each record on the logging thread before
+    queueing it. Records never leave the process here, so they can be queued
+    untouched; log arguments are expected not to change after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _parse_levels(spec: str) -> dict[str, str]:
+    """Parse "name=LEVEL,name=LEVEL" into a dict."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    levels: Optional[dict[str, str]] = None,
+    redact: Optional[bool] = None,
+    handlers: Optional[list[logging.Handler]] = None,
+) -> QueueListener:
+    """Route all logging through a queue and a background writer thread.
+
+    Arguments override the corresponding environment variables. Calling it
+    again replaces the previous configuration.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    if levels is None:
+        levels = _parse_levels(os.getenv("LOG_LEVELS", ""))
+    if redact is None:
+        redact = os.getenv("LOG_REDACT_TRANSCRIPTS", "").lower() in ("1", "true", "yes")
+    Transcript.redact = redact
+
+    if handlers is None:
+        handlers = [logging.StreamHandler()]
+        if os.getenv("LOG_FILE"):
+            handlers.append(logging.FileHandler(os.getenv("LOG_FILE"), encoding="utf-8"))
+    for handler in handlers:
+        if handler.formatter is None:
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    invalid = []
+    if not _is_level(level):
+        invalid.append(("LOG_LEVEL", level, "using INFO"))
+        level = "INFO"
+    root.setLevel(level)
+    for name, name_level in levels.items():
+        if not _is_level(name_level.upper()):
+            invalid.append((f"LOG_LEVELS {name}", name_level, "ignored"))
+            continue
+        logging.getLogger(name).setLevel(name_level.upper())
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    for setting, value, action in invalid:
+        logger.warning("Invalid %s level %r; %s", setting, value, action)
+    return _listener
+
+
+def _is_level(name: str) -> bool:
+    return isinstance(logging.getLevelName(name), int)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread.
+
+    The handlers go back on the root logger, so records logged afterwards
+    (e.g. at exit) are written directly instead of queued for nobody.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = None
+    _queue_handler = None
+
+
+atexit.register(stop_logging)
@@ -1,16 +1,41 @@
 # src/main.py
 """Main entry point for Whisper Dictation."""
+import ipaddress
+import logging
 import os
+import secrets
 import sys
 import uvicorn
 from dotenv import load_dotenv
+from src.archive import AudioArchive
+from src.config import RuntimeConfig
 from src.dictation import DictationService
+from src.formatter import TextFormatter
+from src.hotkey import parse_hotkey
+from src.ingest import IngestPool
+from src.log import configure_logging
+from src.ratelimit import RateLimitScheduler
+from src.routing import ModelRouter
+from src.timeseries import TimeSeriesStore
+from src.transcribe import WhisperTranscriber
 from src.tray import TrayIcon
 from src import server
 
+logger = logging.getLogger(__name__)
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
 
 def main():
     load_dotenv()
+    configure_logging()
 
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
@@ -18,16 +43,57 @@ def main():
         sys.exit(1)
 
     hotkey = os.getenv("HOTKEY", "ctrl_a")
+    try:
+        parse_hotkey(hotkey)
+    except ValueError as e:
+        logger.error("%s; falling back to caps_lock", e)
+        hotkey = "caps_lock"
     format_mode = os.getenv("FORMAT_MODE", "single-line")  # "single-line" or "document"
 
+    # Optional per-mode hotkeys, e.g. "single-line=ctrl+alt+s,document=ctrl+alt+d"
+    mode_hotkeys = {}
+    for item in os.getenv("MODE_HOTKEYS", "").split(","):
+        mode, _, mode_hotkey = item.partition("=")
+        if mode.strip() and mode_hotkey.strip():
+            try:
+                parse_hotkey(mode_hotkey)
+            except ValueError as e:
+                logger.error("%s; no hotkey for %s mode", e, mode.strip())
+                continue
+            mode_hotkeys[mode.strip()] = mode_hotkey.strip()
+
+    # Optional archive of recorded audio, for replay and re-transcription
+    archive = None
+    archive_dir = os.getenv("AUDIO_ARCHIVE_DIR")
+    if archive_dir:
+        max_mb = int(os.getenv("AUDIO_ARCHIVE_MAX_MB", "256"))
+        archive = AudioArchive(archive_dir, max_bytes=max_mb * 1024 * 1024)
+
+    # Model routing for formatting, shared so latency data covers every call
+    routing_table = os.getenv("ROUTING_TABLE")
+    router = ModelRouter.from_json(routing_table) if routing_table else ModelRouter()
+
+    # One scheduler for every OpenAI call, paced by the org's rate-limit headers
+    scheduler = RateLimitScheduler(max_concurrency=int(os.getenv("RATE_LIMIT_MAX_CONCURRENCY", "8")))
+
+    # Latency and payload history for the dashboard, saved periodically if a file is set
+    metrics = TimeSeriesStore(
+        path=os.getenv("METRICS_FILE") or None,
+        save_interval=float(os.getenv("METRICS_SAVE_SECONDS", "300")),
+    )
+    metrics.start()
+
+    # Pipeline parameters that can be changed live at /api/config
+    config = RuntimeConfig()
+
     tray = TrayIcon()
 
     def on_status_change(status: str):
         tray.set_status(status)
         server.update_status(status)
 
-    def on_transcription(raw: str, formatted: str):
-        server.add_transcription(formatted)
+    def on_transcription(raw: str, formatted: str, take_id: str):
+        server.add_transcription(formatted, entry_id=take_id)
 
     dictation = DictationService(
         api_key=api_key,
@@ -35,10 +101,21 @@ def main():
         format_mode=format_mode,
         on_status_change=on_status_change,
         on_transcription=on_transcription,
+        archive=archive,
+        mode_hotkeys=mode_hotkeys,
+        slow_take_ms=float(os.getenv("PROFILE_SLOW_TAKES_MS", "0")) or None,
+        profile_dir=os.getenv("PROFILE_DIR", "profiles"),
+        router=router,
+        scheduler=scheduler,
+        metrics=metrics,
+        config=config,
+        trace_dir=os.getenv("TRACE_DIR") or None,
+        trace_keep=int(os.getenv("TRACE_KEEP", "500")),
     )
 
     def on_quit():
         dictation.stop()
+        metrics.close()
         os._exit(0)
 
     tray._on_quit = on_quit
@@ -49,16 +126,54 @@ def main():
         get_mode=dictation.get_format_mode,
     )
 
+    # Optional pool serving audio streamed or uploaded by remote clients
+    ingest_workers = int(os.getenv("INGEST_WORKERS", "0"))
+    if ingest_workers > 0:
+        ingest_pool = IngestPool(
+            transcriber=WhisperTranscriber(api_key=api_key, scheduler=scheduler, config=config),
+            formatter=TextFormatter(
+                api_key=api_key, mode=format_mode, router=router, scheduler=scheduler, config=config
+            ),
+            workers=ingest_workers,
+            config=config,
+        )
+        ingest_pool.start()
+        server.set_ingest_pool(ingest_pool)
+
+    server.set_router(router)
+    server.set_scheduler(scheduler)
+    server.set_timeseries(metrics)
+    server.set_config(config)
+
+    if archive is not None:
+        server.set_archive_callbacks(
+            get_audio=archive.get,
+            retranscribe=dictation.retranscribe,
+        )
+
+    # Beyond loopback, anyone on the network could change config or fetch audio
+    host = os.getenv("SERVER_HOST", "127.0.0.1")
+    token = os.getenv("SERVER_TOKEN") or None
+    if token is None and not _is_loopback(host):
+        token = secrets.token_urlsafe(16)
+        logger.warning(
+            "SERVER_HOST=%s serves the dashboard and API to the network; "
+            "generated access token %s (set SERVER_TOKEN to choose one)", host, token
+        )
+    server.set_token(token)
+
     print(f"Starting Whisper Dictation...")
     print(f"Hotkey: {hotkey}")
     print(f"Format mode: {format_mode}")
-    print(f"Dashboard: http://localhost:8765")
+    for mode, mode_hotkey in mode_hotkeys.items():
+        print(f"Hotkey for {mode}: {mode_hotkey}")
+    print(f"Dashboard: http://{host}:8765/" + (f"?token={token}" if token else ""))
     print(f"Hold {hotkey} to record, release to transcribe.")
 
     tray.start()
     dictation.start()
 
-    uvicorn.run(server.app, host="127.0.0.1", port=8765, log_level="warning")
+    uvicorn.run(server.app, host=host, port=8765, log_level="warning")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+# src/profiler.py
+"""Low-overhead sampling profiler covering every thread in the process."""
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class _SampledStats:
+    """Adapter so pstats.Stats can load sampled data (it calls create_stats)."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class SamplingProfiler:
+    """Periodically captures the Python stack of all threads.
+
+    Unlike cProfile this does not hook function calls, so the hotkey thread,
+    PortAudio callback, worker threads and the uvicorn loop run at full speed;
+    the cost is one stack walk per thread per interval on a background thread.
+    Identical stacks are stored once with a count, so memory stays small.
+    """
+
+    # Shorter intervals spin the sampler thread and starve the app of the GIL
+    MIN_INTERVAL = 0.001
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self._interval = max(interval, self.MIN_INTERVAL)
+        self._max_depth = max_depth
+        self._frames: list[tuple[str, int, str]] = []  # (file, line, function)
+        self._frame_ids: dict = {}  # code object -> index into _frames
+        self._stacks: Counter = Counter()  # (thread id, root-to-leaf frame ids) -> samples
+        self._thread_names: dict[int, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started = 0.0
+        self.elapsed = 0.0
+        self.samples = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Start sampling in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> "SamplingProfiler":
+        """Stop sampling. Returns self for chaining."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.elapsed += time.perf_counter() - self._started
+        return self
+
+    def _frame_id(self, code) -> int:
+        index = self._frame_ids.get(code)
+        if index is None:
+            index = len(self._frames)
+            self._frame_ids[code] = index
+            self._frames.append((code.co_filename, code.co_firstlineno, code.co_name))
+        return index
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self._interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self._max_depth:
+                    stack.append(self._frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self._stacks[(ident, tuple(stack))] += 1
+                if ident not in self._thread_names:
+                    self._thread_names.update((t.ident, t.name) for t in threading.enumerate())
+            self.samples += 1
+
+    def to_speedscope(self, name: str = "whisper-dictation") -> dict:
+        """Export as a speedscope "sampled" profile, one profile per thread.
+
+        Call after stop(). Load the result at https://www.speedscope.app to
+        get flame graphs.
+        """
+        by_thread: dict[int, list] = {}
+        for (ident, stack), count in self._stacks.items():
+            by_thread.setdefault(ident, []).append((stack, count))
+
+        profiles = []
+        for ident, entries in sorted(by_thread.items(), key=lambda item: -sum(c for _, c in item[1])):
+            weights = [count * self._interval for _, count in entries]
+            profiles.append({
+                "type": "sampled",
+                "name": self._thread_names.get(ident, f"thread-{ident}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": [list(stack) for stack, _ in entries],
+                "weights": weights,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "whisper-dictation",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": fn, "file": file, "line": line} for file, line, fn in self._frames]},
+            "profiles": profiles,
+        }
+
+    def to_pstats(self) -> pstats.Stats:
+        """Convert samples to a pstats.Stats (sample counts stand in for calls)."""
+        own_time: Counter = Counter()
+        total_time: Counter = Counter()
+        edges: Counter = Counter()  # (caller, callee) -> samples
+
+        for (_, stack), count in self._stacks.items():
+            if not stack:
+                continue
+            own_time[stack[-1]] += count
+            for frame_id in set(stack):
+                total_time[frame_id] += count
+            for pair in set(zip(stack, stack[1:])):
+                edges[pair] += count
+
+        callers: dict[int, dict] = {}
+        for (caller, callee), count in edges.items():
+            seconds = count * self._interval
+            callers.setdefault(callee, {})[self._frames[caller]] = (count, count, 0.0, seconds)
+
+        stats = {}
+        for frame_id, count in total_time.items():
+            stats[self._frames[frame_id]] = (
+                count,
+                count,
+                own_time[frame_id] * self._interval,
+                count * self._interval,
+                callers.get(frame_id, {}),
+            )
+        return pstats.Stats(_SampledStats(stats))
+
+    def pstats_summary(self, limit: int = 30, sort: str = "cumulative") -> str:
+        """Text report of the hottest functions, in pstats format."""
+        if not self._stacks:
+            return "No samples collected."
+        stream = io.StringIO()
+        stats = self.to_pstats()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
@@ -0,0 +1,258 @@
+# src/ratelimit.py
+"""Client-side rate-limit scheduling for OpenAI API calls.
+
+Everyone on the team shares one org key, so a single instance cannot know
+how much budget is left from its own traffic alone. OpenAI reports the org's
+remaining budget in response headers; the scheduler tracks those as token
+buckets, holds calls back before they would be rejected, and adapts how many
+calls it runs at once (AIMD: +1 per window of successes, halve on a 429).
+Waiting calls are ordered smallest first, so a short dictation is not stuck
+behind a long one.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Mapping, Optional
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse reset durations like "1s", "6m0s" or "250ms" into seconds."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            seconds = float(value)
+        except ValueError:
+            return None
+        return seconds if math.isfinite(seconds) and seconds >= 0 else None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+class TokenBucket:
+    """Estimate of remaining budget, refilled continuously between header updates."""
+
+    def __init__(self):
+        self.limit: Optional[float] = None
+        self._level = 0.0
+        self._rate = 0.0  # Units per second
+        self._updated = 0.0
+
+    def update(self, limit: float, remaining: float, reset: Optional[float], now: float):
+        """Replace the estimate with what the server just reported."""
+        self.limit = limit
+        self._level = remaining
+        if reset and reset > 0:
+            self._rate = max(limit - remaining, 1.0) / reset
+        else:
+            self._rate = limit / 60.0  # Limits are per minute
+        self._updated = now
+
+    def available(self, now: float) -> float:
+        if self.limit is None:
+            return float("inf")  # Nothing known yet
+        return min(self.limit, self._level + self._rate * (now - self._updated))
+
+    def take(self, amount: float, now: float):
+        if self.limit is None:
+            return
+        self._level = self.available(now) - amount
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available (0 if it is now)."""
+        missing = min(amount, self.limit or 0) - self.available(now)
+        if missing <= 0:
+            return 0.0
+        return missing / self._rate if self._rate > 0 else 1.0
+
+
+class _Lane:
+    """Scheduling state for one model (OpenAI limits are per model)."""
+
+    def __init__(self, concurrency: float):
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.waiting: list[tuple[float, int]] = []  # (size, ticket)
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+
+
+class _Slot:
+    """An admitted call; run() sends the request and handles 429 retries."""
+
+    def __init__(self, scheduler: "RateLimitScheduler", model: str):
+        self._scheduler = scheduler
+        self._model = model
+
+    def run(self, request: Callable[[], object], retries: int = 4):
+        """Call request() (an OpenAI ``with_raw_response`` call) and parse it.
+
+        The request is retried with backoff on 429s, connection errors and
+        server errors. Retries happen inside this slot, which still counts
+        toward concurrency.
+        """
+        for attempt in range(retries + 1):
+            try:
+                raw = request()
+            except RateLimitError as e:
+                error = e
+                delay = self._scheduler._on_rate_limited(self._model, e.response.headers, attempt)
+            except (APIConnectionError, InternalServerError) as e:
+                error = e
+                delay = min(2.0 ** attempt * 0.5, 8.0)
+            else:
+                self._scheduler._on_success(self._model, raw.headers)
+                return raw.parse()
+            if attempt == retries:
+                raise error
+            logger.info("Retrying %s call in %.2fs (attempt %d)", self._model, delay, attempt + 1)
+            time.sleep(delay)
+
+
+class RateLimitScheduler:
+    """Admission control shared by every OpenAI call in the process."""
+
+    # Waiting calls older than this go first regardless of size
+    MAX_WAIT = 10.0
+
+    def __init__(self, max_concurrency: int = 8, min_concurrency: int = 1, initial_concurrency: Optional[int] = None):
+        self._max = max_concurrency
+        self._min = min_concurrency
+        self._initial = initial_concurrency or max_concurrency
+        self._lanes: dict[str, _Lane] = {}
+        self._cond = threading.Condition()
+        self._tickets = 0
+        self._enqueued: dict[int, float] = {}  # ticket -> time queued
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _Lane(float(self._initial))
+        return lane
+
+    def _is_next(self, lane: _Lane, ticket: int, now: float) -> bool:
+        """Smallest waiting call goes first, unless someone has waited too long."""
+        overdue = [t for _, t in lane.waiting if now - self._enqueued[t] > self.MAX_WAIT]
+        if overdue:
+            return ticket == min(overdue)
+        return ticket == min(lane.waiting)[1]
+
+    @contextmanager
+    def slot(self, model: str, tokens: int = 0, size: float = 0.0) -> Iterator[_Slot]:
+        """Block until a call to model may start, and hold a slot while it runs.
+
+        Args:
+            model: Model name; each model has its own limits
+            tokens: Estimated tokens the call consumes (prompt + max output)
+            size: Size of the job for ordering, e.g. audio seconds or words
+        """
+        with self._cond:
+            lane = self._lane(model)
+            ticket = self._tickets
+            self._tickets += 1
+            self._enqueued[ticket] = time.monotonic()
+            lane.waiting.append((size, ticket))
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    lane.paused_until - now,
+                    lane.requests.wait_time(1, now),
+                    lane.tokens.wait_time(tokens, now),
+                )
+                if wait <= 0 and lane.in_flight < int(lane.concurrency) and self._is_next(lane, ticket, now):
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            lane.waiting.remove((size, ticket))
+            del self._enqueued[ticket]
+            lane.in_flight += 1
+            lane.requests.take(1, now)
+            lane.tokens.take(tokens, now)
+            self._cond.notify_all()
+        try:
+            yield _Slot(self, model)
+        finally:
+            with self._cond:
+                lane.in_flight -= 1
+                self._cond.notify_all()
+
+    def call(self, model: str, request: Callable[[], object], tokens: int = 0, size: float = 0.0, retries: int = 4):
+        """Run one non-streaming request through the scheduler."""
+        with self.slot(model, tokens, size) as slot:
+            return slot.run(request, retries)
+
+    def _update_buckets(self, lane: _Lane, headers: Mapping[str, str], now: float):
+        for kind, bucket in (("requests", lane.requests), ("tokens", lane.tokens)):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if limit is None or remaining is None:
+                continue
+            try:
+                bucket.update(float(limit), float(remaining), parse_reset(headers.get(f"x-ratelimit-reset-{kind}")), now)
+            except ValueError:
+                continue
+
+    def _on_success(self, model: str, headers: Mapping[str, str]):
+        with self._cond:
+            lane = self._lane(model)
+            self._update_buckets(lane, headers, time.monotonic())
+            # Additive increase: about +1 per window of `concurrency` successes
+            lane.concurrency = min(self._max, lane.concurrency + 1 / lane.concurrency)
+            self._cond.notify_all()
+
+    def _on_rate_limited(self, model: str, headers: Mapping[str, str], attempt: int) -> float:
+        """Record a 429 and return how long to wait before retrying."""
+        with self._cond:
+            now = time.monotonic()
+            lane = self._lane(model)
+            self._update_buckets(lane, headers, now)
+            # Multiplicative decrease, once per burst of 429s from calls already in flight
+            if now - lane.last_decrease > 1.0:
+                lane.concurrency = max(self._min, lane.concurrency / 2)
+                lane.last_decrease = now
+
+            delay = None
+            if headers.get("retry-after-ms"):
+                try:
+                    delay = float(headers["retry-after-ms"]) / 1000
+                except ValueError:
+                    pass
+                if delay is not None and not (math.isfinite(delay) and delay >= 0):
+                    delay = None
+            if delay is None and headers.get("retry-after"):
+                delay = parse_reset(headers["retry-after"])
+            if delay is None:
+                delay = max(
+                    parse_reset(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                    parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0.0,
+                ) or min(2.0 ** attempt * 0.5, 8.0)
+            lane.paused_until = max(lane.paused_until, now + delay)
+            logger.warning("Rate limited on %s, concurrency now %.1f", model, lane.concurrency)
+            return delay
+
+    def stats(self) -> dict:
+        """Current per-model concurrency, queue and budget estimates."""
+        with self._cond:
+            now = time.monotonic()
+            return {
+                model: {
+                    "concurrency": round(lane.concurrency, 2),
+                    "in_flight": lane.in_flight,
+                    "waiting": len(lane.waiting),
+                    "requests_available": lane.requests.available(now) if lane.requests.limit else None,
+                    "tokens_available": lane.tokens.available(now) if lane.tokens.limit else None,
+                }
+                for model, lane in self._lanes.items()
+            }
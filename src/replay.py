@@ -0,0 +1,281 @@
+# src/replay.py
+"""Replay a recorded take trace offline.
+
+Usage:
+    python -m src.replay traces/20261019-104212-3f9c2a1b7d4e.trace
+    python -m src.replay traces/ --at 10:42
+    python -m src.replay traces/ --at "2026-10-19 10:42"
+
+Runs the take again through the real DictationService, with every outside
+dependency replaced by a stub that reproduces the recorded timing: the
+hotkey is released when it was released, a fake microphone delivers audio
+blocks when they arrived, a local stand-in API answers transcription after
+the recorded time and streams tokens at the recorded offsets, and typing
+takes as long as it did. Works on any OS, without an API key, microphone or
+keyboard. The take's recorded parameters (thresholds, models, including
+any experiment overrides) are applied, so GPT is skipped or called and
+routed by text length as it was; only a busy route picked because the API
+was slow at the time is not reproduced. The replayed take is traced too, so recorded and replayed milestones can be
+compared to check that a fix changes what it should.
+"""
+import argparse
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from src.audio import AudioRecorder
+from src.config import RuntimeConfig
+from src.dictation import DictationService
+from src.ratelimit import RateLimitScheduler
+from src.routing import ModelRouter
+from src.standin import StandInAPI, client_env
+from src import trace as tr
+
+
+class ReplayInputStream:
+    """Stand-in for sd.InputStream that delivers blocks at recorded times.
+
+    Args:
+        blocks: (seconds after press, frames) of each recorded block
+        speed: Replay speed factor
+    """
+
+    def __init__(self, blocks: list[tuple[float, int]], speed: float, samplerate: int, channels: int, dtype, callback):
+        self._blocks = blocks
+        self._speed = speed
+        self._channels = channels
+        self._dtype = dtype
+        self._callback = callback
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._play, name="replay-audio", daemon=True)
+        self._thread.start()
+
+    def _play(self):
+        start = time.perf_counter()
+        for offset, frames in self._blocks:
+            if self._stop.wait(max(0.0, offset / self._speed - (time.perf_counter() - start))):
+                return
+            self._callback(np.zeros((frames, self._channels), dtype=self._dtype), frames, None, None)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self._thread = None
+
+
+class ReplayTyper:
+    """Typer that takes as long as each recorded burst of typing did."""
+
+    def __init__(self, durations: list[float], speed: float):
+        self._durations = deque(d / speed for d in durations)
+
+    def type_text(self, text: str):
+        if self._durations:
+            time.sleep(self._durations.popleft())
+
+
+def _synthetic_text(words: int, chars: int) -> str:
+    """Placeholder text with the recorded word and character counts."""
+    if words <= 0:
+        return ""
+    length = max(1, (chars - (words - 1)) // words)
+    return " ".join(["a" * length] * words)
+
+
+def _script_api(api: StandInAPI, trace: tr.TakeTrace, speed: float):
+    """Queue the recorded transcription and token timing on the stand-in API."""
+    transcribe_start, transcribe_end = trace.first(tr.TRANSCRIBE_START), trace.first(tr.TRANSCRIBE_END)
+    format_start = trace.first(tr.FORMAT_START)
+    if transcribe_start and transcribe_end:
+        words = format_start.value if format_start else 0
+        api.queue_transcription(
+            (transcribe_end.t - transcribe_start.t) / speed, _synthetic_text(words, transcribe_end.value)
+        )
+    if format_start:
+        # Only used if the replayed formatter calls GPT, as the recorded one did
+        api.queue_chat([
+            ((e.t - format_start.t) / speed, "x" * max(e.value, 1))
+            for e in trace.events if e.kind == tr.TOKEN and e.t >= format_start.t
+        ])
+
+
+def _config_for(trace: tr.TakeTrace) -> RuntimeConfig:
+    """Runtime config with the parameters the take was recorded with."""
+    config = RuntimeConfig()
+    known = {param["name"] for param in config.describe()}
+    config.update({name: value for name, value in trace.params.items() if name in known})
+    return config
+
+
+def replay(trace: tr.TakeTrace, speed: float = 1.0, timeout: float = 120.0) -> tr.TakeTrace:
+    """Re-run a traced take against stubs and return the trace of the replay.
+
+    Times in the returned trace are scaled back by speed, so they compare
+    directly with the recorded ones.
+    """
+    release = trace.first(tr.RELEASE)
+    if release is None:
+        raise ValueError("Trace has no hotkey release")
+    events = trace.events
+    blocks = [(e.t, e.value) for e in events if e.kind == tr.AUDIO_BLOCK]
+    typing = [end.t - start.t for start, end in zip(
+        [e for e in events if e.kind == tr.TYPE_START],
+        [e for e in events if e.kind == tr.TYPE_END],
+    )]
+
+    config = _config_for(trace)
+    idle = threading.Event()
+    api = StandInAPI().start()
+    with tempfile.TemporaryDirectory(prefix="replay-") as trace_dir:
+        try:
+            with client_env(api.base_url):
+                service = DictationService(
+                    api_key="replay",
+                    hotkey=None,
+                    format_mode=trace.mode or "single-line",
+                    on_status_change=lambda status: idle.set() if status == "idle" else None,
+                    router=ModelRouter(),
+                    scheduler=RateLimitScheduler(),
+                    recorder=AudioRecorder(input_stream=functools.partial(ReplayInputStream, blocks, speed)),
+                    typer=ReplayTyper(typing, speed),
+                    config=config,
+                    trace_dir=trace_dir,
+                )
+            # Warm up imports and connections on both endpoints, which the recorded take did not pay for
+            words = config["short_text_threshold"] + 25
+            api.queue_transcription(0.0, _synthetic_text(words, words * 5))
+            api.queue_chat([(0.0, "x")])
+            service._run_pipeline(np.zeros(1600, dtype=np.float32), on_token=lambda token: None)
+            _script_api(api, trace, speed)
+            idle.clear()
+            service._on_hotkey_press(trace.mode or None)
+            time.sleep(release.t / speed)
+            service._on_hotkey_release()
+            if not idle.wait(timeout):
+                raise TimeoutError(f"Replayed take did not finish within {timeout:.0f}s")
+            # The trace is written right after the final status change
+            deadline = time.perf_counter() + 5
+            while not os.listdir(trace_dir) and time.perf_counter() < deadline:
+                time.sleep(0.01)
+            names = os.listdir(trace_dir)
+            if not names:
+                raise RuntimeError("Replayed take was discarded (too short?)")
+            replayed = tr.TakeTrace.load(os.path.join(trace_dir, names[0]))
+        finally:
+            api.stop()
+
+    return replayed.scaled(speed)
+
+
+def parse_at(at: str) -> tuple[Optional[datetime], int]:
+    """Parse "[YYYY-MM-DD ]HH:MM[:SS]" into (date if given, seconds into the day)."""
+    date_text, _, time_text = at.strip().rpartition(" ")
+    parts = time_text.split(":")
+    try:
+        if len(parts) not in (2, 3):
+            raise ValueError
+        hours, minutes, seconds = (int(p) for p in parts + ["0"] * (3 - len(parts)))
+        if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+            raise ValueError
+        date = datetime.strptime(date_text, "%Y-%m-%d") if date_text else None
+    except ValueError:
+        raise ValueError(f"Expected [YYYY-MM-DD ]HH:MM[:SS], got {at!r}") from None
+    return date, hours * 3600 + minutes * 60 + seconds
+
+
+def find_trace(directory: str, at: str) -> str:
+    """Path of the trace in directory whose take started closest to at.
+
+    Args:
+        at: Local time as "HH:MM[:SS]", matched on any day (the newest of
+            equally close traces wins), or "YYYY-MM-DD HH:MM[:SS]"
+    """
+    date, target = parse_at(at)
+    best, best_distance = None, None
+    for name in os.listdir(directory):
+        if not name.endswith(".trace"):
+            continue
+        try:
+            started = datetime.strptime(name[:15], "%Y%m%d-%H%M%S")
+        except ValueError:
+            continue
+        distance = abs(started.hour * 3600 + started.minute * 60 + started.second - target)
+        if date is not None:
+            distance += abs((started.date() - date.date()).days) * 86400
+        if best_distance is None or distance < best_distance or (distance == best_distance and name > best):
+            best, best_distance = name, distance
+    if best is None:
+        raise FileNotFoundError(f"No traces in {directory}")
+    return os.path.join(directory, best)
+
+
+def _at_argument(text: str) -> str:
+    try:
+        parse_at(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def _speed_argument(text: str) -> float:
+    try:
+        speed = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid speed: {text!r}")
+    if not 0 < speed < float("inf"):
+        raise argparse.ArgumentTypeError("speed must be a positive number")
+    return speed
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a take trace against stubbed backends.")
+    parser.add_argument("path", help="Trace file, or a folder of traces with --at")
+    parser.add_argument("--at", type=_at_argument,
+                        help="Pick the trace that started closest to this local time ([YYYY-MM-DD ]HH:MM[:SS])")
+    parser.add_argument("--speed", type=_speed_argument, default=1.0, help="Replay faster (>1) or slower (<1)")
+    parser.add_argument("--events", action="store_true", help="Print every recorded event and exit")
+    args = parser.parse_args(argv)
+
+    path = args.path
+    if os.path.isdir(path):
+        if not args.at:
+            parser.error("--at is required when path is a folder")
+        path = find_trace(path, args.at)
+        print(f"Closest trace: {path}")
+    trace = tr.TakeTrace.load(path)
+    started = datetime.fromtimestamp(trace.started_at).strftime("%Y-%m-%d %H:%M:%S")
+    variant = f", variant {trace.variant}" if trace.variant else ""
+    print(f"Take {trace.take_id} ({trace.mode}{variant}) at {started}, {len(trace.events)} events")
+
+    if args.events:
+        for event in trace.events:
+            print(f"{event.t * 1000:>10.1f} ms  {event.name:<17} {event.value}")
+        return
+
+    replayed = replay(trace, speed=args.speed)
+    recorded_summary, replayed_summary = trace.summary(), replayed.summary()
+    print(f"{'':<22}{'recorded':>10}{'replayed':>10}")
+    for key, recorded in recorded_summary.items():
+        again = replayed_summary.get(key)
+        print(
+            f"{key:<22}"
+            f"{recorded if recorded is not None else '-':>10}"
+            f"{again if again is not None else '-':>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
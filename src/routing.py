@@ -0,0 +1,147 @@
+# src/routing.py
+"""Picks the model, output budget and prompt variant for each formatting call."""
+import json
+import math
+import threading
+from collections import deque
+from typing import NamedTuple, Optional
+
+
+class Route(NamedTuple):
+    """One row of the routing table. The first matching row wins."""
+    name: str
+    model: str
+    prompt: str = "full"  # Prompt variant: "full" or "compact"
+    max_words: Optional[int] = None  # Only for inputs up to this many words
+    min_ttft: Optional[float] = None  # Only when recent time-to-first-token (s) is at least this
+    modes: Optional[tuple] = None  # Only for these format modes
+    temperature: float = 0.3
+
+
+class Decision(NamedTuple):
+    """What to send for one formatting call."""
+    route: str
+    model: str
+    prompt: str
+    max_tokens: int
+    temperature: float
+
+
+class ModelRouter:
+    """Routes formatting calls by input size, format mode and observed latency.
+
+    Formatting output is about as long as its input, so max_tokens is sized
+    from the input instead of a flat 2000; a tight budget lets the provider
+    schedule the request as a short one. Per-route latencies are recorded so
+    the table can be tuned from real data (see stats()).
+    """
+
+    DEFAULT_ROUTES = (
+        Route("short", "gpt-4o-mini", prompt="compact", max_words=40),
+        Route("busy", "gpt-4.1-nano", prompt="compact", min_ttft=2.0),
+        Route("default", "gpt-4o-mini"),
+    )
+
+    # Output budget relative to estimated input tokens, plus fixed headroom
+    OUTPUT_RATIO = 1.5
+    OUTPUT_HEADROOM = 32
+    MIN_TOKENS = 64
+    MAX_TOKENS = 4096
+
+    def __init__(self, routes: Optional[list[Route]] = None, ewma_alpha: float = 0.3, window: int = 200):
+        self._routes = list(routes or self.DEFAULT_ROUTES)
+        self._alpha = ewma_alpha
+        self._window = window
+        self._lock = threading.Lock()
+        self._ttft: Optional[float] = None  # EWMA over all routes, in seconds
+        self._stats: dict[str, dict] = {}
+
+    @classmethod
+    def from_json(cls, path: str) -> "ModelRouter":
+        """Load a routing table: a JSON list of objects with Route fields."""
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        routes = []
+        for row in rows:
+            if row.get("modes") is not None:
+                row["modes"] = tuple(row["modes"])
+            routes.append(Route(**row))
+        return cls(routes)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count, erring high for non-Latin scripts.
+
+        ASCII runs at about 4 characters per token. Every other character
+        counts as a whole token: CJK often needs one or more per character,
+        and underestimating would cut the formatted output short.
+        """
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        return max(1, math.ceil(ascii_chars / 4) + len(text) - ascii_chars)
+
+    def choose(self, text: str, mode: str) -> Decision:
+        """Pick the route for formatting text in the given mode."""
+        words = len(text.split())
+        ttft = self._ttft
+        route = self._routes[-1]
+        for candidate in self._routes:
+            if candidate.max_words is not None and words > candidate.max_words:
+                continue
+            if candidate.min_ttft is not None and (ttft is None or ttft < candidate.min_ttft):
+                continue
+            if candidate.modes is not None and mode not in candidate.modes:
+                continue
+            route = candidate
+            break
+
+        budget = math.ceil(self.estimate_tokens(text) * self.OUTPUT_RATIO) + self.OUTPUT_HEADROOM
+        max_tokens = min(max(budget, self.MIN_TOKENS), self.MAX_TOKENS)
+        return Decision(route.name, route.model, route.prompt, max_tokens, route.temperature)
+
+    def record(self, decision: Decision, ttft: Optional[float], total: float, truncated: bool = False):
+        """Record the latency of a call made with a decision.
+
+        ``ttft`` is None for calls that did not stream; they count towards the
+        route's totals but not the time-to-first-token average.
+        """
+        with self._lock:
+            if ttft is not None:
+                self._ttft = ttft if self._ttft is None else self._alpha * ttft + (1 - self._alpha) * self._ttft
+            stats = self._stats.setdefault(decision.route, {
+                "calls": 0,
+                "truncated": 0,
+                "ttft": deque(maxlen=self._window),
+                "total": deque(maxlen=self._window),
+            })
+            stats["calls"] += 1
+            stats["truncated"] += int(truncated)
+            if ttft is not None:
+                stats["ttft"].append(ttft)
+            stats["total"].append(total)
+
+    @staticmethod
+    def _percentile(values: list, fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self) -> dict:
+        """Routing table and per-route latency summary (seconds)."""
+        with self._lock:
+            routes = {}
+            for name, stats in self._stats.items():
+                ttft, total = list(stats["ttft"]), list(stats["total"])
+                routes[name] = {
+                    "calls": stats["calls"],
+                    "truncated": stats["truncated"],
+                    "ttft_p50": self._percentile(ttft, 0.5),
+                    "ttft_p95": self._percentile(ttft, 0.95),
+                    "total_p50": self._percentile(total, 0.5),
+                    "total_p95": self._percentile(total, 0.95),
+                }
+            return {
+                "recent_ttft": self._ttft,
+                "table": [route._asdict() for route in self._routes],
+                "routes": routes,
+            }
@@ -1,11 +1,22 @@
 # src/server.py
 """Web server for status dashboard."""
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from starlette.requests import HTTPConnection
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from typing import Set, Callable, Optional
 import asyncio
+import hmac
 import json
+import uuid
+import numpy as np
+from src.archive import to_wav_bytes
+from src.config import RuntimeConfig
+from src.ingest import FrameDecoder, IngestPool, decode_wav
+from src.profiler import SamplingProfiler
+from src.ratelimit import RateLimitScheduler
+from src.routing import ModelRouter
+from src.timeseries import RESOLUTIONS, TimeSeriesStore
 
 
 app = FastAPI(title="Whisper Dictation")
@@ -17,6 +28,35 @@ connections: Set[WebSocket] = set()
 _on_mode_change: Optional[Callable[[str], None]] = None
 _get_mode: Optional[Callable[[], str]] = None
 
+# Callbacks for the audio archive (set by main.py when archiving is enabled)
+_get_audio: Optional[Callable[[str], Optional[np.ndarray]]] = None
+_retranscribe: Optional[Callable[[str], Optional[tuple[str, str]]]] = None
+
+# Worker pool for audio from remote clients (set by main.py)
+_ingest_pool: Optional[IngestPool] = None
+
+# On-demand profiler started through /api/profile/start
+_profiler: Optional[SamplingProfiler] = None
+
+# Formatting model router (set by main.py)
+_router: Optional[ModelRouter] = None
+
+# Shared OpenAI rate-limit scheduler (set by main.py)
+_scheduler: Optional[RateLimitScheduler] = None
+
+# Dashboard metrics (set by main.py)
+_timeseries: Optional[TimeSeriesStore] = None
+
+# Runtime-tunable parameters (set by main.py)
+_config: Optional[RuntimeConfig] = None
+
+# Access token required on every request, or None to allow all (set by main.py)
+_token: Optional[str] = None
+
+TOKEN_COOKIE = "dictation_token"
+
+FORMAT_MODES = ("single-line", "document")
+
 # Shared state
 state = {
     "status": "idle",
@@ -25,6 +65,37 @@ state = {
 }
 
 
+def set_token(token: Optional[str]):
+    """Require a token on every request, as ?token=, a cookie or a Bearer header."""
+    global _token
+    _token = token
+
+
+def _authorized(connection: HTTPConnection) -> bool:
+    """Whether a request or WebSocket carries the access token (if one is set)."""
+    if _token is None:
+        return True
+    authorization = connection.headers.get("authorization", "")
+    supplied = (
+        connection.query_params.get("token")
+        or connection.cookies.get(TOKEN_COOKIE)
+        or (authorization[len("Bearer "):] if authorization.startswith("Bearer ") else "")
+    )
+    return hmac.compare_digest(supplied.encode(), _token.encode())
+
+
+@app.middleware("http")
+async def require_token(request: Request, call_next):
+    """Reject HTTP requests without the access token."""
+    if not _authorized(request):
+        return JSONResponse({"error": "Missing or wrong access token"}, status_code=401)
+    response = await call_next(request)
+    if _token is not None and request.query_params.get("token"):
+        # Opening the dashboard with ?token= lets its own requests through
+        response.set_cookie(TOKEN_COOKIE, _token, httponly=True, samesite="strict")
+    return response
+
+
 @app.get("/")
 async def index():
     """Serve the dashboard."""
@@ -34,6 +105,9 @@ async def index():
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket for live status updates."""
+    if not _authorized(websocket):
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
     connections.add(websocket)
 
@@ -72,10 +146,11 @@ def update_status(status: str):
         pass
 
 
-def add_transcription(text: str):
+def add_transcription(text: str, entry_id: Optional[str] = None):
     """Add a transcription to history and broadcast."""
     from datetime import datetime
     state["history"].insert(0, {
+        "id": entry_id or uuid.uuid4().hex[:12],
         "text": text,
         "timestamp": datetime.now().isoformat(),
     })
@@ -112,7 +187,7 @@ def update_mode(mode: str):
 @app.post("/api/mode")
 async def set_mode(mode: str):
     """Set the format mode."""
-    if mode not in ("single-line", "document"):
+    if mode not in FORMAT_MODES:
         return {"error": "Invalid mode. Use 'single-line' or 'document'"}
     if _on_mode_change:
         _on_mode_change(mode)
@@ -127,5 +202,384 @@ async def get_mode():
     return {"mode": state["format_mode"]}
 
 
+def set_archive_callbacks(
+    get_audio: Callable[[str], Optional[np.ndarray]],
+    retranscribe: Callable[[str], Optional[tuple[str, str]]],
+):
+    """Set callbacks for serving and re-transcribing archived audio."""
+    global _get_audio, _retranscribe
+    _get_audio = get_audio
+    _retranscribe = retranscribe
+
+
+def _find_entry(entry_id: str) -> Optional[dict]:
+    """Look up a history entry by id."""
+    return next((e for e in state["history"] if e.get("id") == entry_id), None)
+
+
+def _range_response(data: bytes, range_header: Optional[str], media_type: str) -> Response:
+    """Serve bytes, honouring a single-range ``Range: bytes=...`` header."""
+    size = len(data)
+    headers = {"Accept-Ranges": "bytes"}
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return Response(data, media_type=media_type, headers=headers)
+
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+            if end_text and end < start:
+                # Syntactically invalid (RFC 9110 14.1.2): ignore the header
+                return Response(data, media_type=media_type, headers=headers)
+            end = min(end, size - 1)
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(end_text), 0)
+            end = size - 1
+    except ValueError:
+        return Response(data, media_type=media_type, headers=headers)
+
+    if start >= size:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+
+@app.get("/api/history/{entry_id}/audio")
+async def get_history_audio(entry_id: str, request: Request):
+    """Serve the archived audio for a history entry as WAV."""
+    audio = await asyncio.to_thread(_get_audio, entry_id) if _get_audio else None
+    if audio is None:
+        return JSONResponse({"error": "No archived audio for this entry"}, status_code=404)
+    wav = await asyncio.to_thread(to_wav_bytes, audio)
+    return _range_response(wav, request.headers.get("range"), "audio/wav")
+
+
+@app.post("/api/history/{entry_id}/retranscribe")
+async def retranscribe_history(entry_id: str):
+    """Re-run transcription and formatting from the archived audio."""
+    result = await asyncio.to_thread(_retranscribe, entry_id) if _retranscribe else None
+    if result is None:
+        return JSONResponse({"error": "No archived audio for this entry"}, status_code=404)
+
+    raw, formatted = result
+    entry = _find_entry(entry_id)
+    if entry is not None and formatted:
+        entry["text"] = formatted
+        await broadcast_state()
+    return {"id": entry_id, "raw": raw, "text": formatted}
+
+
+def set_ingest_pool(pool: IngestPool):
+    """Set the worker pool used by the remote ingestion endpoints."""
+    global _ingest_pool
+    _ingest_pool = pool
+
+
+def _submit_ingest(client_id: str, audio: np.ndarray, mode: str, utterance: int = 0) -> Optional[asyncio.Queue]:
+    """Queue audio on the ingest pool; results arrive as messages on the returned queue."""
+    loop = asyncio.get_running_loop()
+    results: asyncio.Queue = asyncio.Queue()
+
+    def on_token(token: str):
+        loop.call_soon_threadsafe(results.put_nowait, {"type": "token", "utterance": utterance, "text": token})
+
+    def on_done(raw: str, formatted: str, error: Optional[str]):
+        message = {"type": "done", "utterance": utterance, "raw": raw, "text": formatted}
+        if error:
+            message = {"type": "error", "utterance": utterance, "error": error}
+        loop.call_soon_threadsafe(results.put_nowait, message)
+
+    if not _ingest_pool.submit(client_id, audio, mode, on_token, on_done):
+        return None
+    return results
+
+
+@app.post("/api/ingest")
+async def ingest_upload(
+    request: Request,
+    client_id: Optional[str] = None,
+    mode: str = "single-line",
+    codec: str = "pcm_s16le",
+    rate: int = 16000,
+):
+    """Transcribe and format an uploaded recording.
+
+    The body is a WAV file, or raw frames in ``codec`` at ``rate`` Hz. The
+    response streams newline-delimited JSON: token messages, then done.
+    """
+    if _ingest_pool is None:
+        return JSONResponse({"error": "Remote ingestion is not enabled"}, status_code=503)
+    if mode not in FORMAT_MODES:
+        return JSONResponse({"error": "Invalid mode. Use 'single-line' or 'document'"}, status_code=400)
+
+    body = await request.body()
+    try:
+        if body[:4] == b"RIFF":
+            audio = decode_wav(body)
+        else:
+            decoder = FrameDecoder(codec, rate)
+            decoder.feed(body)
+            audio = decoder.finish()
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if len(audio) == 0:
+        return JSONResponse({"error": "No audio in upload"}, status_code=400)
+
+    results = _submit_ingest(client_id or request.client.host, audio, mode)
+    if results is None:
+        return JSONResponse({"error": "Too many pending requests"}, status_code=429)
+
+    async def stream():
+        while True:
+            message = await results.get()
+            yield json.dumps(message) + "\n"
+            if message["type"] != "token":
+                return
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.websocket("/ws/ingest")
+async def ingest_websocket(
+    websocket: WebSocket,
+    client_id: Optional[str] = None,
+    mode: str = "single-line",
+    codec: str = "pcm_s16le",
+    rate: int = 16000,
+):
+    """Stream audio frames from a remote client.
+
+    Binary messages are audio frames. A text message ``{"type": "end"}``
+    closes the current utterance and queues it; formatted tokens for each
+    utterance are sent back as they are generated. A frame or command that
+    cannot be handled is answered with an error message; the connection and
+    utterances already queued carry on.
+    """
+    if not _authorized(websocket):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    if _ingest_pool is None:
+        await websocket.close(code=1013, reason="Remote ingestion is not enabled")
+        return
+    try:
+        if mode not in FORMAT_MODES:
+            raise ValueError("Invalid mode. Use 'single-line' or 'document'")
+        decoder = FrameDecoder(codec, rate)
+    except ValueError as e:
+        await websocket.close(code=1003, reason=str(e))
+        return
+
+    client_id = client_id or uuid.uuid4().hex[:12]
+    outbox: asyncio.Queue = asyncio.Queue()
+    forwarders: Set[asyncio.Task] = set()
+
+    async def forward(results: asyncio.Queue):
+        while True:
+            message = await results.get()
+            await outbox.put(message)
+            if message["type"] != "token":
+                return
+
+    async def sender():
+        while True:
+            await websocket.send_json(await outbox.get())
+
+    sending = asyncio.create_task(sender())
+    utterance = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            current = utterance
+            try:
+                if message.get("bytes") is not None:
+                    decoder.feed(message["bytes"])
+                elif message.get("text"):
+                    command = json.loads(message["text"])
+                    if not isinstance(command, dict):
+                        raise ValueError("Commands must be JSON objects")
+                    if command.get("type") == "mode":
+                        if command.get("mode") not in FORMAT_MODES:
+                            raise ValueError("Invalid mode. Use 'single-line' or 'document'")
+                        mode = command["mode"]
+                    elif command.get("type") == "end":
+                        audio = decoder.finish()
+                        utterance += 1
+                        if len(audio) == 0:
+                            raise ValueError("No audio in utterance")
+                        results = _submit_ingest(client_id, audio, mode, current)
+                        if results is None:
+                            raise ValueError("Too many pending requests")
+                        task = asyncio.create_task(forward(results))
+                        forwarders.add(task)
+                        task.add_done_callback(forwarders.discard)
+            except ValueError as e:
+                await outbox.put({"type": "error", "utterance": current, "error": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sending.cancel()
+        for task in list(forwarders):
+            task.cancel()
+
+
+@app.post("/api/profile/start")
+async def start_profile(interval_ms: float = 5.0):
+    """Start sampling the stacks of all threads."""
+    global _profiler
+    if not interval_ms >= SamplingProfiler.MIN_INTERVAL * 1000:  # Also rejects NaN
+        return JSONResponse(
+            {"error": f"interval_ms must be at least {SamplingProfiler.MIN_INTERVAL * 1000:g}"}, status_code=400
+        )
+    if _profiler is not None:
+        return JSONResponse({"error": "Profiler already running"}, status_code=409)
+    _profiler = SamplingProfiler(interval=interval_ms / 1000)
+    _profiler.start()
+    return {"status": "running", "interval_ms": interval_ms}
+
+
+@app.post("/api/profile/stop")
+async def stop_profile(limit: int = 30):
+    """Stop the profiler and return a speedscope profile and a pstats summary."""
+    global _profiler
+    if _profiler is None:
+        return JSONResponse({"error": "Profiler not running"}, status_code=409)
+    profiler, _profiler = _profiler, None
+    await asyncio.to_thread(profiler.stop)
+    return {
+        "duration": profiler.elapsed,
+        "samples": profiler.samples,
+        "speedscope": profiler.to_speedscope(),
+        "pstats": profiler.pstats_summary(limit=limit),
+    }
+
+
+def set_router(router: ModelRouter):
+    """Set the model router whose statistics are served at /api/routing."""
+    global _router
+    _router = router
+
+
+@app.get("/api/routing")
+async def get_routing():
+    """Get the routing table and per-route latency statistics."""
+    if _router is None:
+        return JSONResponse({"error": "Routing not configured"}, status_code=503)
+    return _router.stats()
+
+
+def set_scheduler(scheduler: RateLimitScheduler):
+    """Set the rate-limit scheduler whose state is served at /api/ratelimit."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+@app.get("/api/ratelimit")
+async def get_ratelimit():
+    """Get per-model concurrency, queue length and remaining budget estimates."""
+    if _scheduler is None:
+        return JSONResponse({"error": "Rate limiting not configured"}, status_code=503)
+    return _scheduler.stats()
+
+
+def set_timeseries(store: TimeSeriesStore):
+    """Set the time-series store served at /api/timeseries."""
+    global _timeseries
+    _timeseries = store
+
+
+@app.get("/api/timeseries")
+async def get_timeseries(
+    metric: Optional[str] = None,
+    resolution: str = "minute",
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+):
+    """Get recorded metrics per minute, hour or day.
+
+    Without a metric, every metric is returned. Times are Unix seconds.
+    """
+    if _timeseries is None:
+        return JSONResponse({"error": "Metrics not configured"}, status_code=503)
+    if resolution not in RESOLUTIONS:
+        return JSONResponse({"error": f"Unknown resolution: {resolution}"}, status_code=400)
+    names = [metric] if metric else _timeseries.metrics()
+    series = {}
+    for name in names:
+        data = _timeseries.query(name, resolution, since, until)
+        if data is not None:
+            series[name] = data
+    if metric and not series:
+        return JSONResponse({"error": f"Unknown metric: {metric}"}, status_code=404)
+    return {"resolution": resolution, "step": RESOLUTIONS[resolution][0], "series": series}
+
+
+def set_config(config: RuntimeConfig):
+    """Set the runtime config served and changed at /api/config."""
+    global _config
+    _config = config
+
+
+async def _json_object(request: Request) -> Optional[dict]:
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+@app.get("/api/config")
+async def get_config():
+    """Get every tunable parameter and the results of the latest experiment."""
+    if _config is None:
+        return JSONResponse({"error": "Runtime config not configured"}, status_code=503)
+    return {"params": _config.describe(), "experiment": _config.experiment()}
+
+
+@app.post("/api/config")
+async def update_config(request: Request):
+    """Change parameters live, e.g. {"short_text_threshold": 20}."""
+    if _config is None:
+        return JSONResponse({"error": "Runtime config not configured"}, status_code=503)
+    values = await _json_object(request)
+    if values is None:
+        return JSONResponse({"error": "Expected a JSON object"}, status_code=400)
+    try:
+        return {"values": _config.update(values)}
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+@app.post("/api/config/experiment")
+async def start_experiment(request: Request):
+    """Start an A/B experiment: {"variants": {"control": {}, "name": {overrides}}}."""
+    if _config is None:
+        return JSONResponse({"error": "Runtime config not configured"}, status_code=503)
+    body = await _json_object(request)
+    variants = body.get("variants") if body else None
+    if not isinstance(variants, dict) or not all(isinstance(v, dict) for v in variants.values()):
+        return JSONResponse({"error": "Expected variants as an object of objects"}, status_code=400)
+    try:
+        _config.start_experiment(variants)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return _config.experiment()
+
+
+@app.delete("/api/config/experiment")
+async def stop_experiment():
+    """Stop assigning takes to variants; the results stay available."""
+    if _config is None:
+        return JSONResponse({"error": "Runtime config not configured"}, status_code=503)
+    _config.stop_experiment()
+    return _config.experiment() or {}
+
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
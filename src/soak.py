@@ -0,0 +1,403 @@
+# src/soak.py
+"""Endurance soak test of the dictation pipeline.
+
+Usage:
+    python -m src.soak --cycles 5000 --report soak.json
+
+Drives DictationService through many synthetic hotkey press/release cycles
+with a fake audio device, a local stand-in for the OpenAI API and a typer
+that types nothing, so the real recording, archive, scheduling, formatting
+and dashboard code runs without a microphone, a key or a focused window. A
+dashboard WebSocket client connects for each take and disconnects after it.
+Every few cycles it samples resident memory, thread count, open file
+descriptors (handles on Windows) and take latency, and fails if any of them
+grows past its limit relative to a baseline taken after warm-up.
+"""
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from fastapi.testclient import TestClient
+
+from src import server
+from src.archive import AudioArchive
+from src.audio import AudioRecorder
+from src.dictation import DictationService
+from src.log import configure_logging
+from src.ratelimit import RateLimitScheduler
+from src.routing import ModelRouter
+from src.standin import StandInAPI, client_env
+from src.timeseries import TimeSeriesStore
+
+# Stand-in transcripts: one short enough to skip GPT, one long enough not to
+SHORT_TRANSCRIPT = "send it over"
+LONG_TRANSCRIPT = (
+    "okay so the plan for tomorrow is to go over the quarterly numbers with the team "
+    "and then send the summary to everyone before lunch"
+)
+
+
+class FakeInputStream:
+    """Stand-in for sd.InputStream that plays synthetic audio from a thread.
+
+    Blocks are delivered speed times faster than real time, so a short hold
+    still produces a take of realistic length.
+    """
+
+    BLOCK_FRAMES = 1600  # 0.1s at 16kHz
+
+    def __init__(self, samplerate: int, channels: int, dtype, callback, speed: float = 10.0):
+        self.speed = speed
+        self._samplerate = samplerate
+        self._channels = channels
+        self._dtype = dtype
+        self._callback = callback
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._play, name="fake-audio", daemon=True)
+        self._thread.start()
+
+    def _play(self):
+        rng = np.random.default_rng()
+        interval = self.BLOCK_FRAMES / self._samplerate / self.speed
+        t = 0
+        while not self._stop.is_set():
+            # Quiet tone plus noise, so the archive has something to compress
+            n = np.arange(t, t + self.BLOCK_FRAMES)
+            block = 0.1 * np.sin(2 * np.pi * 220 * n / self._samplerate) + rng.normal(0, 0.01, self.BLOCK_FRAMES)
+            frames = np.repeat(block[:, None], self._channels, axis=1).astype(self._dtype)
+            self._callback(frames, self.BLOCK_FRAMES, None, None)
+            t += self.BLOCK_FRAMES
+            self._stop.wait(interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self._thread = None
+
+
+class NullTyper:
+    """KeyboardTyper that only counts what it would have typed."""
+
+    def __init__(self):
+        self.chars = 0
+
+    def type_text(self, text: str):
+        self.chars += len(text)
+
+
+class Sample(NamedTuple):
+    """Process resources after a cycle."""
+    cycle: int
+    elapsed: float
+    rss_mb: Optional[float]
+    threads: int
+    fds: Optional[int]
+    latency_ms: float  # Mean take latency since the previous sample
+
+
+class Limits(NamedTuple):
+    """Largest growth over the post-warm-up baseline that still passes."""
+    rss_mb: float = 64.0
+    threads: int = 4
+    fds: int = 16
+    latency_ratio: float = 1.5
+
+
+def _rss_mb() -> Optional[float]:
+    """Resident set size of this process, or None if it cannot be read."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize / 2**20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return None
+
+
+def _open_fds() -> Optional[int]:
+    """Open file descriptors (handles on Windows), or None if unknown."""
+    if sys.platform == "win32":
+        import ctypes
+
+        count = ctypes.c_ulong()
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.kernel32.GetProcessHandleCount(process, ctypes.byref(count)):
+            return None
+        return count.value
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return None
+
+
+def _join_take_threads(timeout: float):
+    """Wait for take threads that already reported idle to exit."""
+    for thread in threading.enumerate():
+        if thread.name == DictationService.TAKE_THREAD:
+            thread.join(timeout)
+
+
+def check(samples: list[Sample], limits: Limits, warmup: int) -> list[str]:
+    """Compare the end of the run with the baseline after warm-up.
+
+    Both ends are the median of a few samples, so one noisy sample (a GC
+    pause, a slow response) neither fails nor hides a trend.
+
+    Returns:
+        One message per limit that was exceeded
+    """
+    measured = [s for s in samples if s.cycle > warmup]
+    if len(measured) < 2:
+        return []
+    window = max(1, min(5, len(measured) // 4))
+    start, end = measured[:window], measured[-window:]
+
+    def growth(field: str) -> Optional[float]:
+        before = [getattr(s, field) for s in start if getattr(s, field) is not None]
+        after = [getattr(s, field) for s in end if getattr(s, field) is not None]
+        if not before or not after:
+            return None
+        return statistics.median(after) - statistics.median(before)
+
+    failures = []
+    for field, limit, unit in (("rss_mb", limits.rss_mb, " MB"), ("threads", limits.threads, ""), ("fds", limits.fds, "")):
+        grown = growth(field)
+        if grown is not None and grown > limit:
+            failures.append(f"{field} grew by {grown:.1f}{unit} (limit {limit}{unit})")
+
+    before = statistics.median(s.latency_ms for s in start)
+    after = statistics.median(s.latency_ms for s in end)
+    if before > 0 and after / before > limits.latency_ratio:
+        failures.append(
+            f"take latency drifted from {before:.0f} ms to {after:.0f} ms (limit x{limits.latency_ratio})"
+        )
+    return failures
+
+
+def run(
+    cycles: int = 1000,
+    hold: float = 0.05,
+    speed: float = 10.0,
+    sample_every: int = 25,
+    warmup: int = 50,
+    limits: Limits = Limits(),
+    latency: float = 0.01,
+    base_url: Optional[str] = None,
+    archive_dir: Optional[str] = None,
+    timeout: float = 30.0,
+    on_sample=None,
+) -> dict:
+    """Run the soak test.
+
+    Args:
+        cycles: Press/release cycles to run
+        hold: Seconds each (synthetic) hotkey is held
+        speed: How much faster than real time the fake microphone runs
+        sample_every: Cycles between resource samples
+        warmup: Cycles before the baseline is taken (caches, pools, imports)
+        limits: Allowed growth over the baseline
+        latency: Response delay of the built-in stand-in API
+        base_url: Use this OpenAI-compatible server instead of the stand-in
+        archive_dir: Keep the audio archive here instead of a temp folder
+        timeout: Seconds a single take may take before the run is aborted
+        on_sample: Called with each Sample, e.g. to print progress
+
+    Returns:
+        Report with all samples, the failures and whether the run passed
+    """
+    api = None
+    if base_url is None:
+        api = StandInAPI(latency=latency).start()
+        base_url = api.base_url
+
+    temp_dir = None
+    if archive_dir is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="soak-archive-")
+        archive_dir = temp_dir.name
+    # Small enough that segments are evicted and their mmaps dropped during the run
+    archive = AudioArchive(archive_dir, max_bytes=8 * 2**20, segment_bytes=2**20)
+
+    typer = NullTyper()
+    idle = threading.Event()
+    transcribed = [0]
+
+    def on_status_change(status: str):
+        server.update_status(status)
+        if status == "idle":
+            idle.set()
+
+    def on_transcription(raw: str, formatted: str, take_id: str):
+        transcribed[0] += 1
+        server.add_transcription(formatted, entry_id=take_id)
+
+    with client_env(base_url):  # Read when the OpenAI clients are created
+        service = DictationService(
+            api_key=os.getenv("OPENAI_API_KEY") or "soak-test",
+            hotkey=None,
+            on_status_change=on_status_change,
+            on_transcription=on_transcription,
+            archive=archive,
+            router=ModelRouter(),
+            scheduler=RateLimitScheduler(),
+            metrics=TimeSeriesStore(),
+            recorder=AudioRecorder(input_stream=functools.partial(FakeInputStream, speed=speed)),
+            typer=typer,
+        )
+
+    samples: list[Sample] = []
+    latencies: list[float] = []
+    failures: list[str] = []
+    dashboard = TestClient(server.app)
+    start = time.perf_counter()
+    try:
+        for cycle in range(1, cycles + 1):
+            if api is not None:
+                api.transcript = LONG_TRANSCRIPT if cycle % 2 else SHORT_TRANSCRIPT
+            idle.clear()
+            with dashboard.websocket_connect("/ws") as client:
+                client.receive_json()  # Initial state, so the server has registered it
+                service._on_hotkey_press()
+                time.sleep(hold)
+                released = time.perf_counter()
+                service._on_hotkey_release()
+                finished = idle.wait(timeout)
+            if not finished:
+                failures.append(f"cycle {cycle} did not finish within {timeout:.0f}s")
+                break
+            latencies.append((time.perf_counter() - released) * 1000)
+
+            if cycle % sample_every == 0 or cycle == cycles:
+                # Idle is reported before the take thread exits
+                _join_take_threads(timeout)
+                sample = Sample(
+                    cycle=cycle,
+                    elapsed=round(time.perf_counter() - start, 2),
+                    rss_mb=_rss_mb(),
+                    threads=threading.active_count(),
+                    fds=_open_fds(),
+                    latency_ms=statistics.fmean(latencies),
+                )
+                latencies.clear()
+                samples.append(sample)
+                if on_sample is not None:
+                    on_sample(sample)
+    finally:
+        service.stop()
+        dashboard.close()
+        archive.close()
+        if api is not None:
+            api.stop()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    # The server drops a disconnected client when its receive loop notices
+    deadline = time.perf_counter() + 2
+    while server.connections and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    if server.connections:
+        failures.append(f"{len(server.connections)} dashboard WebSocket connections were never removed")
+
+    failures += check(samples, limits, warmup)
+    return {
+        "cycles": samples[-1].cycle if samples else 0,
+        "transcribed": transcribed[0],
+        "typed_chars": typer.chars,
+        "api_requests": api.requests if api is not None else None,
+        "dashboard_connections": len(server.connections),
+        "limits": limits._asdict(),
+        "samples": [s._asdict() for s in samples],
+        "failures": failures,
+        "passed": not failures,
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Soak-test the dictation pipeline for leaks and latency drift.")
+    parser.add_argument("--cycles", type=int, default=1000, help="Press/release cycles to run")
+    parser.add_argument("--hold", type=float, default=0.05, help="Seconds each hotkey press is held")
+    parser.add_argument("--speed", type=float, default=10.0, help="Fake microphone speed vs real time")
+    parser.add_argument("--sample-every", type=int, default=25, help="Cycles between resource samples")
+    parser.add_argument("--warmup", type=int, default=50, help="Cycles before the baseline sample")
+    parser.add_argument("--latency", type=float, default=0.01, help="Stand-in API response delay (s)")
+    parser.add_argument("--base-url", help="OpenAI-compatible server to use instead of the built-in stand-in")
+    parser.add_argument("--max-rss-mb", type=float, default=Limits().rss_mb, help="Allowed RSS growth (MB)")
+    parser.add_argument("--max-threads", type=int, default=Limits().threads, help="Allowed thread count growth")
+    parser.add_argument("--max-fds", type=int, default=Limits().fds, help="Allowed open fd/handle growth")
+    parser.add_argument("--max-latency-ratio", type=float, default=Limits().latency_ratio,
+                        help="Allowed end/baseline take latency ratio")
+    parser.add_argument("--report", help="Write the full report as JSON here")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    configure_logging(level=os.getenv("LOG_LEVEL", "WARNING"))
+
+    def print_sample(sample: Sample):
+        rss = f"{sample.rss_mb:.1f} MB" if sample.rss_mb is not None else "n/a"
+        print(
+            f"cycle {sample.cycle:>6}  {sample.elapsed:>8.1f}s  rss {rss:>9}  threads {sample.threads:>3}  "
+            f"fds {sample.fds if sample.fds is not None else 'n/a':>4}  take {sample.latency_ms:>6.0f} ms",
+            flush=True,
+        )
+
+    report = run(
+        cycles=args.cycles,
+        hold=args.hold,
+        speed=args.speed,
+        sample_every=args.sample_every,
+        warmup=args.warmup,
+        limits=Limits(args.max_rss_mb, args.max_threads, args.max_fds, args.max_latency_ratio),
+        latency=args.latency,
+        base_url=args.base_url,
+        on_sample=print_sample,
+    )
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for failure in report["failures"]:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    print("PASSED" if report["passed"] else "FAILED")
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# src/standin.py
+"""Local stand-in for the OpenAI endpoints used by the app.
+
+Serves /v1/audio/transcriptions and /v1/chat/completions (including
+streaming) over plain HTTP with configurable latency, and enforces per-model
+request and token budgets, reporting them in the same x-ratelimit-* headers
+as the real API and answering 429 once exhausted. Responses can also be
+scripted one by one with exact timings, which is how traces are replayed.
+Point an OpenAI client at ``base_url`` (see client_env) to test rate-limit
+handling, soak runs or replays offline.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@contextmanager
+def client_env(base_url: str):
+    """Point OpenAI clients created inside the block at base_url."""
+    previous = os.environ.get("OPENAI_BASE_URL")
+    os.environ["OPENAI_BASE_URL"] = base_url
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("OPENAI_BASE_URL", None)
+        else:
+            os.environ["OPENAI_BASE_URL"] = previous
+
+
+class _Budget:
+    """Server-side budget that refills continuously over its window."""
+
+    def __init__(self, limit: Optional[int], window: float = 60.0):
+        self.limit = limit
+        self._window = window
+        self._level = float(limit or 0)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.limit, self._level + self.limit / self._window * (now - self._updated))
+        self._updated = now
+
+    def try_take(self, amount: float) -> bool:
+        if self.limit is None:
+            return True
+        self._refill()
+        if self._level < amount:
+            return False
+        self._level -= amount
+        return True
+
+    def headers(self, kind: str) -> dict:
+        if self.limit is None:
+            return {}
+        self._refill()
+        reset = (self.limit - self._level) / (self.limit / self._window)
+        return {
+            f"x-ratelimit-limit-{kind}": str(self.limit),
+            f"x-ratelimit-remaining-{kind}": str(int(self._level)),
+            f"x-ratelimit-reset-{kind}": f"{reset:.3f}s",
+        }
+
+
+class StandInAPI:
+    """Threaded HTTP server imitating the OpenAI API."""
+
+    def __init__(
+        self,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        latency: float = 0.0,
+        token_delay: float = 0.0,
+        transcript: str = "this is a stand-in transcript of the recorded audio",
+        port: int = 0,
+        window: float = 60.0,
+    ):
+        """
+        Args:
+            rpm: Requests per window for each model, None for unlimited
+            tpm: Tokens per window for each model, None for unlimited
+            latency: Seconds before each response starts
+            token_delay: Seconds between streamed tokens
+            transcript: Text every transcription returns
+            port: Port to listen on, 0 for any free port
+            window: Budget refill window in seconds; the real API uses a
+                minute, tests can shorten it to see limits recover quickly
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.latency = latency
+        self.token_delay = token_delay
+        self.transcript = transcript
+        self.requests = 0
+        self.rate_limited = 0
+        self.window = window
+        # Scripted responses, used before the defaults above (see queue_*)
+        self._transcriptions: deque = deque()
+        self._chats: deque = deque()
+        self._budgets: dict[str, tuple[_Budget, _Budget]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "StandInAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="standin-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInAPI":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _admit(self, model: str, tokens: float) -> tuple[bool, dict]:
+        """Charge a request against the model's budgets."""
+        with self._lock:
+            self.requests += 1
+            requests, token_budget = self._budgets.setdefault(model, (_Budget(self.rpm, self.window), _Budget(self.tpm, self.window)))
+            allowed = requests.try_take(1) and token_budget.try_take(tokens)
+            if not allowed:
+                self.rate_limited += 1
+            return allowed, {**requests.headers("requests"), **token_budget.headers("tokens")}
+
+    def queue_transcription(self, delay: float, text: str):
+        """Answer the next transcription request with text after delay seconds."""
+        self._transcriptions.append((delay, text))
+
+    def queue_chat(self, tokens: list[tuple[float, str]]):
+        """Answer the next chat request with scripted tokens.
+
+        Args:
+            tokens: (offset, text) pairs, offset in seconds after the request arrived
+        """
+        self._chats.append(tokens)
+
+    def _next_script(self, queue: deque):
+        try:
+            return queue.popleft()
+        except IndexError:
+            return None
+
+    def format_text(self, text: str) -> str:
+        """What the stand-in "formats" a transcript into."""
+        text = text.strip()
+        if not text:
+            return ""
+        return text[0].upper() + text[1:] + ("" if text[-1] in ".!?" else ".")
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # Keep test output quiet
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: dict):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _rate_limited(self, headers: dict):
+                error = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+                self._send(429, json.dumps(error).encode(), "application/json", headers)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.endswith("/audio/transcriptions"):
+                    self._transcribe(body)
+                elif self.path.endswith("/chat/completions"):
+                    self._chat(json.loads(body))
+                else:
+                    self._send(404, b'{"error": {"message": "Not found"}}', "application/json", {})
+
+            def _transcribe(self, body: bytes):
+                fields = dict(re.findall(rb'name="(\w+)"\r\n\r\n([^\r]*)\r\n', body))
+                model = fields.get(b"model", b"whisper-1").decode()
+                allowed, headers = api._admit(model, 0)
+                if not allowed:
+                    return self._rate_limited(headers)
+                delay, transcript = api._next_script(api._transcriptions) or (api.latency, api.transcript)
+                time.sleep(delay)
+
+                response_format = fields.get(b"response_format", b"json").decode()
+                if response_format == "text":
+                    return self._send(200, transcript.encode(), "text/plain", headers)
+                result = {"text": transcript}
+                if response_format == "verbose_json":
+                    # 16-bit mono 16kHz WAV is 32000 bytes per second
+                    result.update(task="transcribe", language="english", duration=len(body) / 32000, segments=[])
+                self._send(200, json.dumps(result).encode(), "application/json", headers)
+
+            def _chat(self, request: dict):
+                arrived = time.perf_counter()
+                model = request.get("model", "gpt-4o-mini")
+                prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+                allowed, headers = api._admit(model, len(prompt) / 4 + request.get("max_tokens", 0))
+                if not allowed:
+                    return self._rate_limited(headers)
+
+                script = api._next_script(api._chats)
+                if script is None:
+                    time.sleep(api.latency)
+                    user = [m["content"] for m in request.get("messages", []) if m.get("role") == "user"]
+                    text = api.format_text(user[-1] if user else "")
+                    tokens = [(None, token) for token in re.findall(r"\S+\s*", text)]
+                else:
+                    tokens = script
+                    text = "".join(token for _, token in tokens)
+                if not request.get("stream"):
+                    if script:
+                        time.sleep(max(0.0, script[-1][0] - (time.perf_counter() - arrived)))
+                    result = {
+                        "id": "chatcmpl-standin",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }],
+                    }
+                    return self._send(200, json.dumps(result).encode(), "application/json", headers)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                for offset, token in tokens + [(None, None)]:
+                    if offset is not None:
+                        time.sleep(max(0.0, offset - (time.perf_counter() - arrived)))
+                    chunk = {
+                        "id": "chatcmpl-standin",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": token} if token else {},
+                            "finish_reason": None if token else "stop",
+                        }],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    if token and offset is None and api.token_delay:
+                        time.sleep(api.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
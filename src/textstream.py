@@ -0,0 +1,150 @@
+# src/textstream.py
+"""Incremental text normalization for streamed GPT output.
+
+A pipeline is a chain of stages. Each stage sees the text one token at a time
+and keeps just enough state to handle patterns split across token boundaries
+(a "\\r" ending one token and "\\n" starting the next, a space at the end of
+one token and the start of the next). Work per token is proportional to the
+token's length, never to the text produced so far, and the same pipeline run
+over a whole string gives exactly the same result as streaming it.
+"""
+import re
+from typing import Iterable
+
+_SPACE_RUN = re.compile(" {2,}")
+
+
+class Stage:
+    """One step of a streaming text transform."""
+
+    def feed(self, text: str) -> str:
+        """Transform the next piece of text. May hold some back."""
+        return text
+
+    def flush(self) -> str:
+        """Return any held-back text at the end of the stream."""
+        return ""
+
+
+class FoldNewlines(Stage):
+    """Replace \\r\\n, \\r and \\n with a single replacement string."""
+
+    def __init__(self, replacement: str = " "):
+        self._replacement = replacement
+        self._pending_cr = False
+
+    def feed(self, text: str) -> str:
+        if self._pending_cr:
+            text = "\r" + text
+            self._pending_cr = False
+        if text.endswith("\r"):
+            # Might be the first half of \r\n - decide when the next token arrives
+            text = text[:-1]
+            self._pending_cr = True
+        r = self._replacement
+        return text.replace("\r\n", r).replace("\r", r).replace("\n", r)
+
+    def flush(self) -> str:
+        if self._pending_cr:
+            self._pending_cr = False
+            return self._replacement
+        return ""
+
+
+class CollapseSpaces(Stage):
+    """Collapse runs of spaces, including runs split across tokens."""
+
+    def __init__(self):
+        self._last_was_space = False
+
+    def feed(self, text: str) -> str:
+        if self._last_was_space:
+            text = text.lstrip(" ")
+        if not text:
+            return ""
+        text = _SPACE_RUN.sub(" ", text)
+        self._last_was_space = text.endswith(" ")
+        return text
+
+
+class StripEdges(Stage):
+    """Drop leading and trailing whitespace of the whole stream.
+
+    Trailing whitespace of a token is held until more non-space text arrives,
+    so it is only emitted if it turns out not to be at the end.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._held = ""
+
+    def feed(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        body = text.rstrip()
+        if not body:
+            self._held += text
+            return ""
+        out = self._held + body
+        self._held = text[len(body):]
+        return out
+
+    def flush(self) -> str:
+        self._held = ""
+        return ""
+
+
+class TextPipeline:
+    """Runs text through a chain of stages and collects the output."""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self._stages = list(stages)
+        self._parts: list[str] = []
+
+    def feed(self, text: str) -> str:
+        """Push one token through every stage. Returns the text ready to emit."""
+        for stage in self._stages:
+            if not text:
+                return ""
+            text = stage.feed(text)
+        if text:
+            self._parts.append(text)
+        return text
+
+    def flush(self) -> str:
+        """End the stream, draining text held back by any stage."""
+        out = ""
+        for i, stage in enumerate(self._stages):
+            # Text released by a stage still has to pass the stages after it
+            tail = stage.flush()
+            for later in self._stages[i + 1:]:
+                if not tail:
+                    break
+                tail = later.feed(tail)
+            out += tail
+        if out:
+            self._parts.append(out)
+        return out
+
+    @property
+    def text(self) -> str:
+        """Everything emitted so far."""
+        return "".join(self._parts)
+
+    def run(self, text: str) -> str:
+        """Normalize a complete string in one go."""
+        self.feed(text)
+        self.flush()
+        return self.text
+
+
+def pipeline_for_mode(mode: str) -> TextPipeline:
+    """Normalization used for formatted text in the given format mode."""
+    if mode == "single-line":
+        # Never type Enter: newlines become spaces, then spaces are collapsed
+        return TextPipeline([FoldNewlines(" "), CollapseSpaces(), StripEdges()])
+    # Typing "\r\n" would press Enter twice, so normalize line endings
+    return TextPipeline([FoldNewlines("\n"), StripEdges()])
@@ -0,0 +1,187 @@
+# src/timeseries.py
+"""In-process time-series store for dashboard metrics.
+
+Each metric keeps one fixed-size ring per resolution (RRD style): by default
+a day of minutes, a month of hours and two years of days. A ring slot holds
+the count, sum, min and max of the values recorded in its interval, so every
+observation updates all resolutions in O(1) and memory never grows. A slot
+is reused once its interval has scrolled out of the ring.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# name -> (seconds per slot, number of slots)
+RESOLUTIONS = {
+    "minute": (60, 24 * 60),
+    "hour": (3600, 30 * 24),
+    "day": (86400, 2 * 365),
+}
+
+_FIELDS = ("bucket", "count", "total", "low", "high")
+
+
+class _Ring:
+    """Consolidated values of one metric at one resolution."""
+
+    def __init__(self, step: int, slots: int):
+        self.step = step
+        self.bucket = np.full(slots, -1, dtype=np.int64)  # Interval number held by each slot
+        self.count = np.zeros(slots, dtype=np.int64)
+        self.total = np.zeros(slots, dtype=np.float64)
+        self.low = np.full(slots, np.inf)
+        self.high = np.full(slots, -np.inf)
+
+    def add(self, t: float, value: float):
+        bucket = int(t // self.step)
+        i = bucket % len(self.bucket)
+        if self.bucket[i] != bucket:
+            # Slot still holds an interval that has scrolled out of the ring
+            self.bucket[i] = bucket
+            self.count[i] = 0
+            self.total[i] = 0.0
+            self.low[i] = np.inf
+            self.high[i] = -np.inf
+        self.count[i] += 1
+        self.total[i] += value
+        self.low[i] = min(self.low[i], value)
+        self.high[i] = max(self.high[i], value)
+
+    def query(self, since: float, until: float) -> dict:
+        """Intervals overlapping [since, until], oldest first."""
+        first, last = int(since // self.step), int(until // self.step)
+        mask = (self.bucket >= first) & (self.bucket <= last) & (self.count > 0)
+        order = np.argsort(self.bucket[mask])
+        count = self.count[mask][order]
+        return {
+            "t": (self.bucket[mask][order] * self.step).tolist(),
+            "count": count.tolist(),
+            "mean": (self.total[mask][order] / count).tolist(),
+            "min": self.low[mask][order].tolist(),
+            "max": self.high[mask][order].tolist(),
+        }
+
+
+class TimeSeriesStore:
+    """Records metric values over time and serves them at several resolutions.
+
+    Values are timestamped with wall-clock time, so a store loaded after a
+    restart lines up with what was saved before it.
+    """
+
+    def __init__(self, path: Optional[str] = None, save_interval: float = 300.0):
+        self._path = path
+        self._save_interval = save_interval
+        self._lock = threading.Lock()
+        self._series: dict[str, dict[str, _Ring]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def _rings(self, metric: str) -> dict[str, _Ring]:
+        rings = self._series.get(metric)
+        if rings is None:
+            rings = self._series[metric] = {
+                name: _Ring(step, slots) for name, (step, slots) in RESOLUTIONS.items()
+            }
+        return rings
+
+    def record(self, metric: str, value: float, t: Optional[float] = None):
+        """Add one observation of metric, at time t (default now)."""
+        t = time.time() if t is None else t
+        with self._lock:
+            for ring in self._rings(metric).values():
+                ring.add(t, value)
+
+    def metrics(self) -> list[str]:
+        with self._lock:
+            return sorted(self._series)
+
+    def query(
+        self,
+        metric: str,
+        resolution: str = "minute",
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Optional[dict]:
+        """Per-interval count, mean, min and max of a metric.
+
+        Args:
+            metric: Metric name
+            resolution: "minute", "hour" or "day"
+            since: Start time (Unix seconds), default the whole ring
+            until: End time (Unix seconds), default now
+
+        Returns:
+            Lists keyed by t (interval start), count, mean, min and max, or
+            None if nothing was recorded for metric
+        """
+        step, slots = RESOLUTIONS[resolution]
+        until = time.time() if until is None else until
+        since = until - step * slots if since is None else since
+        with self._lock:
+            rings = self._series.get(metric)
+            if rings is None:
+                return None
+            return rings[resolution].query(since, until)
+
+    def save(self, path: Optional[str] = None):
+        """Write every ring to an .npz file, replacing it atomically."""
+        path = path or self._path
+        arrays = {}
+        with self._lock:
+            for metric, rings in self._series.items():
+                for resolution, ring in rings.items():
+                    for field in _FIELDS:
+                        arrays[f"{metric}|{resolution}|{field}"] = getattr(ring, field).copy()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+
+    def load(self, path: str):
+        """Restore rings saved by save(). Rings whose shape changed are skipped."""
+        try:
+            data = np.load(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load time series from %s: %s", path, e)
+            return
+        with data, self._lock:
+            for key in data.files:
+                metric, resolution, field = key.split("|")
+                if resolution not in RESOLUTIONS or field not in _FIELDS:
+                    continue
+                ring = self._rings(metric)[resolution]
+                values = data[key]
+                if values.shape == getattr(ring, field).shape:
+                    setattr(ring, field, values)
+
+    def start(self):
+        """Save to the store's path every save_interval seconds until close()."""
+        if not self._path or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._autosave, name="timeseries-save", daemon=True)
+        self._thread.start()
+
+    def _autosave(self):
+        while not self._stop.wait(self._save_interval):
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning("Could not save time series to %s: %s", self._path, e)
+
+    def close(self):
+        """Stop autosaving and write a final copy."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._path:
+            self.save()
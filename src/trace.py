@@ -0,0 +1,180 @@
+# src/trace.py
+"""Compact binary timing traces of dictation takes.
+
+A trace records when things happened during one take: hotkey press and
+release, each audio block from the microphone, the transcription request,
+each formatted token and each burst of typing. Only times and sizes are kept,
+never audio or text, so traces are safe to collect and share. A record is
+9 bytes, so a typical take is well under 10 KB.
+
+File layout (little-endian): a header with magic "WDT1", format version,
+wall-clock start time, take id, format mode, experiment variant and the
+length of the take's parameters, then the parameters as JSON (so a replay
+runs with the same settings), then fixed-size records of (event kind,
+microseconds since press, value).
+"""
+import json
+import os
+import struct
+import threading
+import time
+from typing import NamedTuple, Optional
+
+MAGIC = b"WDT1"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHd12s16s16sH")
+_RECORD = struct.Struct("<BII")
+
+# Event kinds and what their value holds
+PRESS = 1  # -
+RELEASE = 2  # Samples recorded
+AUDIO_BLOCK = 3  # Frames in the block
+TRANSCRIBE_START = 4  # Samples sent
+TRANSCRIBE_END = 5  # Characters transcribed
+FORMAT_START = 6  # Words to format
+TOKEN = 7  # Characters in the token
+FORMAT_END = 8  # Characters formatted
+TYPE_START = 9  # Characters to type
+TYPE_END = 10  # Characters typed
+DONE = 11  # -
+
+EVENT_NAMES = {
+    PRESS: "press",
+    RELEASE: "release",
+    AUDIO_BLOCK: "audio_block",
+    TRANSCRIBE_START: "transcribe_start",
+    TRANSCRIBE_END: "transcribe_end",
+    FORMAT_START: "format_start",
+    TOKEN: "token",
+    FORMAT_END: "format_end",
+    TYPE_START: "type_start",
+    TYPE_END: "type_end",
+    DONE: "done",
+}
+
+
+class Event(NamedTuple):
+    kind: int
+    t: float  # Seconds since the hotkey press
+    value: int
+
+    @property
+    def name(self) -> str:
+        return EVENT_NAMES.get(self.kind, str(self.kind))
+
+
+class TakeTrace:
+    """Timing events of one take, recorded from any thread."""
+
+    def __init__(self, take_id: str = "", mode: str = "", started_at: Optional[float] = None):
+        self.take_id = take_id
+        self.mode = mode
+        self.variant = ""  # Experiment variant of the take, if any
+        self.params: dict = {}  # Runtime parameters the take ran with
+        self.started_at = time.time() if started_at is None else started_at  # Wall clock, for file names
+        self._t0 = time.perf_counter()
+        self._events: list[Event] = []
+        self._lock = threading.Lock()
+
+    def event(self, kind: int, value: int = 0):
+        """Record that something happened now."""
+        t = time.perf_counter() - self._t0
+        with self._lock:
+            self._events.append(Event(kind, t, int(value)))
+
+    @property
+    def events(self) -> list[Event]:
+        with self._lock:
+            return sorted(self._events, key=lambda e: e.t)
+
+    def first(self, kind: int) -> Optional[Event]:
+        return next((e for e in self.events if e.kind == kind), None)
+
+    def last(self, kind: int) -> Optional[Event]:
+        return next((e for e in reversed(self.events) if e.kind == kind), None)
+
+    def scaled(self, factor: float) -> "TakeTrace":
+        """Copy with every event time multiplied by factor."""
+        trace = TakeTrace(self.take_id, self.mode, self.started_at)
+        trace.variant, trace.params = self.variant, dict(self.params)
+        trace._events = [Event(e.kind, e.t * factor, e.value) for e in self.events]
+        return trace
+
+    def summary(self) -> dict:
+        """Milestones of the take in milliseconds after the hotkey release."""
+        release = self.first(RELEASE)
+        if release is None:
+            return {}
+
+        def after_release(event: Optional[Event]) -> Optional[float]:
+            return round((event.t - release.t) * 1000, 1) if event is not None else None
+
+        return {
+            "held_ms": round(release.t * 1000, 1),
+            "transcribe_start_ms": after_release(self.first(TRANSCRIBE_START)),
+            "transcribe_end_ms": after_release(self.first(TRANSCRIBE_END)),
+            "first_token_ms": after_release(self.first(TOKEN)),
+            "format_end_ms": after_release(self.first(FORMAT_END)),
+            "last_keystroke_ms": after_release(self.last(TYPE_END)),
+            "done_ms": after_release(self.first(DONE)),
+        }
+
+    def to_bytes(self) -> bytes:
+        params = json.dumps(self.params, separators=(",", ":")).encode() if self.params else b""
+        header = _HEADER.pack(
+            MAGIC, VERSION, self.started_at, self.take_id.encode()[:12], self.mode.encode()[:16],
+            self.variant.encode()[:16], len(params),
+        ) + params
+        records = b"".join(
+            _RECORD.pack(e.kind, min(int(e.t * 1e6), 0xFFFFFFFF), min(max(e.value, 0), 0xFFFFFFFF))
+            for e in self.events
+        )
+        return header + records
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TakeTrace":
+        if len(data) < _HEADER.size:
+            raise ValueError("Trace is truncated")
+        magic, version, started_at, take_id, mode, variant, params_size = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a take trace")
+        start = _HEADER.size + params_size
+        if len(data) < start:
+            raise ValueError("Trace is truncated")
+        trace = cls(take_id.rstrip(b"\0").decode(), mode.rstrip(b"\0").decode(), started_at)
+        trace.variant = variant.rstrip(b"\0").decode()
+        trace.params = json.loads(data[_HEADER.size:start]) if params_size else {}
+
+        # A torn final record (crash mid-write) is dropped
+        end = start + (len(data) - start) // _RECORD.size * _RECORD.size
+        trace._events = [
+            Event(kind, t_us / 1e6, value)
+            for kind, t_us, value in _RECORD.iter_unpack(data[start:end])
+        ]
+        return trace
+
+    def save(self, directory: str) -> str:
+        """Write the trace as <local start time>-<take id>.trace and return the path."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        path = os.path.join(directory, f"{stamp}-{self.take_id or 'take'}.trace")
+        with open(path + ".tmp", "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(path + ".tmp", path)  # Readers never see a half-written trace
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "TakeTrace":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def prune(directory: str, keep: int):
+    """Delete all but the newest keep traces in directory."""
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".trace"))
+    for name in names[:max(len(names) - keep, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
@@ -3,24 +3,37 @@
 import io
 import numpy as np
 from openai import OpenAI
+from typing import Optional
 import wave
+from src.config import RuntimeConfig, TakeParams
+from src.ratelimit import RateLimitScheduler
 
 
 class WhisperTranscriber:
     """Transcribes audio using OpenAI Whisper API."""
 
     SAMPLE_RATE = 16000
+    MODEL = "whisper-1"
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        scheduler: Optional[RateLimitScheduler] = None,
+        config: Optional[RuntimeConfig] = None,
+    ):
         if not api_key:
             raise ValueError("API key is required")
-        self._client = OpenAI(api_key=api_key)
+        # With a scheduler, it owns retries (including 429s)
+        self._client = OpenAI(api_key=api_key, max_retries=0) if scheduler else OpenAI(api_key=api_key)
+        self._scheduler = scheduler
+        self._config = config
 
-    def transcribe(self, audio: np.ndarray) -> str:
+    def transcribe(self, audio: np.ndarray, params: Optional[TakeParams] = None) -> str:
         """Transcribe audio data to text.
 
         Args:
             audio: Float32 numpy array of audio samples at 16kHz
+            params: Parameters of the take, defaults to the runtime config if any
 
         Returns:
             Transcribed text string
@@ -36,14 +49,55 @@ class WhisperTranscriber:
             wav.setframerate(self.SAMPLE_RATE)
             wav.writeframes(audio_int16.tobytes())
 
-        buffer.seek(0)
         buffer.name = "audio.wav"
 
         # Send to Whisper API
-        response = self._client.audio.transcriptions.create(
-            model="whisper-1",
-            file=buffer,
-            response_format="text",
-        )
+        if params is None and self._config is not None:
+            params = self._config.take()
+        model = params["transcribe_model"] if params else self.MODEL
+        duration = len(audio) / self.SAMPLE_RATE
+
+        def request(create):
+            buffer.seek(0)
+            return create(model=model, file=buffer, response_format="text")
+
+        response = self._create(request, model, size=duration)
+        if params is not None:
+            params.charge(model, audio_seconds=duration)
 
         return response.strip() if isinstance(response, str) else response.text.strip()
+
+    def transcribe_file(self, path: str) -> tuple[str, float]:
+        """Transcribe an audio file as-is (mp3, m4a, wav, ...).
+
+        Args:
+            path: Path to an audio file in a format Whisper accepts
+
+        Returns:
+            (transcribed text, audio duration in seconds)
+        """
+        model = self._config["transcribe_model"] if self._config is not None else self.MODEL
+        with open(path, "rb") as f:
+            def request(create):
+                f.seek(0)
+                return create(model=model, file=f, response_format="verbose_json")
+
+            response = self._create(request, model, size=float("inf"))
+        return response.text.strip(), float(response.duration or 0.0)
+
+    def _create(self, request, model: str, size: float):
+        """Send a transcription request, through the scheduler if there is one.
+
+        Args:
+            request: Called with the create function to use; must rewind its file
+            model: Model the request uses, for per-model rate limits
+            size: Audio seconds, so short dictations are scheduled first
+        """
+        transcriptions = self._client.audio.transcriptions
+        if self._scheduler is None:
+            return request(transcriptions.create)
+        return self._scheduler.call(
+            model,
+            lambda: request(transcriptions.with_raw_response.create),
+            size=size,
+        )
@@ -4,9 +4,18 @@ const historyList = document.getElementById('history-list');
 const modeSingleBtn = document.getElementById('mode-single');
 const modeDocumentBtn = document.getElementById('mode-document');
 const modeHint = document.getElementById('mode-hint');
+const metricSelect = document.getElementById('metric-select');
+const metricChart = document.getElementById('metric-chart');
+const metricSummary = document.getElementById('metric-summary');
+const resolutionBtns = document.querySelectorAll('[data-resolution]');
+const configTable = document.getElementById('config-table');
+const experimentTable = document.getElementById('experiment-table');
+const experimentVariants = document.getElementById('experiment-variants');
+const configError = document.getElementById('config-error');
 
 let ws;
 let currentMode = 'single-line';
+let currentResolution = 'minute';
 
 function connect() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
@@ -85,6 +94,168 @@ function formatTime(isoString) {
     return date.toLocaleTimeString();
 }
 
+async function loadMetric() {
+    const metric = metricSelect.value;
+    try {
+        const response = await fetch(`/api/timeseries?metric=${metric}&resolution=${currentResolution}`);
+        if (response.status === 404) {
+            drawChart(null);
+            metricSummary.textContent = 'No data yet';
+            return;
+        }
+        const data = await response.json();
+        drawChart(data.series[metric], data.step);
+    } catch (err) {
+        console.error('Failed to load metrics:', err);
+    }
+}
+
+function drawChart(series, step) {
+    const ctx = metricChart.getContext('2d');
+    const width = metricChart.width;
+    const height = metricChart.height;
+    ctx.clearRect(0, 0, width, height);
+    if (!series || series.t.length === 0) {
+        return;
+    }
+
+    // X axis spans the ring; Y axis from 0 to the highest max
+    const end = Date.now() / 1000;
+    const start = Math.min(series.t[0], end - step * 60);
+    const top = Math.max(...series.max) || 1;
+    const x = t => (t - start) / (end - start) * width;
+    const y = v => height - 4 - v / top * (height - 8);
+
+    // Min-max band
+    ctx.fillStyle = 'rgba(233, 69, 96, 0.2)';
+    series.t.forEach((t, i) => {
+        ctx.fillRect(x(t), y(series.max[i]), Math.max(1, step / (end - start) * width), y(series.min[i]) - y(series.max[i]) + 1);
+    });
+
+    // Mean line
+    ctx.strokeStyle = '#e94560';
+    ctx.lineWidth = 2;
+    ctx.beginPath();
+    series.t.forEach((t, i) => {
+        const px = x(t + step / 2);
+        const py = y(series.mean[i]);
+        if (i === 0) {
+            ctx.moveTo(px, py);
+        } else {
+            ctx.lineTo(px, py);
+        }
+    });
+    ctx.stroke();
+
+    const last = series.t.length - 1;
+    const count = series.count.reduce((a, b) => a + b, 0);
+    metricSummary.textContent =
+        `Latest: ${formatValue(series.mean[last])} (max ${formatValue(top)}) - ${count} samples`;
+}
+
+function formatValue(value) {
+    return value >= 100 ? value.toFixed(0) : value.toFixed(2);
+}
+
+function setResolution(resolution) {
+    currentResolution = resolution;
+    resolutionBtns.forEach(btn => btn.classList.toggle('active', btn.dataset.resolution === resolution));
+    loadMetric();
+}
+
+async function loadConfig() {
+    try {
+        const response = await fetch('/api/config');
+        if (!response.ok) {
+            return;
+        }
+        const data = await response.json();
+        // Don't redraw the inputs while one is being edited
+        if (!configTable.contains(document.activeElement)) {
+            renderParams(data.params);
+        }
+        renderExperiment(data.experiment);
+    } catch (err) {
+        console.error('Failed to load config:', err);
+    }
+}
+
+function renderParams(params) {
+    configTable.innerHTML = params.map(param => `
+        <tr title="${escapeHtml(param.description)}">
+            <td>${escapeHtml(param.name)}</td>
+            <td><input data-param="${escapeHtml(param.name)}" value="${escapeHtml(String(param.value))}"
+                       type="${param.type === 'str' ? 'text' : 'number'}"></td>
+        </tr>
+    `).join('');
+    configTable.querySelectorAll('input').forEach(input => {
+        input.addEventListener('change', () => postConfig('/api/config', { [input.dataset.param]: input.value }));
+    });
+}
+
+function renderExperiment(experiment) {
+    if (!experiment) {
+        experimentTable.innerHTML = '';
+        return;
+    }
+    const rows = Object.entries(experiment.variants).map(([name, result]) => `
+        <tr>
+            <td>${escapeHtml(name)}</td>
+            <td>${result.takes}</td>
+            <td>${formatMetric(result.latency_p50_ms, result.delta.latency_p50_ms, 0)}</td>
+            <td>${formatMetric(result.api_calls_per_take, result.delta.api_calls_per_take, 2)}</td>
+            <td>${formatMetric(result.cost_per_take === null ? null : result.cost_per_take * 1000,
+                               result.delta.cost_per_take === null ? null : result.delta.cost_per_take * 1000, 3)}</td>
+        </tr>
+    `).join('');
+    experimentTable.innerHTML = `
+        <tr><th>Variant${experiment.running ? ' (running)' : ''}</th><th>Takes</th>
+            <th>p50 ms</th><th>Calls/take</th><th>$/1000 takes</th></tr>
+        ${rows}
+    `;
+}
+
+function formatMetric(value, delta, digits) {
+    if (value === null) {
+        return '-';
+    }
+    // Lower is better for every metric shown
+    if (!delta) {
+        return value.toFixed(digits);
+    }
+    const cls = delta < 0 ? 'delta-better' : 'delta-worse';
+    const sign = delta > 0 ? '+' : '';
+    return `${value.toFixed(digits)} <span class="${cls}">(${sign}${delta.toFixed(digits)})</span>`;
+}
+
+async function postConfig(url, body, method = 'POST') {
+    configError.textContent = '';
+    try {
+        const response = await fetch(url, {
+            method,
+            headers: { 'Content-Type': 'application/json' },
+            body: body === undefined ? undefined : JSON.stringify(body),
+        });
+        if (!response.ok) {
+            configError.textContent = (await response.json()).error;
+        }
+    } catch (err) {
+        configError.textContent = 'Request failed';
+    }
+    loadConfig();
+}
+
+function startExperiment() {
+    let variants;
+    try {
+        variants = JSON.parse(experimentVariants.value);
+    } catch (err) {
+        configError.textContent = 'Variants must be JSON';
+        return;
+    }
+    postConfig('/api/config/experiment', { variants });
+}
+
 // Mode toggle click handlers
 modeSingleBtn.addEventListener('click', () => setMode('single-line'));
 modeDocumentBtn.addEventListener('click', () => setMode('document'));
@@ -92,4 +263,16 @@ modeDocumentBtn.addEventListener('click', () => setMode('document'));
 // Set initial mode UI state
 updateModeUI(currentMode);
 
+// Latency chart
+metricSelect.addEventListener('change', loadMetric);
+resolutionBtns.forEach(btn => btn.addEventListener('click', () => setResolution(btn.dataset.resolution)));
+loadMetric();
+setInterval(loadMetric, 60000);
+
+// Tuning and experiments
+document.getElementById('experiment-start').addEventListener('click', startExperiment);
+document.getElementById('experiment-stop').addEventListener('click', () => postConfig('/api/config/experiment', undefined, 'DELETE'));
+loadConfig();
+setInterval(loadConfig, 10000);
+
 connect();
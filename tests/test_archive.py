@@ -0,0 +1,55 @@
+# tests/test_archive.py
+import numpy as np
+from src.archive import AudioArchive, decode_audio, encode_audio
+
+
+def _tone(seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(16000 * seconds), dtype=np.float32) / 16000
+    return (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def test_encode_round_trips_within_quantization():
+    audio = _tone()
+    decoded = decode_audio(encode_audio(audio), len(audio))
+    assert decoded.dtype == np.float32
+    assert np.max(np.abs(decoded - audio)) < 1e-4
+
+
+def test_encode_compresses_speech_like_audio():
+    audio = _tone()
+    assert len(encode_audio(audio)) < audio.size * 2
+
+
+def test_archive_stores_and_returns_takes(tmp_path):
+    archive = AudioArchive(str(tmp_path))
+    audio = _tone(0.5)
+    archive.put("take-1", audio)
+
+    assert "take-1" in archive
+    assert np.allclose(archive.get("take-1"), audio, atol=1e-4)
+    assert archive.get("missing") is None
+    archive.close()
+
+
+def test_archive_rebuilds_index_on_reopen(tmp_path):
+    archive = AudioArchive(str(tmp_path))
+    archive.put("a", _tone(0.2))
+    archive.put("b", _tone(0.3))
+    archive.close()
+
+    reopened = AudioArchive(str(tmp_path))
+    assert len(reopened) == 2
+    assert len(reopened.get("b")) == int(16000 * 0.3)
+    reopened.close()
+
+
+def test_archive_evicts_oldest_segments(tmp_path):
+    noise = np.random.default_rng(0).uniform(-1, 1, 16000).astype(np.float32)
+    archive = AudioArchive(str(tmp_path), max_bytes=60_000, segment_bytes=20_000)
+    for i in range(10):
+        archive.put(f"take-{i}", noise)
+
+    assert archive.total_bytes <= 60_000 or len(archive._segments) == 1
+    assert "take-0" not in archive
+    assert "take-9" in archive
+    archive.close()
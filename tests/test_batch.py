@@ -0,0 +1,143 @@
+# tests/test_batch.py
+import json
+import wave
+import numpy as np
+from unittest.mock import patch
+from src import batch
+from src.archive import to_wav_bytes
+
+
+def _write_wav(path, seconds: float):
+    path.write_bytes(to_wav_bytes(np.zeros(int(16000 * seconds), dtype=np.float32)))
+    return str(path)
+
+
+def _transcribe_file(path):
+    with wave.open(path, "rb") as f:
+        frames = f.getnframes()
+    return f"{frames} samples", frames / f.getframerate()
+
+
+def _run(files, output, **kwargs):
+    with patch("src.batch.WhisperTranscriber") as mock_transcriber_class, \
+         patch("src.batch.TextFormatter") as mock_formatter_class:
+        mock_transcriber_class.return_value.transcribe.side_effect = lambda audio: f"{len(audio)} samples"
+        mock_transcriber_class.return_value.transcribe_file.side_effect = _transcribe_file
+        mock_formatter_class.return_value.get_mode.return_value = "document"
+        mock_formatter_class.return_value.format.side_effect = lambda raw: raw.capitalize() + "."
+        summary = batch.run(files, output=output, api_key="test-key", workers=2, **kwargs)
+    return summary, mock_transcriber_class.return_value
+
+
+def test_find_audio_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    wav = _write_wav(tmp_path / "a.wav", 0.1)
+    mp3 = tmp_path / "sub" / "b.MP3"
+    mp3.write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("skip me")
+
+    assert batch.find_audio_files([str(tmp_path)]) == [wav, str(mp3)]
+
+
+def test_run_writes_jsonl_and_reports_speed(tmp_path):
+    files = [_write_wav(tmp_path / f"{i}.wav", 1.5) for i in range(3)]
+    output = str(tmp_path / "out.jsonl")
+
+    summary, transcriber = _run(files, output)
+
+    transcriber.transcribe.assert_not_called()  # Under the upload limit: sent whole
+    records = [json.loads(line) for line in open(output)]
+    assert sorted(r["path"] for r in records) == files
+    assert all(r["status"] == "ok" and r["duration"] == 1.5 for r in records)
+    assert records[0]["text"] == "24000 samples."
+    assert summary["ok"] == 3
+    assert abs(summary["audio_minutes"] - 4.5 / 60) < 1e-9
+    assert summary["speed"] > 0
+
+
+def test_run_resumes_from_checkpoint(tmp_path):
+    files = [_write_wav(tmp_path / f"{i}.wav", 0.5) for i in range(2)]
+    output = str(tmp_path / "out.jsonl")
+    _run(files[:1], output)
+    with open(output, "a") as f:
+        f.write('{"path": "torn')  # Interrupted mid-write
+
+    summary, transcriber = _run(files, output)
+
+    assert summary["skipped"] == 1
+    assert summary["ok"] == 1
+    assert transcriber.transcribe_file.call_count == 1
+
+
+def test_run_splits_long_recordings(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "CHUNK_SECONDS", 1)
+    monkeypatch.setattr(batch, "MAX_UPLOAD_BYTES", 1000)
+    files = [_write_wav(tmp_path / "long.wav", 2.5)]
+    output = str(tmp_path / "out.jsonl")
+
+    _, transcriber = _run(files, output)
+
+    assert transcriber.transcribe.call_count == 3
+    record = json.loads(open(output).readline())
+    assert record["text"] == "16000 samples. 16000 samples. 8000 samples."
+
+
+def test_run_sends_other_wav_encodings_whole(tmp_path):
+    wav = tmp_path / "24bit.wav"
+    with wave.open(str(wav), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(3)
+        f.setframerate(48000)
+        f.writeframes(bytes(3 * 4800))
+    output = str(tmp_path / "out.jsonl")
+
+    with patch("src.batch.WhisperTranscriber") as mock_transcriber_class, \
+         patch("src.batch.TextFormatter") as mock_formatter_class:
+        mock_transcriber_class.return_value.transcribe_file.return_value = ("hello", 0.1)
+        mock_formatter_class.return_value.format.side_effect = lambda raw: raw.capitalize() + "."
+        batch.run([str(wav)], output=output, api_key="test-key", workers=1)
+
+    record = json.loads(open(output).readline())
+    assert record["status"] == "ok"
+    assert record["text"] == "Hello."
+
+
+def test_run_rejects_oversized_uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "MAX_UPLOAD_BYTES", 10)
+    memo = tmp_path / "memo.m4a"
+    memo.write_bytes(bytes(100))
+    output = str(tmp_path / "out.jsonl")
+
+    _, transcriber = _run([str(memo)], output)
+
+    record = json.loads(open(output).readline())
+    assert record["status"] == "error"
+    assert "upload limit" in record["error"]
+    transcriber.transcribe_file.assert_not_called()
+
+
+def test_run_records_errors(tmp_path):
+    broken = tmp_path / "broken.wav"
+    broken.write_bytes(b"not a wav")
+    output = str(tmp_path / "out.jsonl")
+
+    summary, _ = _run([str(broken)], output)
+
+    record = json.loads(open(output).readline())
+    assert record["status"] == "error"
+    assert summary["errors"] == 1
+    assert batch.load_checkpoint(output) == set()
+
+
+def test_run_records_files_removed_after_listing(tmp_path):
+    files = [_write_wav(tmp_path / f"{i}.wav", 0.5) for i in range(2)]
+    output = str(tmp_path / "out.jsonl")
+    (tmp_path / "0.wav").unlink()
+
+    summary, _ = _run(files, output)
+
+    records = {r["path"]: r for r in map(json.loads, open(output))}
+    assert records[files[0]]["status"] == "error"
+    assert "FileNotFoundError" in records[files[0]]["error"]
+    assert records[files[1]]["status"] == "ok"
+    assert summary["ok"] == 1 and summary["errors"] == 1
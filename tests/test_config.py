@@ -0,0 +1,86 @@
+# tests/test_config.py
+import pytest
+from src.config import RuntimeConfig, TakeParams
+
+
+def test_update_validates_and_coerces():
+    config = RuntimeConfig()
+    assert config.update({"short_text_threshold": "20", "format_model": "gpt-4.1-nano"})["short_text_threshold"] == 20
+    assert config["format_model"] == "gpt-4.1-nano"
+
+    for bad in ({"short_text_threshold": -1}, {"max_tokens": 99999}, {"min_take_samples": 1.5},
+                {"short_text_threshold": True}, {"nope": 1}, {"min_take_samples": "many"}):
+        with pytest.raises(ValueError):
+            config.update(bad)
+
+
+def test_update_is_all_or_nothing():
+    config = RuntimeConfig()
+    with pytest.raises(ValueError):
+        config.update({"short_text_threshold": 30, "max_tokens": -5})
+    assert config["short_text_threshold"] == 15
+
+
+def test_take_reads_values_once():
+    config = RuntimeConfig()
+    take = config.take()
+    config.update({"min_take_samples": 8000})
+    assert take["min_take_samples"] == 1600
+    assert config.take()["min_take_samples"] == 8000
+
+
+def test_charge_counts_calls_and_cost():
+    take = TakeParams({})
+    take.charge("whisper-1", audio_seconds=60)
+    take.charge("gpt-4o-mini", input_tokens=1_000_000, output_tokens=1_000_000)
+    take.charge("unknown-model", input_tokens=1000)
+
+    assert take.api_calls == 3
+    assert take.cost == pytest.approx(0.006 + 0.15 + 0.60)
+
+
+def test_experiment_assigns_variants_and_reports_deltas():
+    config = RuntimeConfig(seed=1)
+    config.start_experiment({"control": {}, "skip-more": {"short_text_threshold": 40}})
+
+    seen = set()
+    for _ in range(40):
+        take = config.take()
+        seen.add(take.variant)
+        if take.variant == "control":
+            assert take["short_text_threshold"] == 15
+            take.charge("gpt-4o-mini", input_tokens=1000, output_tokens=500)
+            take.charge("whisper-1", audio_seconds=5)
+            config.record(take, 0.8)
+        else:
+            assert take["short_text_threshold"] == 40
+            take.charge("whisper-1", audio_seconds=5)
+            config.record(take, 0.3)
+    assert seen == {"control", "skip-more"}
+
+    result = config.experiment()
+    assert result["running"] and result["control"] == "control"
+    variant = result["variants"]["skip-more"]
+    assert variant["overrides"] == {"short_text_threshold": 40}
+    assert variant["delta"]["latency_p50_ms"] == pytest.approx(-500)
+    assert variant["delta"]["api_calls_per_take"] == pytest.approx(-1)
+    assert variant["delta"]["cost_per_take"] < 0
+    assert result["variants"]["control"]["delta"]["latency_p50_ms"] == 0
+
+
+def test_takes_from_replaced_or_stopped_experiments():
+    config = RuntimeConfig(seed=0)
+    config.start_experiment({"a": {}, "b": {"max_tokens": 100}})
+    old = config.take()
+    config.start_experiment({"a": {}, "c": {"max_tokens": 200}})
+    config.record(old, 1.0)  # Belongs to the replaced experiment
+    assert all(v["takes"] == 0 for v in config.experiment()["variants"].values())
+
+    config.stop_experiment()
+    assert config.take().variant is None
+    assert config.experiment()["running"] is False
+
+    with pytest.raises(ValueError):
+        config.start_experiment({"only": {}})
+    with pytest.raises(ValueError):
+        config.start_experiment({"a": {}, "b": {"max_tokens": -1}})
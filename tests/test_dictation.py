@@ -9,8 +9,8 @@ def test_service_records_on_hotkey_press():
     with patch("src.dictation.AudioRecorder") as mock_recorder_class, \
          patch("src.dictation.WhisperTranscriber"), \
          patch("src.dictation.TextFormatter"), \
-         patch("src.dictation.KeyboardTyper"), \
-         patch("src.dictation.HotkeyListener"):
+         patch("src.keyboard.KeyboardTyper"), \
+         patch("src.hotkey.HotkeyListener"):
 
         mock_recorder = Mock()
         mock_recorder_class.return_value = mock_recorder
@@ -25,8 +25,8 @@ def test_service_transcribes_and_formats_on_release():
     with patch("src.dictation.AudioRecorder") as mock_recorder_class, \
          patch("src.dictation.WhisperTranscriber") as mock_transcriber_class, \
          patch("src.dictation.TextFormatter") as mock_formatter_class, \
-         patch("src.dictation.KeyboardTyper") as mock_typer_class, \
-         patch("src.dictation.HotkeyListener"):
+         patch("src.keyboard.KeyboardTyper") as mock_typer_class, \
+         patch("src.hotkey.HotkeyListener"):
 
         mock_recorder = Mock()
         mock_recorder.stop.return_value = np.zeros(16000, dtype=np.float32)
@@ -54,3 +54,122 @@ def test_service_transcribes_and_formats_on_release():
         mock_transcriber.transcribe.assert_called_once()
         mock_formatter.format.assert_called_once_with("hello world how are you")
         mock_typer.type_text.assert_called_once_with("Hello, world! How are you?")
+
+
+def test_service_archives_take_even_if_pipeline_fails():
+    with patch("src.dictation.AudioRecorder") as mock_recorder_class, \
+         patch("src.dictation.WhisperTranscriber") as mock_transcriber_class, \
+         patch("src.dictation.TextFormatter"), \
+         patch("src.keyboard.KeyboardTyper"), \
+         patch("src.hotkey.HotkeyListener"):
+
+        audio = np.zeros(16000, dtype=np.float32)
+        mock_recorder_class.return_value.stop.return_value = audio
+        mock_transcriber_class.return_value.transcribe.side_effect = RuntimeError("API down")
+        archive = Mock()
+        statuses = []
+
+        service = DictationService(api_key="test-key", archive=archive, on_status_change=statuses.append)
+        with patch("threading.excepthook"):
+            service._on_hotkey_press()
+            service._on_hotkey_release()
+            time.sleep(0.1)
+
+        archive.put.assert_called_once()
+        assert archive.put.call_args.args[1] is audio
+        assert statuses[-1] == "idle"
+
+
+def test_service_retranscribes_archived_take():
+    with patch("src.dictation.AudioRecorder"), \
+         patch("src.dictation.WhisperTranscriber") as mock_transcriber_class, \
+         patch("src.dictation.TextFormatter") as mock_formatter_class, \
+         patch("src.keyboard.KeyboardTyper") as mock_typer_class, \
+         patch("src.hotkey.HotkeyListener"):
+
+        mock_transcriber_class.return_value.transcribe.return_value = "hello again"
+        mock_formatter_class.return_value.format.return_value = "Hello again."
+        archive = Mock()
+        archive.get.return_value = np.zeros(16000, dtype=np.float32)
+
+        service = DictationService(api_key="test-key", archive=archive)
+
+        assert service.retranscribe("abc") == ("hello again", "Hello again.")
+        archive.get.assert_called_once_with("abc")
+        mock_typer_class.return_value.type_text.assert_not_called()
+
+        archive.get.return_value = None
+        assert service.retranscribe("missing") is None
+
+
+def test_service_uses_mode_of_hotkey_for_take():
+    with patch("src.dictation.AudioRecorder") as mock_recorder_class, \
+         patch("src.dictation.WhisperTranscriber") as mock_transcriber_class, \
+         patch("src.dictation.TextFormatter") as mock_formatter_class, \
+         patch("src.keyboard.KeyboardTyper"), \
+         patch("src.hotkey.HotkeyListener") as mock_listener_class:
+
+        mock_recorder_class.return_value.stop.return_value = np.zeros(16000, dtype=np.float32)
+        mock_transcriber_class.return_value.transcribe.return_value = "dear team"
+        mock_formatter = mock_formatter_class.return_value
+        mock_formatter.format.return_value = "Dear team,"
+
+        service = DictationService(api_key="test-key", mode_hotkeys={"document": "ctrl+alt+d"})
+        bindings = mock_listener_class.call_args.kwargs["bindings"]
+        on_press, on_release = bindings["ctrl+alt+d"]
+
+        on_press()
+        service._on_hotkey_press()  # Ignored - take already in progress
+        on_release()
+        time.sleep(0.1)
+
+        mock_recorder_class.return_value.start.assert_called_once()
+        assert mock_formatter.format.call_args.kwargs["mode"] == "document"
+
+
+def test_service_saves_profile_of_slow_take(tmp_path):
+    with patch("src.dictation.AudioRecorder") as mock_recorder_class, \
+         patch("src.dictation.WhisperTranscriber") as mock_transcriber_class, \
+         patch("src.dictation.TextFormatter") as mock_formatter_class, \
+         patch("src.keyboard.KeyboardTyper"), \
+         patch("src.hotkey.HotkeyListener"):
+
+        mock_recorder_class.return_value.stop.return_value = np.zeros(16000, dtype=np.float32)
+        mock_transcriber_class.return_value.transcribe.side_effect = lambda audio, **kwargs: (time.sleep(0.05), "slow")[1]
+        mock_formatter_class.return_value.format.return_value = "Slow."
+
+        service = DictationService(api_key="test-key", slow_take_ms=20, profile_dir=str(tmp_path))
+        service._on_hotkey_press()
+        service._on_hotkey_release()
+        time.sleep(0.3)
+
+        saved = sorted(p.name for p in tmp_path.iterdir())
+        assert len(saved) == 2
+        assert saved[0].endswith(".speedscope.json")
+        assert saved[1].endswith(".txt")
+
+
+def test_service_minimum_take_length_is_live_config():
+    with patch("src.dictation.AudioRecorder") as mock_recorder_class, \
+         patch("src.dictation.WhisperTranscriber") as mock_transcriber_class, \
+         patch("src.dictation.TextFormatter"), \
+         patch("src.keyboard.KeyboardTyper"), \
+         patch("src.hotkey.HotkeyListener"):
+
+        mock_recorder_class.return_value.stop.return_value = np.zeros(4000, dtype=np.float32)
+        mock_transcriber = mock_transcriber_class.return_value
+        mock_transcriber.transcribe.return_value = ""
+
+        service = DictationService(api_key="test-key")
+        service.config.update({"min_take_samples": 8000})
+        service._on_hotkey_press()
+        service._on_hotkey_release()
+        time.sleep(0.1)
+        mock_transcriber.transcribe.assert_not_called()
+
+        service.config.update({"min_take_samples": 1600})
+        service._on_hotkey_press()
+        service._on_hotkey_release()
+        time.sleep(0.1)
+        mock_transcriber.transcribe.assert_called_once()
+        assert mock_transcriber.transcribe.call_args.kwargs["params"]["min_take_samples"] == 1600
@@ -1,7 +1,10 @@
 # tests/test_formatter.py
 import pytest
 from unittest.mock import Mock, patch
+from src.config import RuntimeConfig
 from src.formatter import TextFormatter
+from src.routing import ModelRouter, Route
+from src.timeseries import TimeSeriesStore
 
 
 def test_formatter_requires_api_key():
@@ -29,3 +32,84 @@ def test_formatter_handles_empty_text():
         formatter = TextFormatter(api_key="test-key")
         result = formatter.format("")
         assert result == ""
+
+
+def test_formatter_streams_single_line_across_token_boundaries():
+    with patch("src.formatter.OpenAI") as mock_openai:
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        tokens = ["First point.\r", "\nSecond point ", " with a", " long", "\n", "tail ", "of words."]
+        mock_client.chat.completions.create.return_value = [
+            Mock(choices=[Mock(delta=Mock(content=token))]) for token in tokens
+        ]
+
+        formatter = TextFormatter(api_key="test-key", mode="single-line")
+        typed = []
+        raw = "first point second point with a long tail of words that goes on and on and on"
+        result = formatter.format(raw, on_token=typed.append)
+
+        assert result == "First point. Second point with a long tail of words."
+        assert "".join(typed) == result
+
+
+def test_formatter_uses_router_decision():
+    with patch("src.formatter.OpenAI") as mock_openai:
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="Formatted."), finish_reason="stop")]
+        mock_client.chat.completions.create.return_value = mock_response
+
+        router = ModelRouter([Route("only", "model-x", prompt="compact", temperature=0.0)])
+        formatter = TextFormatter(api_key="test-key", mode="document", router=router)
+        formatter.format("word " * 40)
+
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert kwargs["model"] == "model-x"
+        assert kwargs["temperature"] == 0.0
+        assert kwargs["max_tokens"] == 107
+        assert kwargs["messages"][0]["content"] == TextFormatter.DOCUMENT_COMPACT_PROMPT
+        stats = router.stats()
+        assert stats["routes"]["only"]["calls"] == 1
+        assert stats["routes"]["only"]["ttft_p50"] is None  # Not streamed: no first token
+        assert stats["recent_ttft"] is None
+
+
+def test_formatter_records_api_skip_rate():
+    with patch("src.formatter.OpenAI") as mock_openai:
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content="Formatted."), finish_reason="stop")]
+        )
+        metrics = TimeSeriesStore()
+        formatter = TextFormatter(api_key="test-key", metrics=metrics)
+
+        formatter.format("short one")
+        formatter.format("short two")
+        formatter.format(" ".join(["word"] * 20))
+
+        assert metrics.query("api_skipped", "day")["mean"] == [pytest.approx(2 / 3)]
+
+
+def test_formatter_applies_take_params():
+    with patch("src.formatter.OpenAI") as mock_openai:
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_client.chat.completions.create.return_value = Mock(
+            choices=[Mock(message=Mock(content="Formatted."), finish_reason="stop")]
+        )
+        config = RuntimeConfig()
+        formatter = TextFormatter(api_key="test-key", config=config)
+
+        config.update({"short_text_threshold": 3})
+        take = config.take()
+        assert formatter.format("four words right here", params=take) == "Formatted."
+        assert take.api_calls == 1 and take.cost > 0
+
+        config.update({"short_text_threshold": 10, "format_model": "gpt-4.1-nano", "max_tokens": 77})
+        assert formatter.format("four words right here") == "Four words right here."
+        formatter.format(" ".join(["word"] * 12))
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert kwargs["model"] == "gpt-4.1-nano"
+        assert kwargs["max_tokens"] == 77
@@ -1,7 +1,8 @@
 # tests/test_hotkey.py
+import pytest
 from unittest.mock import Mock
-from pynput.keyboard import Key
-from src.hotkey import HotkeyListener
+from pynput.keyboard import Key, KeyCode
+from src.hotkey import Chord, HotkeyListener, parse_hotkey
 
 
 def test_listener_calls_on_press_for_combo():
@@ -55,3 +56,115 @@ def test_listener_single_key_mode():
 
     listener._handle_release(Key.caps_lock)
     on_release.assert_called_once()
+
+
+def test_parse_hotkey_chords():
+    """Test parsing of modifier+key chords and single keys."""
+    assert parse_hotkey("ctrl+shift+d") == Chord(frozenset({"ctrl", "shift"}), KeyCode.from_char("d"))
+    assert parse_hotkey("ctrl_a") == Chord(frozenset({"ctrl"}), KeyCode.from_char("a"))
+    assert parse_hotkey("F13") == Chord(frozenset(), Key.f13)
+    assert parse_hotkey("win+space") == Chord(frozenset({"cmd"}), Key.space)
+
+    with pytest.raises(ValueError, match="Unknown key"):
+        parse_hotkey("ctrl+nokey")
+    with pytest.raises(ValueError, match="Unknown modifier"):
+        parse_hotkey("hyper+a")
+
+
+def test_listener_requires_all_modifiers():
+    """Test that a chord only fires with every modifier held."""
+    on_press = Mock()
+    listener = HotkeyListener(on_press=on_press, on_release=Mock(), hotkey="ctrl+shift+d")
+
+    listener._handle_press(Key.ctrl_r)
+    listener._handle_press(KeyCode.from_char("d"))
+    on_press.assert_not_called()
+
+    listener._handle_release(KeyCode.from_char("d"))
+    listener._handle_press(Key.shift_l)
+    listener._handle_press(KeyCode.from_char("D"))  # Shift upper-cases the char
+    on_press.assert_called_once()
+
+
+def test_listener_matches_control_characters():
+    """Test that Ctrl+A reported as '\\x01' still triggers."""
+    on_press = Mock()
+    listener = HotkeyListener(on_press=on_press, on_release=Mock(), hotkey="ctrl_a")
+
+    listener._handle_press(Key.ctrl_l)
+    listener._handle_press(KeyCode.from_char("\x01"))
+    on_press.assert_called_once()
+
+
+def test_listener_releases_on_modifier_release():
+    """Test that releasing a required modifier ends the chord."""
+    on_release = Mock()
+    listener = HotkeyListener(on_press=Mock(), on_release=on_release, hotkey="alt+r")
+
+    listener._handle_press(Key.alt_l)
+    listener._handle_press(KeyCode.from_char("r"))
+    listener._handle_release(Key.alt_l)
+    on_release.assert_called_once()
+
+    listener._handle_release(KeyCode.from_char("r"))
+    on_release.assert_called_once()
+
+
+def test_listener_tracks_left_and_right_modifiers_separately():
+    on_press = Mock()
+    on_release = Mock()
+    listener = HotkeyListener(on_press=on_press, on_release=on_release, hotkey="ctrl+d")
+
+    listener._handle_press(Key.ctrl_l)
+    listener._handle_press(Key.ctrl_r)
+    listener._handle_press(KeyCode.from_char("d"))
+    listener._handle_release(Key.ctrl_l)  # ctrl_r still holds Ctrl
+    on_release.assert_not_called()
+
+    listener._handle_release(Key.ctrl_r)
+    on_press.assert_called_once()
+    on_release.assert_called_once()
+
+
+def test_listener_multiple_bindings():
+    """Test that each binding fires its own callbacks."""
+    single, document = Mock(), Mock()
+    listener = HotkeyListener(
+        on_press=Mock(),
+        on_release=Mock(),
+        hotkey="caps_lock",
+        bindings={"ctrl+alt+s": (single, Mock()), "ctrl+alt+d": (document, Mock())},
+    )
+
+    listener._handle_press(Key.ctrl_l)
+    listener._handle_press(Key.alt_l)
+    listener._handle_press(KeyCode.from_char("d"))
+
+    document.assert_called_once()
+    single.assert_not_called()
+
+
+def test_listener_stress_thousands_of_events_per_second():
+    """Test correctness and throughput under a flood of synthetic key events."""
+    on_press = Mock()
+    on_release = Mock()
+    listener = HotkeyListener(on_press=on_press, on_release=on_release, hotkey="ctrl+shift+d")
+
+    noise = [KeyCode.from_char(c) for c in "abcefghijklmnopqrstuvwxyz"] + [Key.space, Key.enter]
+    events = []
+    for i in range(2000):
+        for key in noise[i % 7::7]:
+            events.append((True, key))
+            events.append((False, key))
+        if i % 10 == 0:
+            chord = [Key.ctrl_l, Key.shift_r, KeyCode.from_char("D")]
+            events += [(True, k) for k in chord] + [(False, k) for k in reversed(chord)]
+
+    for pressed, key in events:
+        if pressed:
+            listener._handle_press(key)
+        else:
+            listener._handle_release(key)
+
+    assert on_press.call_count == 200
+    assert on_release.call_count == 200
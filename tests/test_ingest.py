@@ -0,0 +1,125 @@
+# tests/test_ingest.py
+import threading
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from src.archive import to_wav_bytes
+from src.config import RuntimeConfig
+from src.ingest import FrameDecoder, IngestPool, decode_wav
+
+
+def test_decoder_handles_pcm_formats():
+    decoder = FrameDecoder("pcm_s16le")
+    decoder.feed(np.array([0, 16384], dtype="<i2").tobytes())
+    decoder.feed(np.array([-16384], dtype="<i2").tobytes())
+    assert np.allclose(decoder.finish(), [0.0, 0.5, -0.5])
+    assert len(decoder.finish()) == 0  # Reset after finish
+
+    decoder = FrameDecoder("pcm_f32le", sample_rate=8000)
+    decoder.feed(np.zeros(8000, dtype="<f4").tobytes())
+    assert len(decoder.finish()) == 16000  # Resampled to 16kHz
+
+
+def test_decoder_rejects_unknown_codec():
+    with pytest.raises(ValueError, match="Unsupported codec"):
+        FrameDecoder("mp3")
+    with pytest.raises(ValueError, match="Sample rate"):
+        FrameDecoder("pcm_s16le", sample_rate=0)
+
+
+def test_decoder_rejects_partial_samples():
+    decoder = FrameDecoder("pcm_s16le")
+    decoder.feed(np.zeros(4, dtype="<i2").tobytes())
+    with pytest.raises(ValueError, match="whole number"):
+        decoder.feed(b"\x00\x00\x00")
+    assert len(decoder.finish()) == 4  # Earlier frames are kept
+
+
+def test_decode_wav():
+    audio = decode_wav(to_wav_bytes(np.full(1600, 0.25, dtype=np.float32)))
+    assert len(audio) == 1600
+    assert np.allclose(audio, 0.25, atol=1e-3)
+
+
+def test_pool_runs_pipeline_and_streams_tokens():
+    transcriber = Mock()
+    transcriber.transcribe.return_value = "hello there"
+    formatter = Mock()
+    formatter.format.side_effect = lambda raw, on_token, mode, params: (on_token("Hello there."), "Hello there.")[1]
+
+    pool = IngestPool(transcriber, formatter, workers=2)
+    pool.start()
+    tokens, done = [], threading.Event()
+    results = []
+    pool.submit("a", np.zeros(1600), "document", tokens.append, lambda *r: (results.append(r), done.set()))
+    assert done.wait(2)
+    pool.stop()
+
+    assert tokens == ["Hello there."]
+    assert results == [("hello there", "Hello there.", None)]
+    assert formatter.format.call_args.kwargs["mode"] == "document"
+
+
+def test_pool_serves_clients_round_robin():
+    order = []
+    gate = threading.Event()
+    transcriber = Mock()
+    transcriber.transcribe.side_effect = lambda audio, params: (gate.wait(2), "")[1]
+
+    pool = IngestPool(transcriber, Mock(), workers=1)
+    finished = threading.Semaphore(0)
+    for client, n in [("busy", 0), ("busy", 1), ("busy", 2), ("quiet", 0)]:
+        pool.submit(client, np.zeros(1), "single-line", Mock(),
+                    lambda *r, c=client, n=n: (order.append((c, n)), finished.release()))
+    pool.start()
+    gate.set()
+    for _ in range(4):
+        assert finished.acquire(timeout=2)
+    pool.stop()
+
+    assert order == [("busy", 0), ("quiet", 0), ("busy", 1), ("busy", 2)]
+
+
+def test_pool_limits_pending_per_client():
+    pool = IngestPool(Mock(), Mock(), workers=1, max_pending_per_client=2)
+    assert pool.submit("a", np.zeros(1), "single-line", Mock(), Mock())
+    assert pool.submit("a", np.zeros(1), "single-line", Mock(), Mock())
+    assert not pool.submit("a", np.zeros(1), "single-line", Mock(), Mock())
+    assert pool.submit("b", np.zeros(1), "single-line", Mock(), Mock())
+    assert pool.pending() == 3
+
+
+def test_pool_reports_errors():
+    transcriber = Mock()
+    transcriber.transcribe.side_effect = RuntimeError("boom")
+    pool = IngestPool(transcriber, Mock(), workers=1)
+    pool.start()
+    done = threading.Event()
+    results = []
+    pool.submit("a", np.zeros(1), "single-line", Mock(), lambda *r: (results.append(r), done.set()))
+    assert done.wait(2)
+    pool.stop()
+    assert results == [("", "", "boom")]
+
+
+def test_pool_uses_one_variant_per_utterance():
+    config = RuntimeConfig(seed=1)
+    config.start_experiment({"control": {}, "fast": {"format_model": "gpt-4.1-nano"}})
+    transcriber = Mock()
+    transcriber.transcribe.return_value = "hello there"
+    formatter = Mock()
+    formatter.format.return_value = "Hello there."
+
+    pool = IngestPool(transcriber, formatter, workers=1, max_pending_per_client=20, config=config)
+    pool.start()
+    finished = threading.Semaphore(0)
+    for _ in range(20):
+        pool.submit("a", np.zeros(1600), "single-line", Mock(), lambda *r: finished.release())
+    for _ in range(20):
+        assert finished.acquire(timeout=2)
+    pool.stop()
+
+    for transcribe_call, format_call in zip(transcriber.transcribe.call_args_list, formatter.format.call_args_list):
+        assert transcribe_call.kwargs["params"] is format_call.kwargs["params"]
+    variants = config.experiment()["variants"]
+    assert variants["control"]["takes"] + variants["fast"]["takes"] == 20
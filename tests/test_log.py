@@ -0,0 +1,105 @@
+# tests/test_log.py
+import logging
+import logging.handlers
+import threading
+import pytest
+from src.log import Transcript, configure_logging, stop_logging
+
+TEST_LOGGERS = ("test.chatty", "test.env", "test.other")
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    """Put back the root logger and redaction as they were before each test."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    stop_logging()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+    for name in TEST_LOGGERS:
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    Transcript.redact = False
+
+
+class _Collector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+
+
+def _configure(**kwargs) -> _Collector:
+    collector = _Collector()
+    collector.setFormatter(logging.Formatter("%(name)s %(levelname)s %(message)s"))
+    configure_logging(handlers=[collector], **kwargs)
+    return collector
+
+
+def test_records_are_written_off_the_calling_thread():
+    collector = _configure(level="INFO", levels={})
+    logging.getLogger("test.log").info("hello %s", "world")
+    stop_logging()
+
+    assert collector.messages == ["test.log INFO hello world"]
+    assert threading.current_thread().name not in collector.threads
+
+
+def test_per_module_levels():
+    collector = _configure(level="WARNING", levels={"test.chatty": "DEBUG"})
+    logging.getLogger("test.chatty").debug("kept")
+    logging.getLogger("test.quiet").info("dropped")
+    stop_logging()
+
+    assert collector.messages == ["test.chatty DEBUG kept"]
+
+
+def test_transcript_redaction():
+    collector = _configure(level="DEBUG", levels={}, redact=True)
+    logging.getLogger("test.log").debug("Raw: %r", Transcript("secret words"))
+    stop_logging()
+
+    assert collector.messages == ["test.log DEBUG Raw: <12 chars redacted>"]
+    Transcript.redact = False
+    assert repr(Transcript("shown")) == "'shown'"
+
+
+def test_stop_restores_direct_handlers():
+    collector = _configure(level="INFO", levels={})
+    stop_logging()
+    logging.getLogger("test.log").info("after stop")
+
+    assert not any(isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger().handlers)
+    assert collector.messages == ["test.log INFO after stop"]
+    assert collector.threads == {threading.current_thread().name}
+
+
+def test_levels_from_environment(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "error")
+    monkeypatch.setenv("LOG_LEVELS", "test.env=INFO, test.other = DEBUG")
+    _configure()
+    stop_logging()
+
+    assert logging.getLogger().level == logging.ERROR
+    assert logging.getLogger("test.env").level == logging.INFO
+    assert logging.getLogger("test.other").level == logging.DEBUG
+
+
+def test_invalid_levels_fall_back_with_a_warning():
+    collector = _configure(level="LOUD", levels={"test.chatty": "VERBOSE", "test.other": "debug"})
+    logging.getLogger("test.chatty").info("kept at the root level")
+    stop_logging()
+
+    assert logging.getLogger().level == logging.INFO
+    assert logging.getLogger("test.chatty").level == logging.NOTSET
+    assert logging.getLogger("test.other").level == logging.DEBUG
+    assert "src.log WARNING Invalid LOG_LEVEL level 'LOUD'; using INFO" in collector.messages
+    assert "src.log WARNING Invalid LOG_LEVELS test.chatty level 'VERBOSE'; ignored" in collector.messages
+    assert "test.chatty INFO kept at the root level" in collector.messages
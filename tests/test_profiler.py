@@ -0,0 +1,55 @@
+# tests/test_profiler.py
+import threading
+import time
+from src.profiler import SamplingProfiler
+
+
+def _busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _profile_busy_thread() -> SamplingProfiler:
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start()
+    time.sleep(0.2)
+    profiler.stop()
+    stop.set()
+    worker.join()
+    return profiler
+
+
+def test_profiler_exports_speedscope_per_thread():
+    profiler = _profile_busy_thread()
+    profile = profiler.to_speedscope()
+
+    assert profiler.samples > 10
+    assert "speedscope.app" in profile["$schema"]
+    names = [p["name"] for p in profile["profiles"]]
+    assert "busy-worker" in names
+    assert "sampling-profiler" not in names
+
+    frames = profile["shared"]["frames"]
+    busy = profile["profiles"][names.index("busy-worker")]
+    assert len(busy["samples"]) == len(busy["weights"])
+    leaf_names = {frames[stack[-1]]["name"] for stack in busy["samples"]}
+    assert "_busy_loop" in leaf_names
+
+
+def test_profiler_pstats_summary():
+    summary = _profile_busy_thread().pstats_summary(limit=10)
+    assert "_busy_loop" in summary
+    assert "cumulative" in summary
+
+
+def test_profiler_without_samples():
+    profiler = SamplingProfiler()
+    assert profiler.pstats_summary() == "No samples collected."
+    assert profiler.to_speedscope()["profiles"] == []
+
+
+def test_profiler_clamps_interval():
+    assert SamplingProfiler(interval=0)._interval == SamplingProfiler.MIN_INTERVAL
@@ -0,0 +1,115 @@
+# tests/test_ratelimit.py
+import threading
+import time
+import numpy as np
+import pytest
+from src.formatter import TextFormatter
+from src.ratelimit import RateLimitScheduler, TokenBucket, parse_reset
+from src.standin import StandInAPI
+from src.transcribe import WhisperTranscriber
+
+
+def test_parse_reset_durations():
+    assert parse_reset("1s") == 1.0
+    assert parse_reset("6m0s") == 360.0
+    assert parse_reset("250ms") == 0.25
+    assert parse_reset("1h2m3.5s") == 3723.5
+    assert parse_reset("2") == 2.0
+    assert parse_reset(None) is None
+    assert parse_reset("soon") is None
+    assert parse_reset("nan") is None
+
+
+def test_token_bucket_refills_between_updates():
+    bucket = TokenBucket()
+    assert bucket.wait_time(100, 0.0) == 0.0  # Unknown budget never blocks
+
+    bucket.update(limit=60, remaining=0, reset=60.0, now=0.0)
+    assert bucket.wait_time(1, 0.0) == pytest.approx(1.0)
+    assert bucket.available(30.0) == pytest.approx(30)
+    bucket.take(10, 30.0)
+    assert bucket.available(30.0) == pytest.approx(20)
+
+
+def test_aimd_concurrency():
+    scheduler = RateLimitScheduler(max_concurrency=8, initial_concurrency=4)
+    scheduler._on_rate_limited("m", {"retry-after-ms": "10"}, 0)
+    assert scheduler.stats()["m"]["concurrency"] == 2
+    scheduler._on_rate_limited("m", {}, 0)  # Same burst - no second halving
+    assert scheduler.stats()["m"]["concurrency"] == 2
+
+    for _ in range(4):
+        scheduler._on_success("m", {})
+    assert 3 <= scheduler.stats()["m"]["concurrency"] < 4
+
+
+def test_malformed_retry_headers_use_default_backoff():
+    scheduler = RateLimitScheduler()
+    assert scheduler._on_rate_limited("m", {"retry-after-ms": "soon"}, 1) == 1.0
+    assert scheduler._on_rate_limited("m", {"retry-after-ms": "-5", "retry-after": "2"}, 1) == 2.0
+    assert scheduler._on_rate_limited("m", {"retry-after": "garbage", "x-ratelimit-reset-tokens": "nan"}, 2) == 2.0
+    scheduler._on_success("m", {"x-ratelimit-limit-requests": "lots", "x-ratelimit-remaining-requests": "1"})
+    assert scheduler.stats()["m"]["requests_available"] is None
+
+
+def test_short_jobs_are_admitted_first():
+    scheduler = RateLimitScheduler(max_concurrency=1)
+    order = []
+    hold = threading.Event()
+
+    def job(size):
+        with scheduler.slot("m", size=size):
+            order.append(size)
+            if size == 0:
+                hold.wait(2)
+
+    first = threading.Thread(target=job, args=(0,))
+    first.start()
+    time.sleep(0.05)
+    threads = [threading.Thread(target=job, args=(size,)) for size in (30, 5, 12)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    hold.set()
+    for thread in [first] + threads:
+        thread.join(2)
+
+    assert order == [0, 5, 12, 30]
+
+
+def test_scheduler_paces_calls_against_standin(monkeypatch):
+    with StandInAPI(rpm=120) as api:
+        monkeypatch.setenv("OPENAI_BASE_URL", api.base_url)
+        scheduler = RateLimitScheduler(max_concurrency=4)
+        transcriber = WhisperTranscriber(api_key="test-key", scheduler=scheduler)
+
+        for _ in range(3):
+            assert transcriber.transcribe(np.zeros(1600, dtype=np.float32)) == api.transcript
+
+        stats = scheduler.stats()["whisper-1"]
+        # Budget learned from the x-ratelimit-* headers
+        assert 115 <= stats["requests_available"] < 120
+        assert api.rate_limited == 0
+
+
+def test_scheduler_recovers_from_429s(monkeypatch):
+    with StandInAPI(rpm=3, latency=0.01, window=3.0) as api:
+        monkeypatch.setenv("OPENAI_BASE_URL", api.base_url)
+        scheduler = RateLimitScheduler(max_concurrency=4)
+        formatter = TextFormatter(api_key="test-key", mode="single-line", scheduler=scheduler)
+        text = "please format this long enough dictation so that it goes through the stand in model endpoint"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(formatter.format(text))) for _ in range(5)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+        assert results == [api.format_text(text)] * 5
+        # 3 requests per 3s: the 2 extra calls were rejected or held back
+        # until the budget refilled (backoff itself is test_aimd_concurrency)
+        assert api.rate_limited >= 1
+        assert api.requests == 5 + api.rate_limited
+        assert time.perf_counter() - start >= 0.5
@@ -0,0 +1,108 @@
+# tests/test_replay.py
+import os
+import subprocess
+import sys
+import pytest
+from src import trace as tr
+from src.replay import _synthetic_text, find_trace, main, replay
+
+
+def _recorded_trace(words=30):
+    trace = tr.TakeTrace("abc123def456", "single-line", started_at=1_760_000_000.0)
+    events = [tr.Event(tr.PRESS, 0.0, 0)]
+    events += [tr.Event(tr.AUDIO_BLOCK, 0.1 * i, 1600) for i in range(1, 5)]
+    events += [
+        tr.Event(tr.RELEASE, 0.45, 6400),
+        tr.Event(tr.TRANSCRIBE_START, 0.452, 6400),
+        tr.Event(tr.TRANSCRIBE_END, 0.75, words * 6),
+        tr.Event(tr.FORMAT_START, 0.751, words),
+    ]
+    for i in range(5):
+        t = 1.0 + i * 0.05
+        events += [
+            tr.Event(tr.TOKEN, t, 6),
+            tr.Event(tr.TYPE_START, t, 6),
+            tr.Event(tr.TYPE_END, t + 0.02, 6),
+        ]
+    events += [tr.Event(tr.FORMAT_END, 1.23, 30), tr.Event(tr.DONE, 1.231, 0)]
+    trace._events = events
+    return trace
+
+
+def test_synthetic_text_keeps_word_and_char_counts():
+    text = _synthetic_text(20, 120)
+    assert len(text.split()) == 20
+    assert abs(len(text) - 120) < 20
+    assert _synthetic_text(0, 10) == ""
+
+
+def test_replay_reproduces_timing():
+    recorded = _recorded_trace()
+    replayed = replay(recorded, speed=2.0)
+
+    expected, actual = recorded.summary(), replayed.summary()
+    for key in ("held_ms", "transcribe_end_ms", "first_token_ms", "last_keystroke_ms"):
+        assert actual[key] == pytest.approx(expected[key], abs=60), key
+    assert [e.value for e in replayed.events if e.kind == tr.AUDIO_BLOCK] == [1600] * 4
+    assert replayed.first(tr.FORMAT_START).value == 30
+
+
+def test_replay_of_short_take_skips_gpt():
+    recorded = _recorded_trace(words=4)
+    replayed = replay(recorded, speed=4.0)
+    # Four words is below the GPT threshold: one token, typed right away
+    assert [e.kind for e in replayed.events].count(tr.TOKEN) == 1
+    assert replayed.summary()["first_token_ms"] < recorded.summary()["first_token_ms"]
+
+
+def test_replay_applies_recorded_params():
+    recorded = _recorded_trace(words=30)
+    recorded.params = {"short_text_threshold": 50, "no_longer_a_param": 1}
+    replayed = replay(recorded, speed=4.0)
+    # The take ran with a higher threshold, so 30 words skipped GPT then too
+    assert [e.kind for e in replayed.events].count(tr.TOKEN) == 1
+    assert replayed.params["short_text_threshold"] == 50
+
+
+def test_find_trace_by_time_of_day(tmp_path):
+    for stamp in ("20261019-103000", "20261019-104130", "20261019-110000"):
+        (tmp_path / f"{stamp}-abc.trace").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("")
+
+    assert find_trace(str(tmp_path), "10:42").endswith("20261019-104130-abc.trace")
+    assert find_trace(str(tmp_path), "11:05").endswith("20261019-110000-abc.trace")
+
+
+def test_find_trace_with_date(tmp_path):
+    for stamp in ("20261018-104000", "20261019-104500"):
+        (tmp_path / f"{stamp}-abc.trace").write_bytes(b"")
+
+    assert find_trace(str(tmp_path), "10:40").endswith("20261018-104000-abc.trace")
+    assert find_trace(str(tmp_path), "2026-10-19 10:40").endswith("20261019-104500-abc.trace")
+    with pytest.raises(ValueError):
+        find_trace(str(tmp_path), "10")
+
+
+@pytest.mark.parametrize("args", [["--at", "10"], ["--at", "25:00"], ["--speed", "0"], ["--speed", "-1"]])
+def test_main_rejects_bad_arguments(tmp_path, args):
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(tmp_path), *args])
+    assert exit_info.value.code == 2
+
+
+def test_replay_runs_without_audio_or_keyboard_libraries():
+    # No PortAudio or display on a build agent: block both and replay a take
+    code = (
+        "import sys\n"
+        "for name in ('sounddevice', 'pynput', 'pynput.keyboard'): sys.modules[name] = None\n"
+        "from src.replay import replay\n"
+        "from tests.test_replay import _recorded_trace\n"
+        "print(replay(_recorded_trace(words=4), speed=4.0).summary()['done_ms'] is not None)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "True"
@@ -0,0 +1,90 @@
+# tests/test_routing.py
+import json
+from src.routing import ModelRouter, Route
+
+
+def test_router_sizes_max_tokens_from_input():
+    router = ModelRouter()
+    short = router.choose("hello there", "single-line")
+    long = router.choose("word " * 400, "document")
+
+    assert short.max_tokens == ModelRouter.MIN_TOKENS
+    assert long.max_tokens == 500 * 3 // 2 + ModelRouter.OUTPUT_HEADROOM
+    assert router.choose("word " * 10000, "document").max_tokens == ModelRouter.MAX_TOKENS
+
+
+def test_router_budget_covers_non_latin_input():
+    router = ModelRouter()
+    chinese = "今天我们讨论了项目的进展情况和下一步的计划" * 10  # 200 characters
+    russian = "Сегодня мы обсудили ход проекта и планы " * 5  # 200 characters
+
+    # At least one token per character: never cut CJK output short
+    assert router.choose(chinese, "document").max_tokens >= len(chinese)
+    assert router.choose(russian, "document").max_tokens >= len(russian)
+    assert ModelRouter.estimate_tokens("naïve café") == 4
+
+
+def test_router_picks_first_matching_route():
+    router = ModelRouter()
+    assert router.choose("a few words " * 5, "single-line").route == "short"
+    assert router.choose("many words " * 100, "single-line").route == "default"
+
+
+def test_router_switches_route_when_ttft_is_high():
+    router = ModelRouter()
+    text = "many words " * 100
+    decision = router.choose(text, "document")
+
+    router.record(decision, ttft=3.0, total=4.0)
+    busy = router.choose(text, "document")
+    assert busy.route == "busy"
+    assert busy.model == "gpt-4.1-nano"
+
+    for _ in range(10):
+        router.record(busy, ttft=0.2, total=0.5)
+    assert router.choose(text, "document").route == "default"
+
+
+def test_router_mode_filter():
+    router = ModelRouter([Route("docs", "model-a", modes=("document",)), Route("default", "model-b")])
+    assert router.choose("text", "document").model == "model-a"
+    assert router.choose("text", "single-line").model == "model-b"
+
+
+def test_router_records_per_route_stats():
+    router = ModelRouter()
+    decision = router.choose("hello", "single-line")
+    router.record(decision, ttft=0.4, total=1.0)
+    router.record(decision, ttft=0.6, total=1.2, truncated=True)
+
+    stats = router.stats()
+    assert stats["routes"]["short"]["calls"] == 2
+    assert stats["routes"]["short"]["truncated"] == 1
+    assert stats["routes"]["short"]["ttft_p50"] == 0.6
+    assert stats["table"][0]["name"] == "short"
+
+
+def test_router_ignores_missing_ttft():
+    router = ModelRouter()
+    decision = router.choose("hello", "single-line")
+    router.record(decision, ttft=0.4, total=1.0)
+    router.record(decision, ttft=None, total=5.0)
+
+    stats = router.stats()
+    assert stats["recent_ttft"] == 0.4
+    assert stats["routes"]["short"]["calls"] == 2
+    assert stats["routes"]["short"]["ttft_p95"] == 0.4
+    assert stats["routes"]["short"]["total_p95"] == 5.0
+
+
+def test_router_from_json(tmp_path):
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps([
+        {"name": "docs", "model": "model-a", "modes": ["document"], "temperature": 0},
+        {"name": "default", "model": "model-b"},
+    ]))
+    router = ModelRouter.from_json(str(path))
+
+    decision = router.choose("text", "document")
+    assert decision.model == "model-a"
+    assert decision.temperature == 0
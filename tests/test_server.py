@@ -0,0 +1,232 @@
+# tests/test_server.py
+import json
+import time
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from src import server
+from src.archive import to_wav_bytes
+from src.config import RuntimeConfig
+from src.ingest import IngestPool
+from src.ratelimit import RateLimitScheduler
+from src.timeseries import TimeSeriesStore
+
+
+def _client_with_archive(audio_by_id, retranscribe=None):
+    server.set_archive_callbacks(
+        get_audio=audio_by_id.get,
+        retranscribe=retranscribe or (lambda entry_id: None),
+    )
+    return TestClient(server.app)
+
+
+def test_history_audio_serves_wav():
+    client = _client_with_archive({"abc": np.zeros(1600, dtype=np.float32)})
+    response = client.get("/api/history/abc/audio")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/wav"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.content[:4] == b"RIFF"
+
+
+def test_history_audio_supports_ranges():
+    client = _client_with_archive({"abc": np.zeros(1600, dtype=np.float32)})
+    full = client.get("/api/history/abc/audio").content
+
+    response = client.get("/api/history/abc/audio", headers={"Range": "bytes=4-11"})
+    assert response.status_code == 206
+    assert response.content == full[4:12]
+    assert response.headers["content-range"] == f"bytes 4-11/{len(full)}"
+
+    response = client.get("/api/history/abc/audio", headers={"Range": "bytes=-10"})
+    assert response.content == full[-10:]
+
+    response = client.get("/api/history/abc/audio", headers={"Range": f"bytes={len(full)}-"})
+    assert response.status_code == 416
+
+    # An invalid range is ignored rather than rejected
+    response = client.get("/api/history/abc/audio", headers={"Range": "bytes=5-3"})
+    assert response.status_code == 200
+    assert response.content == full
+
+
+def test_history_audio_missing_entry():
+    client = _client_with_archive({})
+    assert client.get("/api/history/nope/audio").status_code == 404
+
+
+def test_retranscribe_updates_history():
+    server.state["history"] = [{"id": "abc", "text": "old", "timestamp": ""}]
+    client = _client_with_archive({}, retranscribe=lambda entry_id: ("raw", "New text."))
+
+    response = client.post("/api/history/abc/retranscribe")
+
+    assert response.json() == {"id": "abc", "raw": "raw", "text": "New text."}
+    assert server.state["history"][0]["text"] == "New text."
+
+
+def _ingest_client():
+    transcriber = Mock()
+    transcriber.transcribe.side_effect = lambda audio, params: f"{len(audio)} samples"
+    formatter = Mock()
+
+    def fake_format(raw, on_token, mode, params):
+        for token in ["Got ", raw, "."]:
+            on_token(token)
+        return f"Got {raw}."
+
+    formatter.format.side_effect = fake_format
+    pool = IngestPool(transcriber, formatter, workers=2)
+    pool.start()
+    server.set_ingest_pool(pool)
+    return TestClient(server.app), pool
+
+
+def test_ingest_upload_streams_tokens():
+    client, pool = _ingest_client()
+    try:
+        wav = to_wav_bytes(np.zeros(3200, dtype=np.float32))
+        response = client.post("/api/ingest?mode=document", content=wav)
+        messages = [json.loads(line) for line in response.text.splitlines()]
+    finally:
+        pool.stop()
+
+    assert [m["text"] for m in messages[:-1]] == ["Got ", "3200 samples", "."]
+    assert messages[-1]["type"] == "done"
+    assert messages[-1]["text"] == "Got 3200 samples."
+
+
+def test_ingest_websocket_streams_tokens():
+    client, pool = _ingest_client()
+    try:
+        with client.websocket_connect("/ws/ingest?client_id=test") as ws:
+            ws.send_bytes(np.zeros(800, dtype="<i2").tobytes())
+            ws.send_bytes(np.zeros(800, dtype="<i2").tobytes())
+            ws.send_text(json.dumps({"type": "end"}))
+            messages = [ws.receive_json() for _ in range(4)]
+    finally:
+        pool.stop()
+
+    assert "".join(m["text"] for m in messages[:3]) == "Got 1600 samples."
+    assert messages[3] == {"type": "done", "utterance": 0, "raw": "1600 samples", "text": "Got 1600 samples."}
+
+
+def test_ingest_websocket_survives_bad_messages():
+    client, pool = _ingest_client()
+    try:
+        with client.websocket_connect("/ws/ingest?client_id=test") as ws:
+            ws.send_bytes(b"\x00\x00\x00")  # Odd length for 16-bit PCM
+            assert ws.receive_json()["type"] == "error"
+            ws.send_text("{not json")
+            assert ws.receive_json()["type"] == "error"
+            ws.send_text(json.dumps({"type": "end"}))
+            assert ws.receive_json() == {"type": "error", "utterance": 0, "error": "No audio in utterance"}
+            ws.send_text(json.dumps({"type": "mode", "mode": "shouting"}))
+            assert ws.receive_json()["type"] == "error"
+
+            ws.send_bytes(np.zeros(800, dtype="<i2").tobytes())
+            ws.send_text(json.dumps({"type": "end"}))
+            messages = [ws.receive_json() for _ in range(4)]
+    finally:
+        pool.stop()
+
+    assert messages[3]["type"] == "done"
+    assert messages[3]["utterance"] == 1
+
+
+def test_ingest_rejects_bad_rate_and_mode():
+    client, pool = _ingest_client()
+    try:
+        assert client.post("/api/ingest?rate=0", content=b"\x00\x00").status_code == 400
+        assert client.post("/api/ingest?mode=shouting", content=b"\x00\x00").status_code == 400
+        for query in ("rate=0", "mode=shouting"):
+            with client.websocket_connect(f"/ws/ingest?{query}") as ws:
+                with pytest.raises(WebSocketDisconnect) as closed:
+                    ws.receive_json()
+                assert closed.value.code == 1003
+    finally:
+        pool.stop()
+
+
+def test_token_required_when_set():
+    server.set_token("secret")
+    try:
+        client = TestClient(server.app)
+        assert client.get("/api/mode").status_code == 401
+        assert client.get("/api/mode", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get("/api/mode", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+        # The dashboard opened with ?token= sets a cookie for its own requests
+        assert client.get("/api/mode?token=secret").status_code == 200
+        assert client.get("/api/mode").status_code == 200
+
+        anonymous = TestClient(server.app)
+        with pytest.raises(WebSocketDisconnect):
+            with anonymous.websocket_connect("/ws"):
+                pass
+    finally:
+        server.set_token(None)
+
+
+def test_profile_start_and_stop():
+    client = TestClient(server.app)
+
+    assert client.post("/api/profile/stop").status_code == 409
+    assert client.post("/api/profile/start?interval_ms=0").status_code == 400
+    assert client.post("/api/profile/start?interval_ms=-5").status_code == 400
+    assert client.post("/api/profile/start?interval_ms=1").json()["status"] == "running"
+    assert client.post("/api/profile/start").status_code == 409
+    time.sleep(0.05)
+    result = client.post("/api/profile/stop").json()
+
+    assert result["samples"] > 0
+    assert result["speedscope"]["profiles"]
+    assert "function calls" in result["pstats"]
+
+
+def test_ratelimit_reports_scheduler_state():
+    scheduler = RateLimitScheduler(max_concurrency=4)
+    scheduler._on_success("whisper-1", {"x-ratelimit-limit-requests": "50", "x-ratelimit-remaining-requests": "49"})
+    server.set_scheduler(scheduler)
+    response = TestClient(server.app).get("/api/ratelimit")
+
+    assert response.status_code == 200
+    assert response.json()["whisper-1"]["concurrency"] == 4
+    assert response.json()["whisper-1"]["requests_available"] >= 49
+
+
+def test_timeseries_serves_recorded_metrics():
+    store = TimeSeriesStore()
+    store.record("take_ms", 120)
+    store.record("take_ms", 80)
+    server.set_timeseries(store)
+    client = TestClient(server.app)
+
+    data = client.get("/api/timeseries?resolution=hour").json()
+    assert data["step"] == 3600
+    assert data["series"]["take_ms"]["mean"] == [100]
+
+    assert client.get("/api/timeseries?metric=nope").status_code == 404
+    assert client.get("/api/timeseries?resolution=week").status_code == 400
+
+
+def test_config_updates_and_experiments():
+    config = RuntimeConfig(seed=0)
+    server.set_config(config)
+    client = TestClient(server.app)
+
+    params = {p["name"]: p for p in client.get("/api/config").json()["params"]}
+    assert params["short_text_threshold"]["value"] == 15
+
+    assert client.post("/api/config", json={"short_text_threshold": 25}).json()["values"]["short_text_threshold"] == 25
+    assert config["short_text_threshold"] == 25
+    assert client.post("/api/config", json={"short_text_threshold": -1}).status_code == 400
+    assert client.post("/api/config", json=[1]).status_code == 400
+
+    response = client.post("/api/config/experiment", json={"variants": {"control": {}, "nano": {"format_model": "gpt-4.1-nano"}}})
+    assert response.json()["running"] is True
+    assert client.post("/api/config/experiment", json={"variants": {"solo": {}}}).status_code == 400
+    assert client.delete("/api/config/experiment").json()["running"] is False
@@ -0,0 +1,93 @@
+# tests/test_soak.py
+import functools
+import os
+import subprocess
+import sys
+import threading
+import numpy as np
+from src import server
+from src.audio import AudioRecorder
+from src.soak import FakeInputStream, Limits, Sample, check, run
+
+
+def _sample(cycle, rss=100.0, threads=5, fds=10, latency=50.0):
+    return Sample(cycle, cycle * 0.1, rss, threads, fds, latency)
+
+
+def test_fake_input_stream_feeds_recorder():
+    recorder = AudioRecorder(input_stream=functools.partial(FakeInputStream, speed=10.0))
+    recorder.start()
+    threading.Event().wait(0.05)
+    audio = recorder.stop()
+
+    assert audio.dtype == np.float32
+    assert len(audio) >= FakeInputStream.BLOCK_FRAMES
+    assert np.abs(audio).max() > 0
+
+
+def test_check_passes_flat_run():
+    samples = [_sample(cycle) for cycle in range(10, 210, 10)]
+    assert check(samples, Limits(), warmup=20) == []
+
+
+def test_check_reports_growth_past_limits():
+    samples = [
+        _sample(cycle, rss=100 + cycle, threads=5 + cycle // 10, fds=10 + cycle // 5, latency=50 + cycle)
+        for cycle in range(10, 210, 10)
+    ]
+    failures = check(samples, Limits(), warmup=20)
+
+    assert len(failures) == 4
+    assert failures[0].startswith("rss_mb grew by")
+    assert "take latency drifted" in failures[3]
+
+
+def test_check_ignores_warmup_and_single_outliers():
+    samples = [_sample(10, rss=10.0, threads=1)] + [_sample(cycle) for cycle in range(20, 210, 10)]
+    samples[10] = _sample(samples[10].cycle, latency=5000.0)
+    assert check(samples, Limits(), warmup=10) == []
+
+
+def test_short_soak_run_passes(tmp_path):
+    report = run(cycles=20, hold=0.02, sample_every=5, warmup=5, archive_dir=str(tmp_path), latency=0)
+
+    assert report["passed"], report["failures"]
+    assert report["cycles"] == 20
+    assert report["transcribed"] == 20
+    assert report["typed_chars"] > 0
+    # Odd cycles use a long transcript, so they also call the formatting endpoint
+    assert report["api_requests"] == 30
+    assert report["dashboard_connections"] == 0
+    assert len(report["samples"]) == 4
+
+
+class _LeakySet(set):
+    def discard(self, item):
+        pass  # Never forgets a WebSocket, like a missing finally would
+
+
+def test_soak_run_detects_leaked_dashboard_connections(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "connections", _LeakySet())
+    report = run(cycles=3, hold=0.02, sample_every=3, warmup=0, archive_dir=str(tmp_path), latency=0)
+
+    assert not report["passed"]
+    assert report["dashboard_connections"] == 3
+    assert "3 dashboard WebSocket connections" in report["failures"][0]
+
+
+def test_soak_runs_without_audio_or_keyboard_libraries(tmp_path):
+    # No PortAudio or display on a build agent: block both and run a few cycles
+    code = (
+        "import sys\n"
+        "for name in ('sounddevice', 'pynput', 'pynput.keyboard'): sys.modules[name] = None\n"
+        "from src.soak import run\n"
+        f"report = run(cycles=4, hold=0.02, sample_every=2, warmup=0, archive_dir={str(tmp_path)!r}, latency=0)\n"
+        "print(report['transcribed'])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "4"
@@ -0,0 +1,49 @@
+# tests/test_textstream.py
+import random
+from src.textstream import CollapseSpaces, FoldNewlines, StripEdges, TextPipeline, pipeline_for_mode
+
+
+def _stream(pipeline: TextPipeline, tokens: list[str]) -> str:
+    out = "".join(pipeline.feed(token) for token in tokens) + pipeline.flush()
+    assert out == pipeline.text
+    return out
+
+
+def test_fold_newlines_handles_crlf_split_across_tokens():
+    pipeline = TextPipeline([FoldNewlines("\n")])
+    assert _stream(pipeline, ["one\r", "\ntwo\r", "three\r"]) == "one\ntwo\nthree\n"
+
+
+def test_collapse_spaces_across_boundaries():
+    pipeline = TextPipeline([CollapseSpaces()])
+    assert _stream(pipeline, ["Hello ", " ", "  world  and", "  more"]) == "Hello world and more"
+
+
+def test_strip_edges_holds_trailing_whitespace():
+    pipeline = TextPipeline([StripEdges()])
+    assert pipeline.feed("  Hello ") == "Hello"
+    assert pipeline.feed(" ") == ""
+    assert pipeline.feed("world\n") == "  world"
+    assert pipeline.flush() == ""
+    assert pipeline.text == "Hello  world"
+
+
+def test_single_line_mode():
+    tokens = ["First line.\r", "\n", "Second  ", " line.\n\n", "Third."]
+    assert _stream(pipeline_for_mode("single-line"), tokens) == "First line. Second line. Third."
+
+
+def test_document_mode_keeps_paragraphs():
+    tokens = ["Dear team,\r", "\n\r\n", "Thanks.\n"]
+    assert _stream(pipeline_for_mode("document"), tokens) == "Dear team,\n\nThanks."
+
+
+def test_streaming_matches_whole_string():
+    rng = random.Random(42)
+    pieces = ["word", " ", "  ", "\n", "\r\n", "\r", ",", "x"]
+    for mode in ("single-line", "document"):
+        for _ in range(200):
+            text = "".join(rng.choice(pieces) for _ in range(40))
+            cuts = sorted(rng.sample(range(1, len(text)), 8)) if len(text) > 9 else []
+            tokens = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+            assert _stream(pipeline_for_mode(mode), tokens) == pipeline_for_mode(mode).run(text)
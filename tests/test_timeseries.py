@@ -0,0 +1,86 @@
+# tests/test_timeseries.py
+import pytest
+from src.timeseries import RESOLUTIONS, TimeSeriesStore
+
+DAY = 86400.0
+T0 = 1_700_000_000.0 - 1_700_000_000.0 % DAY  # Midnight, so every resolution aligns
+
+
+def test_values_are_consolidated_per_resolution():
+    store = TimeSeriesStore()
+    store.record("take_ms", 100, t=T0)
+    store.record("take_ms", 300, t=T0 + 30)
+    store.record("take_ms", 200, t=T0 + 90)
+
+    minute = store.query("take_ms", "minute", until=T0 + 120)
+    assert minute["t"] == [T0, T0 + 60]
+    assert minute["count"] == [2, 1]
+    assert minute["mean"] == [200, 200]
+    assert minute["min"] == [100, 200]
+    assert minute["max"] == [300, 200]
+
+    for resolution in ("hour", "day"):
+        data = store.query("take_ms", resolution, until=T0 + 120)
+        assert data["count"] == [3]
+        assert data["mean"] == [200]
+
+
+def test_ring_overwrites_expired_slots():
+    store = TimeSeriesStore()
+    step, slots = RESOLUTIONS["minute"]
+    store.record("format_ms", 1, t=T0)
+    store.record("format_ms", 5, t=T0 + step * slots)  # Same slot, one ring later
+
+    data = store.query("format_ms", "minute", since=0, until=T0 + step * slots)
+    assert data["t"] == [T0 + step * slots]
+    assert data["count"] == [1]
+    assert data["mean"] == [5]
+    # Coarser rings still hold both values
+    assert store.query("format_ms", "hour", since=0, until=T0 + DAY)["mean"] == [1, 5]
+
+
+def test_query_range_and_unknown_metric():
+    store = TimeSeriesStore()
+    for i in range(10):
+        store.record("api_skipped", i % 2, t=T0 + i * 60)
+
+    data = store.query("api_skipped", "minute", since=T0 + 120, until=T0 + 299)
+    assert data["t"] == [T0 + 120, T0 + 180, T0 + 240]
+    assert store.query("api_skipped", "hour", until=T0 + 600)["mean"] == [pytest.approx(0.5)]
+    assert store.query("missing") is None
+    assert store.metrics() == ["api_skipped"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "metrics.npz")
+    store = TimeSeriesStore(path=path)
+    store.record("transcribe_ms", 420, t=T0)
+    store.record("audio_seconds", 3.5, t=T0)
+    store.close()
+
+    loaded = TimeSeriesStore(path=path)
+    assert loaded.metrics() == ["audio_seconds", "transcribe_ms"]
+    assert loaded.query("transcribe_ms", "minute", until=T0 + 1)["mean"] == [420]
+    loaded.record("transcribe_ms", 380, t=T0 + 10)
+    assert loaded.query("transcribe_ms", "minute", until=T0 + 11)["mean"] == [400]
+
+
+def test_autosave_writes_periodically(tmp_path):
+    path = tmp_path / "metrics.npz"
+    store = TimeSeriesStore(path=str(path), save_interval=0.01)
+    store.record("take_ms", 1)
+    store.start()
+    try:
+        for _ in range(200):
+            if path.exists():
+                break
+            store._stop.wait(0.01)
+        assert path.exists()
+    finally:
+        store.close()
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / "metrics.npz"
+    path.write_bytes(b"not a zip file")
+    assert TimeSeriesStore(path=str(path)).metrics() == []
@@ -0,0 +1,113 @@
+# tests/test_trace.py
+import os
+import threading
+import time
+import pytest
+from src import trace as tr
+from src.audio import AudioRecorder
+from src.dictation import DictationService
+from src.soak import FakeInputStream, LONG_TRANSCRIPT
+from src.standin import StandInAPI, client_env
+
+
+def _trace():
+    trace = tr.TakeTrace("abc123def456", "document", started_at=1_760_000_000.0)
+    trace._events = [
+        tr.Event(tr.PRESS, 0.0, 0),
+        tr.Event(tr.AUDIO_BLOCK, 0.1, 1600),
+        tr.Event(tr.RELEASE, 0.5, 8000),
+        tr.Event(tr.TRANSCRIBE_START, 0.501, 8000),
+        tr.Event(tr.TRANSCRIBE_END, 0.9, 120),
+        tr.Event(tr.FORMAT_START, 0.901, 22),
+        tr.Event(tr.TOKEN, 1.2, 5),
+        tr.Event(tr.TYPE_START, 1.2, 5),
+        tr.Event(tr.TYPE_END, 1.21, 5),
+        tr.Event(tr.FORMAT_END, 1.3, 118),
+        tr.Event(tr.DONE, 1.31, 0),
+    ]
+    return trace
+
+
+def test_round_trip_is_compact():
+    trace = _trace()
+    data = trace.to_bytes()
+    loaded = tr.TakeTrace.from_bytes(data)
+
+    assert len(data) == 60 + 9 * 11
+    assert (loaded.take_id, loaded.mode, loaded.started_at) == ("abc123def456", "document", 1_760_000_000.0)
+    assert (loaded.variant, loaded.params) == ("", {})
+    assert [(e.kind, e.value) for e in loaded.events] == [(e.kind, e.value) for e in trace.events]
+    assert [e.t for e in loaded.events] == pytest.approx([e.t for e in trace.events], abs=1e-6)
+
+
+def test_round_trip_keeps_variant_and_params():
+    trace = _trace()
+    trace.variant = "nano"
+    trace.params = {"short_text_threshold": 25, "format_model": "gpt-4.1-nano"}
+    loaded = tr.TakeTrace.from_bytes(trace.to_bytes())
+
+    assert loaded.variant == "nano"
+    assert loaded.params == trace.params
+    assert len(loaded.events) == 11
+
+
+def test_torn_and_foreign_files():
+    data = _trace().to_bytes()
+    assert len(tr.TakeTrace.from_bytes(data[:-4]).events) == 10
+    with pytest.raises(ValueError):
+        tr.TakeTrace.from_bytes(b"RIFF" + data[4:])
+    with pytest.raises(ValueError):
+        tr.TakeTrace.from_bytes(data[:10])
+
+
+def test_summary_is_relative_to_release():
+    summary = _trace().summary()
+    assert summary["held_ms"] == 500.0
+    assert summary["transcribe_end_ms"] == 400.0
+    assert summary["first_token_ms"] == 700.0
+    assert summary["last_keystroke_ms"] == 710.0
+    assert _trace().scaled(2).summary()["first_token_ms"] == 1400.0
+
+
+def test_save_names_by_time_and_prune(tmp_path):
+    for i in range(5):
+        trace = _trace()
+        trace.started_at += i
+        trace.save(str(tmp_path))
+    tr.prune(str(tmp_path), keep=3)
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 3
+    assert names[-1].endswith("-abc123def456.trace")
+    assert names[0] == time.strftime("%Y%m%d-%H%M%S", time.localtime(1_760_000_002.0)) + "-abc123def456.trace"
+
+
+def test_dictation_records_trace_of_take(tmp_path):
+    idle = threading.Event()
+    with StandInAPI(transcript=LONG_TRANSCRIPT, token_delay=0.001) as api, client_env(api.base_url):
+        service = DictationService(
+            api_key="test-key",
+            on_status_change=lambda status: idle.set() if status == "idle" else None,
+            recorder=AudioRecorder(input_stream=FakeInputStream),
+            typer=type("Typer", (), {"type_text": lambda self, text: None})(),
+            trace_dir=str(tmp_path),
+        )
+        service._on_hotkey_press()
+        time.sleep(0.05)
+        idle.clear()
+        service._on_hotkey_release()
+        assert idle.wait(10)
+        for _ in range(100):
+            if os.listdir(tmp_path):
+                break
+            time.sleep(0.01)
+
+    (name,) = os.listdir(tmp_path)
+    trace = tr.TakeTrace.load(str(tmp_path / name))
+    kinds = [e.kind for e in trace.events]
+    assert kinds[0] == tr.PRESS and kinds[-1] == tr.DONE
+    assert tr.AUDIO_BLOCK in kinds and kinds.count(tr.TOKEN) > 3
+    assert trace.first(tr.FORMAT_START).value == len(LONG_TRANSCRIPT.split())
+    assert sum(e.value for e in trace.events if e.kind == tr.TYPE_END) == trace.first(tr.FORMAT_END).value
+    assert trace.mode == "single-line"
+    assert trace.params["short_text_threshold"] == 15
@@ -24,3 +24,18 @@ def test_transcriber_sends_audio_to_api():
 
         assert result == "Hello world"
         mock_client.audio.transcriptions.create.assert_called_once()
+
+
+def test_transcriber_sends_file_as_is(tmp_path):
+    with patch("src.transcribe.OpenAI") as mock_openai:
+        mock_client = Mock()
+        mock_openai.return_value = mock_client
+        mock_client.audio.transcriptions.create.return_value = Mock(text=" Meeting notes ", duration=61.5)
+
+        path = tmp_path / "memo.m4a"
+        path.write_bytes(b"fake audio")
+        transcriber = WhisperTranscriber(api_key="test-key")
+
+        assert transcriber.transcribe_file(str(path)) == ("Meeting notes", 61.5)
+        kwargs = mock_client.audio.transcriptions.create.call_args.kwargs
+        assert kwargs["response_format"] == "verbose_json"